@@ -0,0 +1,345 @@
+"""
+End-to-end client benchmarks against the local stub API server.
+
+Runs MazalbotClient workloads against benchmarks/stub_server.py and reports
+throughput, per-operation latency percentiles and peak traced memory:
+
+    paging       walk get_diamonds page by page, then fetch_all_diamonds
+    upload       add_diamonds in batches, then upload_diamonds
+    search       search_diamonds with random grade/range criteria
+    mixed_crud   concurrent get/add/update/delete against one inventory
+
+Timings come from a pass without tracemalloc; peak memory is measured in a
+second, traced pass so tracing overhead does not skew the timings.
+
+Usage:
+    python benchmarks/bench_client.py [--inventory 20000] [--latency 0.002] [--output results.json]
+    python benchmarks/bench_client.py --compare baseline.json [--threshold 0.10]
+
+With --compare the results are checked against a previous --output file and
+the script exits with status 1 if any metric regressed by more than the
+threshold.
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from mazalbot_client import MazalbotClient  # noqa: E402
+from stub_server import CLARITIES, COLORS, SHAPES, StubMazalbotServer, make_diamond  # noqa: E402
+
+
+# Metric name -> True if a higher value is better
+COMPARED_METRICS = {
+    "throughput": True,
+    "latency_p50": False,
+    "latency_p95": False,
+    "latency_p99": False,
+    "peak_memory": False,
+}
+
+
+def percentile(sorted_values: List[float], percent: float) -> float:
+    if not sorted_values:
+        return 0.0
+    rank = min(len(sorted_values) - 1, max(0, int(round(percent / 100 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[rank]
+
+
+class Recorder:
+    """Thread-safe list of per-operation latencies"""
+    
+    def __init__(self):
+        self.latencies: List[float] = []
+        self.failures = 0
+        self._lock = threading.Lock()
+    
+    def timed(self, func: Callable[[], Any]) -> Any:
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        ok = getattr(result, "success", True)
+        with self._lock:
+            self.latencies.append(elapsed)
+            if not ok:
+                self.failures += 1
+        return result
+
+
+def scenario_paging(client: MazalbotClient, server: StubMazalbotServer, args: argparse.Namespace, recorder: Recorder) -> int:
+    page = 1
+    while True:
+        response = recorder.timed(lambda: client.get_diamonds(page=page, limit=args.page_size))
+        if not response.success or page >= int(response.headers.get("X-Total-Pages", page)):
+            break
+        page += 1
+    recorder.timed(lambda: client.fetch_all_diamonds(page_size=args.page_size, workers=args.workers))
+    return server.inventory_size() * 2
+
+
+def scenario_upload(client: MazalbotClient, server: StubMazalbotServer, args: argparse.Namespace, recorder: Recorder) -> int:
+    rng = random.Random(args.seed)
+    diamonds = [make_diamond(rng, 10 ** 6 + index, server.user_id) for index in range(args.upload)]
+    for diamond in diamonds:
+        del diamond["id"]
+    for start in range(0, len(diamonds), args.batch_size):
+        batch = diamonds[start:start + args.batch_size]
+        recorder.timed(lambda: client.add_diamonds(batch))
+    recorder.timed(lambda: client.upload_diamonds(diamonds, chunk_size=args.batch_size, concurrency=args.workers))
+    return len(diamonds) * 2
+
+
+def random_criteria(rng: random.Random) -> Dict[str, Any]:
+    criteria: Dict[str, Any] = {"shape": rng.choice(SHAPES)}
+    if rng.random() < 0.7:
+        criteria["color"] = rng.sample(COLORS, 3)
+    if rng.random() < 0.5:
+        criteria["clarity"] = rng.choice(CLARITIES)
+    if rng.random() < 0.6:
+        low = round(rng.uniform(0.3, 3.0), 2)
+        criteria["min_weight"] = low
+        criteria["max_weight"] = round(low + rng.uniform(0.2, 2.0), 2)
+    if rng.random() < 0.4:
+        criteria["max_price"] = rng.randint(5000, 60000)
+    return criteria
+
+
+def scenario_search(client: MazalbotClient, server: StubMazalbotServer, args: argparse.Namespace, recorder: Recorder) -> int:
+    rng = random.Random(args.seed)
+    queries = [random_criteria(rng) for _ in range(args.searches)]
+    with ThreadPoolExecutor(max_workers=args.workers) as executor:
+        list(executor.map(lambda query: recorder.timed(lambda: client.search_diamonds(query)), queries))
+    return len(queries)
+
+
+def scenario_mixed_crud(client: MazalbotClient, server: StubMazalbotServer, args: argparse.Namespace, recorder: Recorder) -> int:
+    response = client.get_diamonds(page=1, limit=args.operations)
+    ids = [diamond["id"] for diamond in response.data or []]
+    ids_lock = threading.Lock()
+    
+    def operation(index: int) -> None:
+        rng = random.Random(args.seed + index)
+        roll = rng.random()
+        with ids_lock:
+            diamond_id = rng.choice(ids) if ids else None
+        if roll < 0.6 and diamond_id:
+            recorder.timed(lambda: client.get_diamond(diamond_id))
+        elif roll < 0.8 and diamond_id:
+            recorder.timed(lambda: client.update_diamond(diamond_id, {"price_per_carat": rng.randint(1500, 25000)}))
+        elif roll < 0.9:
+            diamond = make_diamond(rng, 2 * 10 ** 6 + index, server.user_id)
+            del diamond["id"]
+            recorder.timed(lambda: client.add_diamond(diamond))
+        elif diamond_id:
+            with ids_lock:
+                if diamond_id not in ids:
+                    return
+                ids.remove(diamond_id)
+            recorder.timed(lambda: client.delete_diamond(diamond_id))
+    
+    with ThreadPoolExecutor(max_workers=args.workers) as executor:
+        list(executor.map(operation, range(args.operations)))
+    return len(recorder.latencies)
+
+
+SCENARIOS: Dict[str, Callable[[MazalbotClient, StubMazalbotServer, argparse.Namespace, Recorder], int]] = {
+    "paging": scenario_paging,
+    "upload": scenario_upload,
+    "search": scenario_search,
+    "mixed_crud": scenario_mixed_crud,
+}
+
+
+def run_once(name: str, args: argparse.Namespace, trace_memory: bool) -> Tuple[Dict[str, Any], Recorder, float]:
+    """Run one scenario against a fresh server; returns (client stats, recorder, elapsed or peak bytes)"""
+    server = StubMazalbotServer(
+        inventory_size=args.inventory,
+        latency=args.latency,
+        latency_jitter=args.jitter,
+        error_rate=args.error_rate,
+        seed=args.seed
+    )
+    with server:
+        client = MazalbotClient(
+            base_url=server.url,
+            access_token=server.access_token,
+            user_id=server.user_id,
+            retry_delay=0.01,
+            log_level="WARNING",
+            pool_size=max(10, args.workers)
+        )
+        recorder = Recorder()
+        try:
+            if trace_memory:
+                tracemalloc.start()
+                tracemalloc.reset_peak()
+            start = time.perf_counter()
+            items = SCENARIOS[name](client, server, args, recorder)
+            elapsed = time.perf_counter() - start
+            measured = float(tracemalloc.get_traced_memory()[1]) if trace_memory else elapsed
+        finally:
+            if trace_memory:
+                tracemalloc.stop()
+            stats = client.stats()
+            client.close()
+    endpoints = {
+        key: {
+            "requests": endpoint.requests,
+            "retries": endpoint.retries,
+            "latency_p50": endpoint.latency_p50,
+            "latency_p95": endpoint.latency_p95,
+            "latency_p99": endpoint.latency_p99,
+        }
+        for key, endpoint in stats.items()
+    }
+    return {"items": items, "endpoints": endpoints}, recorder, measured
+
+
+def run_scenario(name: str, args: argparse.Namespace) -> Dict[str, Any]:
+    runs = [run_once(name, args, trace_memory=False) for _ in range(args.repeat)]
+    # Report the median run by elapsed time
+    runs.sort(key=lambda run: run[2])
+    details, recorder, elapsed = runs[len(runs) // 2]
+    latencies = sorted(recorder.latencies)
+    result = {
+        "operations": len(latencies),
+        "items": details["items"],
+        "failures": recorder.failures,
+        "elapsed": elapsed,
+        "throughput": details["items"] / elapsed if elapsed else 0.0,
+        "latency_mean": statistics.fmean(latencies) if latencies else 0.0,
+        "latency_p50": percentile(latencies, 50),
+        "latency_p95": percentile(latencies, 95),
+        "latency_p99": percentile(latencies, 99),
+        "latency_max": latencies[-1] if latencies else 0.0,
+        "peak_memory": None,
+        "endpoints": details["endpoints"],
+    }
+    if args.memory:
+        result["peak_memory"] = int(run_once(name, args, trace_memory=True)[2])
+    return result
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True, text=True, check=True
+        ).stdout.strip() or None
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """
+    Compare two result documents.
+    
+    Args:
+        current: Results of this run
+        baseline: Results loaded from a previous --output file
+        threshold: Relative change treated as a regression (0.10 = 10%)
+        
+    Returns:
+        One description per regressed metric
+    """
+    regressions = []
+    print(f"\n{'scenario':<12}{'metric':<14}{'baseline':>14}{'current':>14}{'change':>10}")
+    for name, result in current["results"].items():
+        previous = baseline.get("results", {}).get(name)
+        if previous is None:
+            continue
+        for metric, higher_is_better in COMPARED_METRICS.items():
+            old, new = previous.get(metric), result.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            regressed = -change > threshold if higher_is_better else change > threshold
+            flag = "  REGRESSION" if regressed else ""
+            print(f"{name:<12}{metric:<14}{old:>14.6g}{new:>14.6g}{change:>+10.1%}{flag}")
+            if regressed:
+                regressions.append(f"{name}.{metric}: {old:.6g} -> {new:.6g} ({change:+.1%})")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="Comma-separated scenarios to run")
+    parser.add_argument("--inventory", type=int, default=20000, help="Stones in the stub inventory")
+    parser.add_argument("--page-size", type=int, default=500)
+    parser.add_argument("--upload", type=int, default=5000, help="Stones uploaded by the upload scenario")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--searches", type=int, default=200)
+    parser.add_argument("--operations", type=int, default=1000, help="Operations in the mixed_crud scenario")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.002, help="Stub server latency per response in seconds")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Extra random stub server latency in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of stub responses that fail with 503")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per scenario (the median is reported)")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--no-memory", dest="memory", action="store_false", help="Skip the traced memory pass")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    parser.add_argument("--compare", help="Compare against a previous --output file")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Relative change counted as a regression")
+    args = parser.parse_args()
+    
+    names = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(unknown)}")
+    
+    document = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "args": {key: value for key, value in vars(args).items() if key not in ("output", "compare")},
+        },
+        "results": {},
+    }
+    
+    print(f"{'scenario':<12}{'ops':>7}{'items/s':>11}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'fail':>6}{'peak MB':>9}")
+    for name in names:
+        result = run_scenario(name, args)
+        document["results"][name] = result
+        peak = f"{result['peak_memory'] / 1e6:.1f}" if result["peak_memory"] is not None else "-"
+        print(
+            f"{name:<12}{result['operations']:>7}{result['throughput']:>11.0f}"
+            f"{result['latency_p50'] * 1000:>9.2f}{result['latency_p95'] * 1000:>9.2f}"
+            f"{result['latency_p99'] * 1000:>9.2f}{result['failures']:>6}{peak:>9}"
+        )
+    
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output:
+            json.dump(document, output, indent=2, sort_keys=True)
+        print(f"\nResults written to {args.output}")
+    
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as baseline_file:
+            baseline = json.load(baseline_file)
+        regressions = compare(document, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) above {args.threshold:.0%}:")
+            for regression in regressions:
+                print(f"  {regression}")
+            sys.exit(1)
+        print(f"\nNo regressions above {args.threshold:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Benchmark JSON encode/decode of inventory payloads with each available codec.
+
+Encodes an upload-inventory body and decodes a get_all_stones response of
+synthetic stones, and compares both against the previous request path, which
+serialised every body twice (once by requests' ``json=``, once for the debug
+log line).
+
+Usage:
+    python benchmarks/bench_codec.py [--stones 10000] [--repeat 20]
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from typing import Any, Callable, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mazalbot_client import JsonCodec, OrjsonCodec, orjson  # noqa: E402
+
+
+SHAPES = ["Round", "Princess", "Cushion", "Emerald", "Oval", "Radiant", "Asscher", "Marquise", "Heart", "Pear"]
+COLORS = ["D", "E", "F", "G", "H", "I", "J", "K"]
+CLARITIES = ["FL", "IF", "VVS1", "VVS2", "VS1", "VS2", "SI1", "SI2"]
+GRADES = ["Excellent", "Very Good", "Good"]
+
+
+def make_stones(count: int, seed: int = 7) -> List[Dict[str, Any]]:
+    rng = random.Random(seed)
+    stones = []
+    for i in range(count):
+        weight = round(rng.uniform(0.3, 5.0), 2)
+        price_per_carat = rng.randint(1500, 25000)
+        stones.append({
+            "id": f"{i:08x}-7c1e-4b1a-9f3e-{rng.getrandbits(48):012x}",
+            "stock_number": f"S{i:06d}",
+            "shape": rng.choice(SHAPES),
+            "weight": weight,
+            "color": rng.choice(COLORS),
+            "clarity": rng.choice(CLARITIES),
+            "cut": rng.choice(GRADES),
+            "polish": rng.choice(GRADES),
+            "symmetry": rng.choice(GRADES),
+            "price_per_carat": price_per_carat,
+            "price": round(weight * price_per_carat, 2),
+            "status": "Available",
+            "certificate_number": str(rng.randint(10 ** 9, 10 ** 10)),
+            "lab": "GIA",
+            "fluorescence": "None",
+            "owners": [123456789],
+        })
+    return stones
+
+
+def best_of(repeat: int, func: Callable[[], Any]) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--stones", type=int, default=10000, help="Stones per payload")
+    parser.add_argument("--repeat", type=int, default=20, help="Runs per measurement (best is reported)")
+    args = parser.parse_args()
+    
+    stones = make_stones(args.stones)
+    upload = {"user_id": 123456789, "diamonds": stones}
+    response_body = JsonCodec().dumps({"data": stones})
+    print(f"{args.stones} stones, {len(response_body) / 1e6:.2f} MB per payload, best of {args.repeat}\n")
+    
+    rows = [(
+        "json (previous path: json= + debug dumps)",
+        best_of(args.repeat, lambda: (json.dumps(upload).encode("utf-8"), json.dumps(upload, default=str)[:500])),
+        best_of(args.repeat, lambda: json.loads(response_body.decode("utf-8")))
+    )]
+    codecs = [JsonCodec()] + ([OrjsonCodec()] if orjson is not None else [])
+    for codec in codecs:
+        rows.append((
+            codec.name,
+            best_of(args.repeat, lambda: codec.dumps(upload)),
+            best_of(args.repeat, lambda: codec.loads(response_body))
+        ))
+    if orjson is None:
+        print("orjson is not installed; only the stdlib codec was measured\n")
+    
+    baseline_encode, baseline_decode = rows[0][1], rows[0][2]
+    print(f"{'codec':<44}{'encode ms':>11}{'decode ms':>11}{'encode x':>10}{'decode x':>10}")
+    for name, encode, decode in rows:
+        print(
+            f"{name:<44}{encode * 1000:>11.2f}{decode * 1000:>11.2f}"
+            f"{baseline_encode / encode:>10.1f}{baseline_decode / decode:>10.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Benchmark the memory held by decoded inventories as dicts and as DiamondRecords.
+
+Decodes a get_all_stones response body of synthetic stones (the same stones
+the stub server serves) and measures the memory still held once the page
+has been decoded: first as the DiamondData dicts the client returns by
+default, then as DiamondRecords (``as_records=True``). Memory is measured
+with tracemalloc and, on Linux, as growth of the resident set size, which
+also counts allocations tracemalloc does not see (such as the output
+buffers of C extensions).
+Also reports the conversion cost and checks that every record converts
+back to an equal dict.
+
+Usage:
+    python benchmarks/bench_records.py [--stones 100000] [--repeat 3]
+"""
+
+import argparse
+import gc
+import os
+import random
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, List, Optional, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from mazalbot_client import DiamondRecord, default_codec  # noqa: E402
+from stub_server import make_diamond  # noqa: E402
+
+
+def resident_bytes() -> Optional[int]:
+    """Resident set size of this process, or None where /proc is unavailable"""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def held_memory(build: Callable[[], Any]) -> Tuple[int, Optional[int], Any]:
+    """Bytes still allocated after build() returns (traced, resident growth), and its result"""
+    gc.collect()
+    resident = resident_bytes()
+    tracemalloc.start()
+    try:
+        result = build()
+        gc.collect()
+        held, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    if resident is not None:
+        resident = resident_bytes() - resident
+    return held, resident, result
+
+
+def best_of(repeat: int, function: Callable[[], Any]) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--stones", type=int, default=100000, help="Stones in the decoded page")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per timing (best is reported)")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    
+    rng = random.Random(args.seed)
+    codec = default_codec()
+    body = codec.dumps([make_diamond(rng, index, 123456789) for index in range(args.stones)])
+    print(f"{args.stones} stones, {len(body) / 1e6:.1f} MB body, {codec.name} codec\n")
+    
+    def as_records() -> List[DiamondRecord]:
+        return [DiamondRecord(diamond) for diamond in codec.loads(body)]
+    
+    dict_bytes, dict_resident, dicts = held_memory(lambda: codec.loads(body))
+    record_bytes, record_resident, records = held_memory(as_records)
+    assert all(record.to_dict() == diamond for record, diamond in zip(records, dicts))
+    
+    decode = best_of(args.repeat, lambda: codec.loads(body))
+    convert = best_of(args.repeat, lambda: [DiamondRecord(diamond) for diamond in dicts])
+    back = best_of(args.repeat, lambda: [record.to_dict() for record in records])
+    
+    per_100k = 100000 / args.stones
+    rows = [("traced", dict_bytes, record_bytes)]
+    if dict_resident is not None and record_resident is not None:
+        rows.append(("resident", dict_resident, record_resident))
+    print(f"{'MB per 100k':<16}{'dict':>10}{'record':>10}{'saving':>10}")
+    for label, dict_held, record_held in rows:
+        print(f"{label:<16}{dict_held * per_100k / 1e6:>10.1f}{record_held * per_100k / 1e6:>10.1f}"
+              f"{1 - record_held / dict_held:>10.0%}")
+    print()
+    print(f"Decode {decode * 1000:.0f} ms, dict -> record {convert * 1000:.0f} ms, "
+          f"record -> dict {back * 1000:.0f} ms (all round trips equal)")
+
+
+if __name__ == "__main__":
+    main()
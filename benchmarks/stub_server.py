@@ -0,0 +1,469 @@
+"""
+Local stand-in for the Mazalbot API, for benchmarks and offline testing.
+
+StubMazalbotServer implements the endpoints in mazalbot_api_spec.md (plus
+the dashboard endpoints used by MazalbotClient) over a synthetic in-memory
+inventory. It sends the pagination and rate-limit headers the real API
+sends, and can inject latency and errors.
+
+Usage:
+    python benchmarks/stub_server.py [--port 8080] [--inventory 10000] [--latency 0.02]
+
+Example usage:
+```python
+with StubMazalbotServer(inventory_size=5000, latency=0.005) as server:
+    client = MazalbotClient(base_url=server.url, user_id=server.user_id)
+    print(client.get_diamonds().headers["X-Total-Count"])
+```
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple, Union
+from urllib.parse import parse_qs, urlsplit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mazalbot_client import DiamondData, parse_search_criteria  # noqa: E402
+
+
+SHAPES = ["Round", "Princess", "Cushion", "Emerald", "Oval", "Radiant", "Asscher", "Marquise", "Heart", "Pear"]
+COLORS = ["D", "E", "F", "G", "H", "I", "J", "K", "L", "M"]
+CLARITIES = ["FL", "IF", "VVS1", "VVS2", "VS1", "VS2", "SI1", "SI2", "I1", "I2", "I3"]
+GRADES = ["Excellent", "Very Good", "Good", "Fair", "Poor"]
+STATUSES = ["Available", "Available", "Available", "Reserved", "Sold"]
+
+DEFAULT_USER_ID = 123456789
+DEFAULT_TOKEN = "ifj9ov1rh20fslfp"
+
+
+def make_diamond(rng: random.Random, index: int, user_id: int) -> DiamondData:
+    """
+    Generate one synthetic stone.
+    
+    Args:
+        rng: Random source
+        index: Sequence number used for the stock number
+        user_id: Owner of the stone
+        
+    Returns:
+        DiamondData with every field populated
+    """
+    weight = round(rng.uniform(0.3, 5.0), 2)
+    price_per_carat = rng.randint(1500, 25000)
+    return {
+        "id": str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+        "stock_number": f"S{index:07d}",
+        "shape": rng.choice(SHAPES),
+        "weight": weight,
+        "color": rng.choice(COLORS),
+        "clarity": rng.choice(CLARITIES),
+        "cut": rng.choice(GRADES),
+        "polish": rng.choice(GRADES),
+        "symmetry": rng.choice(GRADES),
+        "price_per_carat": price_per_carat,
+        "price": round(weight * price_per_carat, 2),
+        "status": rng.choice(STATUSES),
+        "picture": f"https://img.example.com/{index}.jpg",
+        "certificate_url": f"https://cert.example.com/{index}.pdf",
+        "certificate_number": str(rng.randint(10 ** 9, 10 ** 10)),
+        "lab": "GIA",
+        "fluorescence": rng.choice(["None", "Faint", "Medium"]),
+        "owners": [user_id],
+        "owner_id": user_id,
+    }
+
+
+class StubMazalbotServer:
+    """
+    Threaded HTTP server emulating the Mazalbot API.
+    
+    The server is thread-safe and serves requests from a background thread
+    once started. All knobs can be changed while it is running.
+    """
+    
+    def __init__(
+        self,
+        inventory_size: int = 10000,
+        user_id: int = DEFAULT_USER_ID,
+        access_token: str = DEFAULT_TOKEN,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: float = 0.0,
+        latency_jitter: float = 0.0,
+        error_rate: float = 0.0,
+        error_status: int = 503,
+        rate_limit: Optional[int] = None,
+        rate_window: float = 1.0,
+        pagination_headers: bool = True,
+        bulk_endpoints: bool = False,
+        seed: int = 7
+    ):
+        """
+        Create the server and its inventory.
+        
+        Args:
+            inventory_size: Number of synthetic stones to start with
+            user_id: User that owns the inventory
+            access_token: Bearer token the server accepts
+            host: Interface to listen on
+            port: Port to listen on; 0 picks a free port
+            latency: Seconds added to every response
+            latency_jitter: Extra random latency, uniform in [0, latency_jitter]
+            error_rate: Fraction of requests answered with error_status
+            error_status: Status code of injected errors
+            rate_limit: Requests allowed per rate_window; None disables limiting
+            rate_window: Rate-limit window in seconds
+            pagination_headers: Send X-Total-Count/X-Total-Pages on get_all_stones
+            bulk_endpoints: Also serve POST update_diamonds/delete_diamonds, which
+                are not in the spec but are used by the client when present
+            seed: Seed for the inventory and for injected latency/errors
+        """
+        self.user_id = user_id
+        self.access_token = access_token
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.rate_limit = rate_limit
+        self.rate_window = rate_window
+        self.pagination_headers = pagination_headers
+        self.bulk_endpoints = bulk_endpoints
+        
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._inventory: Dict[str, DiamondData] = {}
+        self._reports: Dict[str, Dict[str, Any]] = {}
+        self._sales: List[Dict[str, Any]] = []
+        self._next_index = 0
+        self._window_start = time.monotonic()
+        self._window_count = 0
+        self.request_count = 0
+        for _ in range(inventory_size):
+            self._add(make_diamond(self._rng, self._next_index, user_id))
+        
+        self._httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+    
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+    
+    def start(self) -> "StubMazalbotServer":
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._httpd.serve_forever, name="stub-mazalbot", daemon=True)
+            self._thread.start()
+        return self
+    
+    def stop(self) -> None:
+        if self._thread is not None:
+            self._httpd.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._httpd.server_close()
+    
+    def __enter__(self) -> "StubMazalbotServer":
+        return self.start()
+    
+    def __exit__(self, *exc_info: Any) -> None:
+        self.stop()
+    
+    def inventory_size(self) -> int:
+        with self._lock:
+            return len(self._inventory)
+    
+    def _add(self, diamond: DiamondData) -> DiamondData:
+        stone = dict(diamond)
+        stone.setdefault("id", str(uuid.UUID(int=self._rng.getrandbits(128), version=4)))
+        stone.setdefault("owner_id", self.user_id)
+        stone.setdefault("owners", [self.user_id])
+        if "price" not in stone and stone.get("price_per_carat") is not None and stone.get("weight"):
+            stone["price"] = round(stone["price_per_carat"] * stone["weight"], 2)
+        self._inventory[stone["id"]] = stone
+        self._next_index += 1
+        return stone
+    
+    def _rate_limit_headers(self) -> Tuple[bool, Dict[str, str]]:
+        """Count a request against the window; returns (allowed, headers)"""
+        if self.rate_limit is None:
+            return True, {}
+        with self._lock:
+            now = time.monotonic()
+            if now - self._window_start >= self.rate_window:
+                self._window_start = now
+                self._window_count = 0
+            self._window_count += 1
+            remaining = self.rate_limit - self._window_count
+            reset = max(0.0, self.rate_window - (now - self._window_start))
+        headers = {
+            "X-RateLimit-Limit": str(self.rate_limit),
+            "X-RateLimit-Remaining": str(max(0, remaining)),
+            "X-RateLimit-Reset": f"{reset:.3f}",
+        }
+        if remaining < 0:
+            headers["Retry-After"] = f"{reset:.3f}"
+            return False, headers
+        return True, headers
+    
+    def handle(
+        self,
+        method: str,
+        path: str,
+        query: Dict[str, Union[str, List[str]]],
+        body: Optional[Dict[str, Any]]
+    ) -> Tuple[int, Any, Dict[str, str]]:
+        """
+        Route one request.
+        
+        Args:
+            method: HTTP method
+            path: Request path, e.g. /api/v1/get_all_stones
+            query: Query parameters; a repeated parameter maps to a list
+            body: Decoded JSON body, if any
+            
+        Returns:
+            Tuple of (status code, JSON payload, extra headers)
+        """
+        parts = [part for part in path.split("/") if part]
+        if parts[:2] != ["api", "v1"] or len(parts) < 3:
+            return 404, {"success": False, "error": "Not found", "status_code": 404}, {}
+        name, args = parts[2], parts[3:]
+        
+        if method == "GET" and name == "get_all_stones":
+            return self._get_all_stones(query)
+        if method == "GET" and name == "get_stone" and len(args) == 1:
+            with self._lock:
+                stone = self._inventory.get(args[0])
+            if stone is None:
+                return 404, {"success": False, "error": "Diamond not found", "status_code": 404}, {}
+            return 200, stone, {}
+        if method == "POST" and name == "upload-inventory":
+            diamonds = (body or {}).get("diamonds")
+            if not isinstance(diamonds, list) or not diamonds:
+                return 400, {"success": False, "error": "No diamonds provided", "status_code": 400}, {}
+            for index, diamond in enumerate(diamonds):
+                if not all(field in diamond for field in ("shape", "weight", "color", "clarity")):
+                    return 400, {
+                        "success": False,
+                        "error": f"Diamond at index {index} is missing required fields",
+                        "status_code": 400
+                    }, {}
+            with self._lock:
+                added = [self._add(diamond) for diamond in diamonds]
+            return 200, {
+                "success": True,
+                "data": [{"id": stone["id"], "stock_number": stone.get("stock_number")} for stone in added]
+            }, {}
+        if method == "PUT" and name == "update_diamond" and len(args) == 1:
+            with self._lock:
+                stone = self._inventory.get(args[0])
+                if stone is not None:
+                    stone.update({key: value for key, value in (body or {}).items() if key != "user_id"})
+            if stone is None:
+                return 404, {"success": False, "error": "Diamond not found", "status_code": 404}, {}
+            return 200, {"success": True, "data": {"id": stone["id"], "stock_number": stone.get("stock_number")}}, {}
+        if method == "DELETE" and name == "delete_diamond":
+            with self._lock:
+                stone = self._inventory.pop(query.get("diamond_id", ""), None)
+                if stone is not None and stone.get("status") == "Sold":
+                    self._sales.append({"diamond_id": stone["id"], "price": stone.get("price"), "sold_at": time.time()})
+            if stone is None:
+                return 404, {"success": False, "error": "Diamond not found", "status_code": 404}, {}
+            return 200, {"success": True, "message": "Diamond deleted successfully"}, {}
+        if method == "POST" and name in ("update_diamonds", "delete_diamonds") and self.bulk_endpoints:
+            return self._bulk_write(name, body or {})
+        if method == "POST" and name == "create-report":
+            diamond_id = (body or {}).get("diamond_id")
+            report = {
+                "report_id": uuid.uuid4().hex,
+                "diamond_id": diamond_id,
+                "report_type": (body or {}).get("report_type", "standard"),
+                "report_url": f"https://reports.example.com/{diamond_id}.pdf",
+                "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            }
+            with self._lock:
+                self._reports[diamond_id] = report
+            return 200, {"success": True, "data": {"report_id": report["report_id"], "report_url": report["report_url"]}}, {}
+        if method == "GET" and name == "get-report":
+            with self._lock:
+                report = self._reports.get(query.get("diamond_id", ""))
+            if report is None:
+                return 404, {"success": False, "error": "Report not found", "status_code": 404}, {}
+            return 200, {"success": True, "data": report}, {}
+        if method == "GET" and name == "users" and len(args) >= 2:
+            return self._dashboard("/".join(args[1:]))
+        return 404, {"success": False, "error": "Not found", "status_code": 404}, {}
+    
+    def _bulk_write(self, name: str, body: Dict[str, Any]) -> Tuple[int, Any, Dict[str, str]]:
+        if name == "update_diamonds":
+            entries = body.get("diamonds")
+            ids = [entry.get("id") for entry in entries] if isinstance(entries, list) else None
+        else:
+            entries = ids = body.get("diamond_ids")
+        if not isinstance(ids, list) or not ids:
+            return 400, {"success": False, "error": "No diamonds provided", "status_code": 400}, {}
+        failed = []
+        with self._lock:
+            for diamond_id, entry in zip(ids, entries):
+                if diamond_id not in self._inventory:
+                    failed.append({"id": diamond_id, "error": "Diamond not found"})
+                elif name == "update_diamonds":
+                    self._inventory[diamond_id].update({key: value for key, value in entry.items() if key != "user_id"})
+                else:
+                    del self._inventory[diamond_id]
+        return 200, {"success": True, "data": {"processed": len(ids) - len(failed), "failed": failed}}, {}
+    
+    def _get_all_stones(self, query: Dict[str, Union[str, List[str]]]) -> Tuple[int, Any, Dict[str, str]]:
+        try:
+            search_filter = parse_search_criteria(query)
+        except (TypeError, ValueError):
+            return 400, {"success": False, "error": "Invalid filter parameters", "status_code": 400}, {}
+        with self._lock:
+            stones = list(self._inventory.values())
+        if search_filter.equals or search_filter.ranges:
+            stones = [stone for stone in stones if search_filter.matches(stone)]
+        
+        headers: Dict[str, str] = {}
+        if "page" in query or "limit" in query:
+            try:
+                page = max(1, int(query.get("page", 1)))
+                limit = max(1, int(query.get("limit", 100)))
+            except (TypeError, ValueError):
+                return 400, {"success": False, "error": "Invalid pagination parameters", "status_code": 400}, {}
+            total = len(stones)
+            stones = stones[(page - 1) * limit:page * limit]
+            if self.pagination_headers:
+                headers["X-Total-Count"] = str(total)
+                headers["X-Total-Pages"] = str(max(1, -(-total // limit)))
+        return 200, stones, headers
+    
+    def _dashboard(self, view: str) -> Tuple[int, Any, Dict[str, str]]:
+        with self._lock:
+            stones = list(self._inventory.values())
+            sales = list(self._sales[-20:])
+        if view == "dashboard/stats":
+            return 200, {"success": True, "data": {
+                "total_diamonds": len(stones),
+                "total_value": round(sum(stone.get("price") or 0 for stone in stones), 2),
+                "available": sum(1 for stone in stones if stone.get("status") == "Available"),
+            }}, {}
+        if view == "inventory/by-shape":
+            counts: Dict[str, int] = {}
+            for stone in stones:
+                counts[stone.get("shape")] = counts.get(stone.get("shape"), 0) + 1
+            return 200, {"success": True, "data": [{"shape": shape, "count": count} for shape, count in counts.items()]}, {}
+        if view == "sales/recent":
+            return 200, {"success": True, "data": sales}, {}
+        return 404, {"success": False, "error": "Not found", "status_code": 404}, {}
+    
+    def _handler_class(self) -> type:
+        server = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Headers and body are written separately; avoid the delayed-ACK stall
+            disable_nagle_algorithm = True
+            
+            def log_message(self, *args: Any) -> None:
+                pass
+            
+            def _serve(self, method: str) -> None:
+                length = int(self.headers.get("Content-Length") or 0)
+                raw_body = self.rfile.read(length) if length else b""
+                with server._lock:
+                    server.request_count += 1
+                    inject_error = server.error_rate > 0 and server._rng.random() < server.error_rate
+                    delay = server.latency + (server._rng.uniform(0, server.latency_jitter) if server.latency_jitter else 0.0)
+                
+                allowed, headers = server._rate_limit_headers()
+                if self.headers.get("Authorization") != f"Bearer {server.access_token}":
+                    status, payload = 401, {"success": False, "error": "Unauthorized", "status_code": 401}
+                elif not allowed:
+                    status, payload = 429, {"success": False, "error": "Rate limit exceeded", "status_code": 429}
+                elif inject_error:
+                    status = server.error_status
+                    payload = {"success": False, "error": "Injected failure", "status_code": status}
+                else:
+                    try:
+                        body = json.loads(raw_body) if raw_body else None
+                    except ValueError:
+                        status, payload = 400, {"success": False, "error": "Invalid JSON body", "status_code": 400}
+                    else:
+                        url = urlsplit(self.path)
+                        # Repeated parameters (shape=Round&shape=Oval) arrive as lists
+                        query = {key: values if len(values) > 1 else values[0] for key, values in parse_qs(url.query).items()}
+                        status, payload, extra = server.handle(method, url.path, query, body)
+                        headers.update(extra)
+                
+                if delay > 0:
+                    time.sleep(delay)
+                data = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+            
+            def do_GET(self) -> None:
+                self._serve("GET")
+            
+            def do_POST(self) -> None:
+                self._serve("POST")
+            
+            def do_PUT(self) -> None:
+                self._serve("PUT")
+            
+            def do_DELETE(self) -> None:
+                self._serve("DELETE")
+        
+        return Handler
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run a local stub Mazalbot API server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--inventory", type=int, default=10000, help="Number of synthetic stones")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Extra random latency in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests that fail")
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--rate-limit", type=int, default=None, help="Requests allowed per window")
+    parser.add_argument("--rate-window", type=float, default=1.0, help="Rate-limit window in seconds")
+    parser.add_argument("--bulk", action="store_true", help="Serve the bulk update/delete endpoints")
+    args = parser.parse_args()
+    
+    server = StubMazalbotServer(
+        inventory_size=args.inventory,
+        host=args.host,
+        port=args.port,
+        latency=args.latency,
+        latency_jitter=args.jitter,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        rate_limit=args.rate_limit,
+        rate_window=args.rate_window,
+        bulk_endpoints=args.bulk
+    )
+    print(f"Stub Mazalbot API on {server.url} (user_id={server.user_id}, {args.inventory} stones)")
+    try:
+        server._httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server._httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,420 @@
+"""
+Local, vectorised dashboard analytics over a fetched inventory.
+
+InventoryAnalytics holds an inventory as a DiamondFrame and answers
+dashboard queries with NumPy group-bys instead of server round trips: the
+figures behind get_dashboard_stats, get_inventory_by_shape and
+get_recent_sales, plus arbitrary value/count slices (e.g. color x clarity),
+carat-band histograms and price-per-carat percentiles per group. Every
+result is memoised until the inventory changes; when built with
+from_client, writes made through the client mark the inventory stale and
+the next query refetches it.
+
+Requires the optional ``numpy`` dependency (``pip install numpy``).
+
+Example usage:
+```python
+client = MazalbotClient(user_id=123456789)
+analytics = InventoryAnalytics.from_client(client)
+
+print(analytics.summary()["total_value"])
+by_grade = analytics.value_by(["color", "clarity"])
+bands = analytics.carat_histogram()
+ppc = analytics.price_per_carat_percentiles(by="shape")
+
+# Drop-in replacements for the dashboard endpoints
+stats = analytics.get_dashboard_stats()
+```
+"""
+
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
+
+from mazalbot_client import ApiResponse, DiamondData, MazalbotApiError, MazalbotClient, WriteEvent
+from mazalbot_frame import MISSING, DiamondFrame, GroupKey
+
+
+# Lower bounds of the default carat bands
+DEFAULT_CARAT_EDGES = (0.0, 0.3, 0.5, 0.7, 0.9, 1.0, 1.5, 2.0, 3.0, 5.0)
+
+DEFAULT_PERCENTILES = (10, 25, 50, 75, 90)
+
+# Stones worth more than this count as high value in summary()
+HIGH_VALUE_THRESHOLD = 10000.0
+
+
+def _require_numpy() -> None:
+    if np is None:
+        raise ImportError("InventoryAnalytics requires numpy. Install it with: pip install numpy")
+
+
+def _float(value: float) -> Optional[float]:
+    return None if np.isnan(value) else float(value)
+
+
+class InventoryAnalytics:
+    """
+    Memoised dashboard aggregates over one inventory.
+    
+    Thread-safe. Results are shared between callers and must be treated as
+    read-only.
+    """
+    
+    def __init__(
+        self,
+        inventory: Union[DiamondFrame, Iterable[DiamondData]],
+        loader: Optional[Callable[[], Iterable[DiamondData]]] = None
+    ):
+        """
+        Create the engine.
+        
+        Args:
+            inventory: The inventory as a DiamondFrame or DiamondData dicts
+            loader: Called to refetch the inventory after invalidate(); if
+                omitted, invalidate() only clears memoised results
+        """
+        _require_numpy()
+        self.loader = loader
+        self.version = 0
+        self._lock = threading.RLock()
+        self._memo: Dict[Tuple[Any, ...], Any] = {}
+        self._stale = False
+        self._set_frame(inventory)
+        self._client: Optional[MazalbotClient] = None
+    
+    @classmethod
+    def from_client(cls, client: MazalbotClient, attach: bool = True) -> "InventoryAnalytics":
+        """
+        Fetch a client's inventory and analyse it.
+        
+        Args:
+            client: Client whose user's inventory is analysed
+            attach: Refetch after writes made through the client
+            
+        Returns:
+            A new InventoryAnalytics
+            
+        Raises:
+            MazalbotApiError: If the inventory cannot be fetched
+        """
+        def load() -> List[DiamondData]:
+            result = client.fetch_all_diamonds()
+            if not result.success:
+                raise MazalbotApiError(ApiResponse(success=False, error=result.error, status_code=0))
+            return result.diamonds
+        
+        analytics = cls(load(), loader=load)
+        if attach:
+            analytics._client = client
+            client.add_write_listener(analytics._on_write)
+        return analytics
+    
+    def detach(self) -> None:
+        """Stop following writes made through the client."""
+        if self._client is not None:
+            self._client.remove_write_listener(self._on_write)
+            self._client = None
+    
+    def _on_write(self, event: WriteEvent) -> None:
+        self.invalidate()
+    
+    def invalidate(self) -> None:
+        """Mark the inventory as changed; the next query reloads it (if there is a loader)."""
+        with self._lock:
+            self._stale = True
+            self._memo.clear()
+    
+    def set_inventory(self, inventory: Union[DiamondFrame, Iterable[DiamondData]]) -> None:
+        """
+        Replace the inventory, e.g. after a refresh from an InventoryMirror.
+        
+        Args:
+            inventory: The new inventory as a DiamondFrame or DiamondData dicts
+        """
+        with self._lock:
+            self._set_frame(inventory)
+    
+    def _set_frame(self, inventory: Union[DiamondFrame, Iterable[DiamondData]]) -> None:
+        frame = inventory if isinstance(inventory, DiamondFrame) else DiamondFrame.from_records(inventory)
+        self.frame = frame
+        self.version += 1
+        self._stale = False
+        self._memo.clear()
+        
+        # Stone value: price, or price_per_carat x weight where price is missing
+        price = frame.numeric["price"]
+        derived = frame.numeric["price_per_carat"] * frame.numeric["weight"]
+        self._value = np.where(np.isnan(price), derived, price)
+    
+    def _memoised(self, key: Tuple[Any, ...], compute: Callable[[], Any]) -> Any:
+        with self._lock:
+            if self._stale and self.loader is not None:
+                self._set_frame(self.loader())
+            if key not in self._memo:
+                self._memo[key] = compute()
+            return self._memo[key]
+    
+    # Aggregates
+    
+    def summary(self, high_value: float = HIGH_VALUE_THRESHOLD) -> Dict[str, Any]:
+        """
+        Inventory totals, as shown on the dashboard.
+        
+        Includes everything get_dashboard_stats reports (total stones and
+        value, available stones) plus status counts and the figures the web
+        dashboard derives locally (matched pairs, distinct shapes,
+        high-value stones).
+        
+        Args:
+            high_value: Stone value above which a stone counts as high value
+            
+        Returns:
+            Dict of figure name to value
+        """
+        def compute() -> Dict[str, Any]:
+            frame = self.frame
+            value = self._value
+            weight = frame.numeric["weight"]
+            ppc = frame.numeric["price_per_carat"]
+            
+            # One group-by on shape x color x clarity gives the matched pairs
+            groups, keys = frame.group_codes(["shape", "color", "clarity"])
+            complete = np.array([all(part is not None for part in key) for key in keys], dtype=bool)
+            pair_counts = np.bincount(groups, minlength=len(keys)) // 2
+            status_codes = frame.codes["status"]
+            status_counts = np.bincount(status_codes[status_codes != MISSING], minlength=len(frame.categories["status"]))
+            
+            return {
+                "total_diamonds": len(frame),
+                "total_value": float(np.nansum(value)),
+                "available": int(np.count_nonzero(np.isin(status_codes, frame.value_codes("status", ["available"])))),
+                "total_carats": float(np.nansum(weight)),
+                "average_price": _float(np.nanmean(value)) if np.any(~np.isnan(value)) else None,
+                "average_price_per_carat": _float(np.nanmean(ppc)) if np.any(~np.isnan(ppc)) else None,
+                "matched_pairs": int(pair_counts[complete].sum()) if len(keys) else 0,
+                "distinct_shapes": int(np.count_nonzero(np.bincount(
+                    frame.codes["shape"][frame.codes["shape"] != MISSING], minlength=1
+                ))),
+                "high_value_diamonds": int(np.count_nonzero(value > high_value)),
+                "by_status": {
+                    status: int(count) for status, count in zip(frame.categories["status"], status_counts) if count
+                },
+            }
+        
+        return self._memoised(("summary", high_value), compute)
+    
+    def value_by(
+        self,
+        by: Union[str, Sequence[str]],
+        aggregates: Sequence[str] = ("count", "sum", "mean")
+    ) -> Dict[GroupKey, Dict[str, float]]:
+        """
+        Stone count and value per group, e.g. per color x clarity.
+        
+        Args:
+            by: Categorical column name or names
+            aggregates: Aggregates of stone value: count, sum and/or mean
+            
+        Returns:
+            Dict mapping group key tuples to aggregate name to value
+        """
+        by = (by,) if isinstance(by, str) else tuple(by)
+        aggregates = tuple(aggregates)
+        
+        def compute() -> Dict[GroupKey, Dict[str, float]]:
+            groups, keys = self.frame.group_codes(by)
+            return self._aggregate(groups, keys, self._value, aggregates)
+        
+        return self._memoised(("value_by", by, aggregates), compute)
+    
+    def carat_histogram(
+        self,
+        edges: Sequence[float] = DEFAULT_CARAT_EDGES,
+        by: Optional[Union[str, Sequence[str]]] = None
+    ) -> Dict[GroupKey, Dict[str, float]]:
+        """
+        Stone count and value per carat band.
+        
+        Args:
+            edges: Ascending band lower bounds; the last band is open-ended
+            by: Optional categorical column(s) to split each band by
+            
+        Returns:
+            Dict mapping (band, *group values) to count and sum of value
+        """
+        edges = tuple(edges)
+        by = () if by is None else ((by,) if isinstance(by, str) else tuple(by))
+        
+        def compute() -> Dict[GroupKey, Dict[str, float]]:
+            banded = self.frame.add_bands("carat_band", "weight", edges)
+            groups, keys = banded.group_codes(("carat_band",) + by)
+            return self._aggregate(groups, keys, self._value, ("count", "sum"))
+        
+        return self._memoised(("carat_histogram", edges, by), compute)
+    
+    def price_per_carat_percentiles(
+        self,
+        percentiles: Sequence[float] = DEFAULT_PERCENTILES,
+        by: Optional[Union[str, Sequence[str]]] = None
+    ) -> Dict[GroupKey, Dict[float, Optional[float]]]:
+        """
+        Price-per-carat percentiles, overall or per group.
+        
+        Uses linear interpolation between closest ranks, like numpy.percentile;
+        stones without a price per carat are ignored.
+        
+        Args:
+            percentiles: Percentiles in [0, 100]
+            by: Optional categorical column(s) to group by
+            
+        Returns:
+            Dict mapping group key tuples (``()`` without ``by``) to
+            percentile to value (None for groups without prices)
+        """
+        percentiles = tuple(percentiles)
+        by = () if by is None else ((by,) if isinstance(by, str) else tuple(by))
+        
+        def compute() -> Dict[GroupKey, Dict[float, Optional[float]]]:
+            frame = self.frame
+            if by:
+                groups, keys = frame.group_codes(by)
+            else:
+                groups, keys = np.zeros(len(frame), dtype=np.int64), [()]
+            values = frame.numeric["price_per_carat"]
+            valid = ~np.isnan(values)
+            valid_groups = groups[valid]
+            valid_values = values[valid]
+            
+            # Sort once by (group, value); each group is then a contiguous run
+            order = np.lexsort((valid_values, valid_groups))
+            sorted_groups = valid_groups[order]
+            sorted_values = valid_values[order]
+            group_ids = np.arange(len(keys))
+            starts = np.searchsorted(sorted_groups, group_ids, side="left")
+            sizes = np.searchsorted(sorted_groups, group_ids, side="right") - starts
+            present = sizes > 0
+            
+            columns = {}
+            for percentile in percentiles:
+                column = np.full(len(keys), np.nan)
+                position = starts[present] + (sizes[present] - 1) * (percentile / 100.0)
+                low = np.floor(position).astype(np.int64)
+                high = np.ceil(position).astype(np.int64)
+                column[present] = sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (position - low)
+                columns[percentile] = column
+            
+            return {
+                key: {percentile: _float(columns[percentile][index]) for percentile in percentiles}
+                for index, key in enumerate(keys)
+            }
+        
+        return self._memoised(("price_per_carat_percentiles", percentiles, by), compute)
+    
+    def inventory_by_shape(self) -> List[Dict[str, Any]]:
+        """
+        Stone count, carats and value per shape, largest count first.
+        
+        Returns:
+            List of dicts with shape, count, carats and value
+        """
+        def compute() -> List[Dict[str, Any]]:
+            frame = self.frame
+            groups, keys = frame.group_codes("shape")
+            counts = np.bincount(groups, minlength=len(keys))
+            carats = np.bincount(groups, weights=np.nan_to_num(frame.numeric["weight"]), minlength=len(keys))
+            values = np.bincount(groups, weights=np.nan_to_num(self._value), minlength=len(keys))
+            rows = [
+                {"shape": key[0], "count": int(counts[index]), "carats": float(carats[index]), "value": float(values[index])}
+                for index, key in enumerate(keys)
+            ]
+            rows.sort(key=lambda row: (-row["count"], row["shape"] or ""))
+            return rows
+        
+        return self._memoised(("inventory_by_shape",), compute)
+    
+    def recent_sales(self, limit: int = 20) -> List[DiamondData]:
+        """
+        Stones with status Sold, most recent first.
+        
+        Stones are ordered by their ``sold_at`` or ``updated_at`` field when
+        the inventory has one, otherwise by inventory position (latest last
+        in the feed first).
+        
+        Args:
+            limit: Maximum number of stones
+            
+        Returns:
+            List of DiamondData dicts
+        """
+        def compute() -> List[DiamondData]:
+            frame = self.frame
+            sold_codes = frame.value_codes("status", ["sold"])
+            rows = np.flatnonzero(np.isin(frame.codes["status"], sold_codes))[::-1]
+            if frame.extras is not None and len(rows):
+                stamps = [
+                    str((frame.extras[row] or {}).get("sold_at") or (frame.extras[row] or {}).get("updated_at") or "")
+                    for row in rows
+                ]
+                if any(stamps):
+                    order = sorted(range(len(rows)), key=lambda index: stamps[index], reverse=True)
+                    rows = rows[order]
+            return [frame.record(int(row)) for row in rows[:limit]]
+        
+        return self._memoised(("recent_sales", limit), compute)
+    
+    @staticmethod
+    def _aggregate(
+        groups: "np.ndarray",
+        keys: List[GroupKey],
+        values: "np.ndarray",
+        aggregates: Sequence[str]
+    ) -> Dict[GroupKey, Dict[str, float]]:
+        valid = ~np.isnan(values)
+        counts = np.bincount(groups, minlength=len(keys)).astype(np.float64)
+        valid_counts = np.bincount(groups[valid], minlength=len(keys))
+        sums = np.bincount(groups[valid], weights=values[valid], minlength=len(keys))
+        results = {"count": counts, "sum": sums}
+        with np.errstate(invalid="ignore", divide="ignore"):
+            results["mean"] = np.where(valid_counts > 0, sums / valid_counts, np.nan)
+        unknown = [name for name in aggregates if name not in results]
+        if unknown:
+            raise ValueError(f"Unsupported aggregates: {', '.join(unknown)}")
+        return {
+            key: {name: float(results[name][index]) for name in aggregates}
+            for index, key in enumerate(keys)
+        }
+    
+    # Drop-in replacements for the dashboard endpoints; data has the endpoints' fields (and may add more)
+    
+    def get_dashboard_stats(self) -> ApiResponse:
+        """Local equivalent of MazalbotClient.get_dashboard_stats (total_diamonds, total_value, available, ...)"""
+        return ApiResponse(success=True, data=self.summary())
+    
+    def get_inventory_by_shape(self) -> ApiResponse:
+        """Local equivalent of MazalbotClient.get_inventory_by_shape (shape and count per shape, ...)"""
+        return ApiResponse(success=True, data=self.inventory_by_shape())
+    
+    def get_recent_sales(self, limit: int = 20) -> ApiResponse:
+        """
+        Local equivalent of MazalbotClient.get_recent_sales.
+        
+        Returns sale records (diamond_id, price, sold_at) like the endpoint,
+        built from the stones with status Sold; sold_at falls back to
+        updated_at and is None when the inventory has neither.
+        """
+        sales = []
+        for diamond in self.recent_sales(limit):
+            price = diamond.get("price")
+            if price is None and diamond.get("price_per_carat") is not None and diamond.get("weight") is not None:
+                price = diamond["price_per_carat"] * diamond["weight"]
+            sales.append({
+                "diamond_id": diamond.get("id"),
+                "price": price,
+                "sold_at": diamond.get("sold_at") or diamond.get("updated_at"),
+            })
+        return ApiResponse(success=True, data=sales)
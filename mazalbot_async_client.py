@@ -0,0 +1,790 @@
+"""
+Asyncio client for the Mazalbot Diamond Inventory API.
+
+AsyncMazalbotClient mirrors the method surface of MazalbotClient and returns
+the same ApiResponse objects, but never blocks the event loop: requests go
+through a shared aiohttp connection pool, the number of requests in flight is
+bounded by a semaphore, and retry backoff uses ``asyncio.sleep``.
+
+Requires the optional ``aiohttp`` dependency (``pip install aiohttp``).
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, List, Literal, Optional, Union
+from urllib.parse import urljoin
+
+from requests.structures import CaseInsensitiveDict
+
+try:
+    import aiohttp
+except ImportError:  # pragma: no cover - optional dependency
+    aiohttp = None
+
+from mazalbot_client import (
+    ApiResponse,
+    DiamondData,
+    DiamondRecord,
+    EndpointStats,
+    JsonCodec,
+    MazalbotApiError,
+    RateLimiter,
+    REQUEST_HOOK_KINDS,
+    REQUIRED_DIAMOND_FIELDS,
+    RequestEvent,
+    RequestHooks,
+    RequestStats,
+    SingleFlight,
+    _as_records,
+    _build_api_response,
+    _header_int,
+    _parse_response_body,
+    _retry_after_seconds,
+    default_codec,
+    endpoint_route,
+)
+
+
+def _require_aiohttp() -> None:
+    if aiohttp is None:
+        raise ImportError(
+            "AsyncMazalbotClient requires aiohttp. Install it with: pip install aiohttp"
+        )
+
+
+class AsyncConnectionPool:
+    """
+    Pool of keep-alive HTTP connections for asyncio clients.
+    
+    Wraps an ``aiohttp.ClientSession`` with a bounded ``TCPConnector``. The
+    session is created lazily inside the running event loop, so the pool can
+    be constructed anywhere and shared by several AsyncMazalbotClient
+    instances that run on the same loop.
+    
+    Example usage:
+    ```python
+    async with AsyncConnectionPool(pool_size=200) as pool:
+        client = AsyncMazalbotClient(user_id=123, pool=pool)
+        responses = await asyncio.gather(
+            *(client.get_diamond(diamond_id) for diamond_id in diamond_ids)
+        )
+    ```
+    """
+    
+    def __init__(
+        self,
+        pool_size: int = 100,
+        per_host_limit: int = 0,
+        keepalive_timeout: float = 15.0
+    ):
+        """
+        Initialize the connection pool.
+        
+        Args:
+            pool_size: Maximum number of simultaneous connections
+            per_host_limit: Maximum connections per host (0 means no extra limit)
+            keepalive_timeout: Seconds an idle connection is kept open
+        """
+        _require_aiohttp()
+        self.pool_size = pool_size
+        self.per_host_limit = per_host_limit
+        self.keepalive_timeout = keepalive_timeout
+        self.closed = False
+        self._session: Optional["aiohttp.ClientSession"] = None
+    
+    @property
+    def session(self) -> "aiohttp.ClientSession":
+        """The underlying aiohttp session, created on first use."""
+        if self.closed:
+            raise RuntimeError("Connection pool is closed")
+        if self._session is None:
+            connector = aiohttp.TCPConnector(
+                limit=self.pool_size,
+                limit_per_host=self.per_host_limit,
+                keepalive_timeout=self.keepalive_timeout
+            )
+            self._session = aiohttp.ClientSession(connector=connector)
+        return self._session
+    
+    async def close(self) -> None:
+        """Close all pooled connections."""
+        self.closed = True
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+    
+    async def __aenter__(self) -> "AsyncConnectionPool":
+        return self
+    
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.close()
+
+
+class AsyncMazalbotClient:
+    """
+    Asyncio client for the Mazalbot Diamond Inventory API.
+    
+    Has the same methods as MazalbotClient, as coroutines. Up to
+    ``max_concurrency`` requests are kept in flight at once; additional
+    callers wait on a semaphore rather than opening more connections.
+    
+    Example usage:
+    ```python
+    async def main():
+        async with AsyncMazalbotClient(user_id=123456789) as client:
+            pages = await asyncio.gather(
+                *(client.get_diamonds(page=page) for page in range(1, 11))
+            )
+    
+    asyncio.run(main())
+    ```
+    """
+    
+    def __init__(
+        self,
+        base_url: str = "https://api.mazalbot.com",
+        access_token: str = "ifj9ov1rh20fslfp",
+        user_id: Optional[int] = None,
+        max_retries: int = 3,
+        retry_delay: float = 1.0,
+        timeout: int = 30,
+        max_concurrency: int = 100,
+        pool: Optional[AsyncConnectionPool] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        codec: Optional[JsonCodec] = None,
+        hooks: Optional[RequestHooks] = None,
+        request_stats: Optional[RequestStats] = None,
+        single_flight: Optional[SingleFlight] = None
+    ):
+        """
+        Initialize the asyncio Mazalbot API client.
+        
+        Args:
+            base_url: Base URL of the Mazalbot API
+            access_token: API access token for authentication
+            user_id: User ID for filtering operations (required for most endpoints)
+            max_retries: Maximum number of retry attempts for failed requests
+            retry_delay: Delay between retry attempts in seconds
+            timeout: Request timeout in seconds
+            max_concurrency: Maximum number of requests in flight at once
+            pool: Shared AsyncConnectionPool. If omitted, the client creates and
+                owns a private pool sized to max_concurrency.
+            rate_limiter: RateLimiter shared with other clients (sync or async)
+                using the same API key. If omitted, a private limiter is used.
+            codec: JSON codec for request and response bodies. If omitted,
+                orjson is used when installed, otherwise the stdlib json module.
+            hooks: RequestHooks registry to share with other clients (sync or
+                async). If omitted, the client has its own.
+            request_stats: RequestStats to record into, e.g. one shared with
+                other clients. If omitted, the client keeps its own.
+            single_flight: Optional SingleFlight that lets identical concurrent
+                GET requests share one HTTP request
+        """
+        _require_aiohttp()
+        self.base_url = base_url.rstrip('/')
+        self.access_token = access_token
+        self.user_id = user_id
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.timeout = timeout
+        self.max_concurrency = max_concurrency
+        
+        self._owns_pool = pool is None
+        self.pool = pool if pool is not None else AsyncConnectionPool(pool_size=max_concurrency)
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self.rate_limiter = rate_limiter if rate_limiter is not None else RateLimiter()
+        self.codec = codec if codec is not None else default_codec()
+        self.hooks = hooks if hooks is not None else RequestHooks()
+        self.request_stats = request_stats if request_stats is not None else RequestStats()
+        self.single_flight = single_flight
+        
+        self.logger = logging.getLogger("mazalbot_client")
+    
+    async def close(self) -> None:
+        """
+        Release the client's connections.
+        
+        A shared pool passed in via the ``pool`` argument is left open.
+        """
+        if self._owns_pool:
+            await self.pool.close()
+    
+    async def __aenter__(self) -> "AsyncMazalbotClient":
+        return self
+    
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.close()
+    
+    def _get_headers(self) -> Dict[str, str]:
+        """
+        Get the headers for API requests.
+        
+        Returns:
+            Dict containing the necessary headers for API requests
+        """
+        return {
+            "Authorization": f"Bearer {self.access_token}",
+            "Content-Type": "application/json",
+            "Accept": "application/json"
+        }
+    
+    def _user_id_required(self) -> ApiResponse:
+        return ApiResponse(
+            success=False,
+            error="User ID is required for this operation",
+            status_code=400
+        )
+    
+    async def _make_request(
+        self,
+        method: Literal["GET", "POST", "PUT", "DELETE"],
+        endpoint: str,
+        params: Optional[Dict[str, Any]] = None,
+        data: Optional[Dict[str, Any]] = None,
+        retry_on_codes: List[int] = [429, 500, 502, 503, 504]
+    ) -> ApiResponse:
+        """
+        Make an HTTP request to the API with non-blocking retry logic.
+        
+        With a SingleFlight, a GET identical to one already in flight awaits
+        it and returns the same response.
+        
+        Args:
+            method: HTTP method (GET, POST, PUT, DELETE)
+            endpoint: API endpoint (without base URL)
+            params: Query parameters
+            data: Request body data
+            retry_on_codes: HTTP status codes that should trigger a retry
+            
+        Returns:
+            ApiResponse object with standardized response data
+        """
+        if params is None:
+            params = {}
+        
+        if self.user_id is not None and 'user_id' not in params:
+            params['user_id'] = self.user_id
+        
+        if self.single_flight is None or method != "GET" or data is not None:
+            return await self._send_request(method, endpoint, params, data, retry_on_codes)
+        key = self.single_flight.make_key((self.base_url, self.access_token), endpoint, params)
+        return await self.single_flight.do_async(
+            key, lambda: self._send_request(method, endpoint, params, data, retry_on_codes)
+        )
+    
+    async def _send_request(
+        self,
+        method: Literal["GET", "POST", "PUT", "DELETE"],
+        endpoint: str,
+        params: Dict[str, Any],
+        data: Optional[Dict[str, Any]],
+        retry_on_codes: List[int]
+    ) -> ApiResponse:
+        """Send a request with retries (see _make_request)"""
+        url = urljoin(self.base_url, endpoint.lstrip('/'))
+        headers = self._get_headers()
+        
+        # aiohttp only accepts str/int/float query values; format the rest the
+        # way requests would, sending a list or tuple as repeated keys
+        query = [
+            (key, str(item) if isinstance(item, bool) or not isinstance(item, (int, float)) else item)
+            for key, value in params.items()
+            for item in (value if isinstance(value, (list, tuple)) else (value,))
+            if item is not None
+        ]
+        
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        
+        body = self.codec.dumps(data) if data is not None else None
+        
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+        hooks = self.hooks if self.hooks.active else None
+        route = endpoint_route(endpoint)
+        bytes_sent = len(body) if body else 0
+        
+        attempts = 0
+        while attempts < self.max_retries:
+            if hooks is not None and hooks.wants("request"):
+                hooks.emit(RequestEvent(
+                    "request", method, endpoint, route, attempts + 1,
+                    bytes_sent=bytes_sent
+                ))
+            # True until a response or network error closes the attempt for hooks
+            attempt_open = True
+            try:
+                async with self._semaphore:
+                    await self.rate_limiter.acquire_async()
+                    started = time.perf_counter()
+                    async with self.pool.session.request(
+                        method,
+                        url,
+                        headers=headers,
+                        params=query,
+                        data=body,
+                        timeout=timeout
+                    ) as response:
+                        status_code = response.status
+                        response_headers = CaseInsensitiveDict(response.headers)
+                        response_body = await response.read()
+                latency = time.perf_counter() - started
+                self.rate_limiter.update_from_headers(response_headers)
+                self.request_stats.record_response(
+                    method, route, status_code, latency, bytes_sent, len(response_body)
+                )
+                
+                attempt_open = False
+                if hooks is not None and hooks.wants("response"):
+                    hooks.emit(RequestEvent(
+                        "response", method, endpoint, route, attempts + 1,
+                        status_code=status_code,
+                        bytes_sent=bytes_sent,
+                        bytes_received=len(response_body),
+                        latency=latency
+                    ))
+                
+                response_data = _parse_response_body(response_body, self.codec)
+                
+                if status_code < 400:
+                    return _build_api_response(status_code, response_data, response_headers)
+                
+                if status_code in retry_on_codes and attempts < self.max_retries - 1:
+                    attempts += 1
+                    retry_after = _retry_after_seconds(response_headers)
+                    if retry_after is not None:
+                        retry_time = retry_after
+                    else:
+                        retry_time = self.retry_delay * (2 ** attempts)
+                    if status_code == 429:
+                        self.rate_limiter.block(retry_time)
+                    self.logger.warning(
+                        "Request failed with status %s. Retrying in %.2fs (%d/%d)",
+                        status_code, retry_time, attempts, self.max_retries
+                    )
+                    self.request_stats.record_retry(method, route)
+                    if hooks is not None and hooks.wants("retry"):
+                        hooks.emit(RequestEvent(
+                            "retry", method, endpoint, route, attempts,
+                            status_code=status_code,
+                            retry_in=retry_time
+                        ))
+                    await asyncio.sleep(retry_time)
+                    continue
+                
+                api_response = _build_api_response(status_code, response_data, response_headers)
+                self.logger.error("Request failed: %s - %s", status_code, api_response.error)
+                if hooks is not None and hooks.wants("error"):
+                    hooks.emit(RequestEvent(
+                        "error", method, endpoint, route, attempts + 1,
+                        status_code=status_code,
+                        error=api_response.error
+                    ))
+                return api_response
+            
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                self.request_stats.record_network_error(method, route, bytes_sent)
+                attempt_open = False
+                attempts += 1
+                if attempts < self.max_retries:
+                    retry_time = self.retry_delay * (2 ** attempts)
+                    self.logger.warning(
+                        "Request failed with exception: %r. Retrying in %.2fs (%d/%d)",
+                        e, retry_time, attempts, self.max_retries
+                    )
+                    self.request_stats.record_retry(method, route)
+                    if hooks is not None and hooks.wants("retry"):
+                        hooks.emit(RequestEvent(
+                            "retry", method, endpoint, route, attempts,
+                            retry_in=retry_time,
+                            error=repr(e)
+                        ))
+                    await asyncio.sleep(retry_time)
+                else:
+                    self.logger.error("Request failed after %d attempts: %r", self.max_retries, e)
+                    if hooks is not None and hooks.wants("error"):
+                        hooks.emit(RequestEvent(
+                            "error", method, endpoint, route, attempts,
+                            status_code=0,
+                            error=f"Network error: {e!r}"
+                        ))
+                    return ApiResponse(
+                        success=False,
+                        error=f"Network error: {e!r}",
+                        status_code=0
+                    )
+            
+            except BaseException as e:
+                # Cancelled, interrupted or an unexpected error: report the failure before
+                # propagating, closing the open attempt (status 0) for in-flight gauges
+                if hooks is not None and hooks.wants("error"):
+                    hooks.emit(RequestEvent(
+                        "error", method, endpoint, route, attempts + 1,
+                        status_code=0 if attempt_open else None,
+                        error=f"Aborted: {e!r}"
+                    ))
+                raise
+        
+        return ApiResponse(
+            success=False,
+            error="Maximum retry attempts exceeded",
+            status_code=0
+        )
+    
+    def stats(self) -> Dict[str, EndpointStats]:
+        """
+        Get per-endpoint request statistics.
+        
+        Returns:
+            Dictionary mapping "METHOD route" to EndpointStats, latencies in seconds
+        """
+        return self.request_stats.snapshot()
+    
+    def reset_stats(self) -> None:
+        """Discard the request statistics recorded so far"""
+        self.request_stats.reset()
+    
+    def add_request_hook(
+        self,
+        hook: Callable[[RequestEvent], None],
+        kinds: Iterable[str] = REQUEST_HOOK_KINDS
+    ) -> None:
+        """
+        Register a callback for request instrumentation events.
+        
+        Hooks run synchronously on the event loop, so they must not block.
+        
+        Args:
+            hook: Callable receiving a RequestEvent
+            kinds: Event kinds to receive ("request", "response", "retry", "error")
+        """
+        self.hooks.add(hook, kinds)
+    
+    def remove_request_hook(self, hook: Callable[[RequestEvent], None]) -> None:
+        """
+        Unregister a request hook added with add_request_hook.
+        
+        Args:
+            hook: The callable to remove
+        """
+        self.hooks.remove(hook)
+    
+    async def get_diamonds(
+        self,
+        page: int = 1,
+        limit: int = 100,
+        filters: Optional[Dict[str, Any]] = None,
+        as_records: bool = False
+    ) -> ApiResponse:
+        """
+        Get diamonds from the inventory with pagination.
+        
+        Args:
+            page: Page number (1-based)
+            limit: Number of items per page
+            filters: Optional filters to apply (shape, color, clarity, etc.)
+            as_records: Return compact DiamondRecord objects instead of dicts
+            
+        Returns:
+            ApiResponse containing the list of diamonds if successful
+        """
+        if self.user_id is None:
+            return self._user_id_required()
+        
+        params = {
+            "user_id": self.user_id,
+            "page": page,
+            "limit": limit
+        }
+        if filters:
+            params.update(filters)
+        
+        response = await self._make_request(
+            method="GET",
+            endpoint="/api/v1/get_all_stones",
+            params=params
+        )
+        return _as_records(response) if as_records else response
+    
+    async def iter_diamonds(
+        self,
+        filters: Optional[Dict[str, Any]] = None,
+        page_size: int = 100,
+        as_records: bool = False
+    ) -> AsyncIterator[Union[DiamondData, DiamondRecord]]:
+        """
+        Iterate over every diamond in the inventory, one page at a time.
+        
+        Works like MazalbotClient.iter_diamonds: the next page is requested
+        in a background task while the current one is consumed, keeping at
+        most two pages in memory.
+        
+        Args:
+            filters: Optional filters to apply (shape, color, clarity, etc.)
+            page_size: Number of diamonds to request per page
+            as_records: Yield compact DiamondRecord objects instead of dicts
+            
+        Yields:
+            DiamondData dictionaries (or DiamondRecords) in server order
+            
+        Raises:
+            MazalbotApiError: If a page request fails
+        """
+        if self.user_id is None:
+            raise MazalbotApiError(self._user_id_required())
+        
+        page = 1
+        pending = asyncio.ensure_future(self.get_diamonds(page, page_size, filters, as_records))
+        try:
+            while pending is not None:
+                response = await pending
+                if not response.success:
+                    raise MazalbotApiError(response)
+                
+                stones = response.data or []
+                total_pages = _header_int(response.headers, "X-Total-Pages")
+                if total_pages is not None:
+                    has_more = page < total_pages
+                else:
+                    has_more = len(stones) == page_size
+                
+                page += 1
+                pending = asyncio.ensure_future(self.get_diamonds(page, page_size, filters, as_records)) if has_more else None
+                del response
+                
+                for stone in stones:
+                    yield stone
+        finally:
+            if pending is not None:
+                pending.cancel()
+    
+    async def get_diamond(self, diamond_id: str, as_records: bool = False) -> ApiResponse:
+        """
+        Get a specific diamond by ID.
+        
+        Args:
+            diamond_id: The ID of the diamond to retrieve
+            as_records: Return a compact DiamondRecord instead of a dict
+            
+        Returns:
+            ApiResponse containing the diamond data if successful
+        """
+        if self.user_id is None:
+            return self._user_id_required()
+        
+        response = await self._make_request(
+            method="GET",
+            endpoint=f"/api/v1/get_stone/{diamond_id}",
+            params={"user_id": self.user_id}
+        )
+        return _as_records(response) if as_records else response
+    
+    async def add_diamond(self, diamond_data: DiamondData) -> ApiResponse:
+        """
+        Add a new diamond to the inventory.
+        
+        Args:
+            diamond_data: Dictionary containing the diamond data
+            
+        Returns:
+            ApiResponse containing the created diamond data if successful
+        """
+        if self.user_id is None:
+            return self._user_id_required()
+        
+        missing_fields = [field for field in REQUIRED_DIAMOND_FIELDS if field not in diamond_data]
+        if missing_fields:
+            return ApiResponse(
+                success=False,
+                error=f"Missing required fields: {', '.join(missing_fields)}",
+                status_code=400
+            )
+        
+        return await self._make_request(
+            method="POST",
+            endpoint="/api/v1/upload-inventory",
+            data={"user_id": self.user_id, "diamonds": [diamond_data]}
+        )
+    
+    async def add_diamonds(self, diamonds: List[DiamondData]) -> ApiResponse:
+        """
+        Add multiple diamonds to the inventory in a single request.
+        
+        Args:
+            diamonds: List of dictionaries containing diamond data
+            
+        Returns:
+            ApiResponse containing the created diamonds data if successful
+        """
+        if self.user_id is None:
+            return self._user_id_required()
+        
+        if not diamonds:
+            return ApiResponse(
+                success=False,
+                error="No diamonds provided",
+                status_code=400
+            )
+        
+        for i, diamond in enumerate(diamonds):
+            missing_fields = [field for field in REQUIRED_DIAMOND_FIELDS if field not in diamond]
+            if missing_fields:
+                return ApiResponse(
+                    success=False,
+                    error=f"Diamond at index {i} is missing required fields: {', '.join(missing_fields)}",
+                    status_code=400
+                )
+        
+        return await self._make_request(
+            method="POST",
+            endpoint="/api/v1/upload-inventory",
+            data={"user_id": self.user_id, "diamonds": diamonds}
+        )
+    
+    async def update_diamond(self, diamond_id: str, diamond_data: DiamondData) -> ApiResponse:
+        """
+        Update an existing diamond.
+        
+        Args:
+            diamond_id: The ID of the diamond to update
+            diamond_data: Dictionary containing the updated diamond data
+            
+        Returns:
+            ApiResponse containing the updated diamond data if successful
+        """
+        if self.user_id is None:
+            return self._user_id_required()
+        
+        return await self._make_request(
+            method="PUT",
+            endpoint=f"/api/v1/update_diamond/{diamond_id}",
+            data={"user_id": self.user_id, **diamond_data}
+        )
+    
+    async def delete_diamond(self, diamond_id: str) -> ApiResponse:
+        """
+        Delete a diamond from the inventory.
+        
+        Args:
+            diamond_id: The ID of the diamond to delete
+            
+        Returns:
+            ApiResponse indicating success or failure
+        """
+        if self.user_id is None:
+            return self._user_id_required()
+        
+        return await self._make_request(
+            method="DELETE",
+            endpoint="/api/v1/delete_diamond",
+            params={"diamond_id": diamond_id, "user_id": self.user_id}
+        )
+    
+    async def create_report(self, diamond_id: str, report_type: str = "standard") -> ApiResponse:
+        """
+        Create a report for a specific diamond.
+        
+        Args:
+            diamond_id: The ID of the diamond to create a report for
+            report_type: Type of report to create (standard, detailed, etc.)
+            
+        Returns:
+            ApiResponse containing the report data if successful
+        """
+        if self.user_id is None:
+            return self._user_id_required()
+        
+        return await self._make_request(
+            method="POST",
+            endpoint="/api/v1/create-report",
+            data={
+                "user_id": self.user_id,
+                "diamond_id": diamond_id,
+                "report_type": report_type
+            }
+        )
+    
+    async def get_report(self, report_id: str) -> ApiResponse:
+        """
+        Get a specific report by ID.
+        
+        Args:
+            report_id: The ID of the report to retrieve
+            
+        Returns:
+            ApiResponse containing the report data if successful
+        """
+        if self.user_id is None:
+            return self._user_id_required()
+        
+        return await self._make_request(
+            method="GET",
+            endpoint="/api/v1/get-report",
+            params={"user_id": self.user_id, "diamond_id": report_id}
+        )
+    
+    async def search_diamonds(self, search_criteria: Dict[str, Any], as_records: bool = False) -> ApiResponse:
+        """
+        Search for diamonds based on specific criteria.
+        
+        Args:
+            search_criteria: Dictionary containing search parameters
+            as_records: Return compact DiamondRecord objects instead of dicts
+            
+        Returns:
+            ApiResponse containing the matching diamonds if successful
+        """
+        if self.user_id is None:
+            return self._user_id_required()
+        
+        response = await self._make_request(
+            method="GET",
+            endpoint="/api/v1/get_all_stones",
+            params={**search_criteria, "user_id": self.user_id}
+        )
+        return _as_records(response) if as_records else response
+    
+    async def get_dashboard_stats(self) -> ApiResponse:
+        """
+        Get dashboard statistics for the current user.
+        
+        Returns:
+            ApiResponse containing dashboard statistics if successful
+        """
+        if self.user_id is None:
+            return self._user_id_required()
+        
+        return await self._make_request(
+            method="GET",
+            endpoint=f"/api/v1/users/{self.user_id}/dashboard/stats"
+        )
+    
+    async def get_inventory_by_shape(self) -> ApiResponse:
+        """
+        Get inventory distribution by shape.
+        
+        Returns:
+            ApiResponse containing inventory distribution data if successful
+        """
+        if self.user_id is None:
+            return self._user_id_required()
+        
+        return await self._make_request(
+            method="GET",
+            endpoint=f"/api/v1/users/{self.user_id}/inventory/by-shape"
+        )
+    
+    async def get_recent_sales(self) -> ApiResponse:
+        """
+        Get recent sales data.
+        
+        Returns:
+            ApiResponse containing recent sales data if successful
+        """
+        if self.user_id is None:
+            return self._user_id_required()
+        
+        return await self._make_request(
+            method="GET",
+            endpoint=f"/api/v1/users/{self.user_id}/sales/recent"
+        )
@@ -2,9 +2,26 @@ import requests
 import time
 import logging
 import json
-from typing import Dict, List, Optional, Union, Any, TypedDict, Literal
-from dataclasses import dataclass
+import math
+import asyncio
+import threading
+from email.utils import parsedate_to_datetime
+import hashlib
+import codecs
+import re
+import sys
+from typing import Dict, List, Optional, Union, Any, TypedDict, Literal, Iterator, Mapping, Tuple, Callable, Iterable, Protocol, Awaitable, ItemsView, ValuesView
+from dataclasses import dataclass, field, replace
+from functools import lru_cache
+from collections import OrderedDict, deque
 from urllib.parse import urljoin
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, as_completed, wait
+from requests.adapters import HTTPAdapter
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
 
 
 class DiamondData(TypedDict, total=False):
@@ -31,6 +48,152 @@ class DiamondData(TypedDict, total=False):
     owner_id: Optional[int]
 
 
+# DiamondRecord fields held in slots; any other field is a rarely read one
+RECORD_FIELDS = (
+    "id", "stock_number", "shape", "weight", "color", "clarity", "cut", "polish", "symmetry",
+    "price_per_carat", "price", "status", "lab", "fluorescence", "owner_id",
+)
+
+# Rare-field blob most recently decoded on each thread, as (blob, decoded)
+_last_rare = threading.local()
+
+# Grade fields whose values are interned, so records share one string per grade
+_INTERNED_FIELDS = frozenset(("shape", "color", "clarity", "cut", "polish", "symmetry", "status", "lab", "fluorescence"))
+
+
+class DiamondRecord(Mapping[str, Any]):
+    """
+    Compact, read-only diamond record.
+    
+    An opt-in alternative to DiamondData dicts for large inventories
+    (``as_records=True`` on get_diamonds, get_diamond and search_diamonds).
+    Common fields live in ``__slots__`` and grade strings are interned; the
+    rarely read fields (certificate_url, picture, certificate_number, owners
+    and any field the client does not know) are kept as one UTF-8 JSON blob
+    and only decoded when read.
+    
+    A record is a Mapping, so code written for DiamondData
+    (``diamond["price"]``, ``diamond.get("cut")``) works unchanged, and
+    DiamondRecord(diamond).to_dict() == diamond. Attribute access returns
+    None for known fields the stone does not have. Records cannot be
+    modified; to_dict() returns a mutable copy.
+    """
+    __slots__ = RECORD_FIELDS + ("_rare",)
+    
+    def __init__(self, diamond: Mapping[str, Any]):
+        """
+        Args:
+            diamond: DiamondData to convert
+        """
+        rare = None
+        for key, value in diamond.items():
+            slot = _RECORD_SLOTS.get(key)
+            if slot is None:
+                if rare is None:
+                    rare = {}
+                rare[key] = value
+                continue
+            if key in _INTERNED_FIELDS and type(value) is str:
+                value = sys.intern(value)
+            slot.__set__(self, value)
+        if rare is not None:
+            try:
+                # Not orjson.dumps: its bytes keep orjson's over-allocated output buffer
+                rare = json.dumps(rare, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+            except (TypeError, ValueError):
+                # Not JSON-encodable: keep the values as they are
+                pass
+        object.__setattr__(self, "_rare", rare)
+    
+    @classmethod
+    def from_dict(cls, diamond: Mapping[str, Any]) -> "DiamondRecord":
+        """Convert DiamondData to a record"""
+        return cls(diamond)
+    
+    def to_dict(self) -> DiamondData:
+        """Convert the record back to an equal DiamondData dict"""
+        diamond: Dict[str, Any] = {}
+        for name, slot in _RECORD_SLOTS.items():
+            try:
+                diamond[name] = slot.__get__(self)
+            except AttributeError:
+                pass
+        diamond.update(self._rare_fields())
+        return diamond
+    
+    def _rare_fields(self, shared: bool = False) -> Dict[str, Any]:
+        # shared=True may return the decoded blob last read on this thread, so
+        # per-key reads (dict(record), iteration) decode it once, not once per key
+        rare = self._rare
+        if rare is None:
+            return {}
+        if not isinstance(rare, bytes):
+            return rare if shared else dict(rare)
+        if shared:
+            last = getattr(_last_rare, "entry", None)
+            if last is not None and last[0] is rare:
+                return last[1]
+        decoded = orjson.loads(rare) if orjson is not None else json.loads(rare)
+        if shared:
+            _last_rare.entry = (rare, decoded)
+        return decoded
+    
+    def __getattr__(self, name: str) -> Any:
+        # Only reached for unset slots and fields outside the slots
+        if name in _RECORD_SLOTS:
+            return None
+        if name != "_rare":
+            rare = self._rare_fields(shared=True)
+            if name in rare:
+                return rare[name]
+            if name in DiamondData.__annotations__:
+                return None
+        raise AttributeError(f"'DiamondRecord' object has no attribute '{name}'")
+    
+    def __getitem__(self, key: str) -> Any:
+        slot = _RECORD_SLOTS.get(key)
+        if slot is None:
+            return self._rare_fields(shared=True)[key]
+        try:
+            return slot.__get__(self)
+        except AttributeError:
+            raise KeyError(key) from None
+    
+    def __iter__(self) -> Iterator[str]:
+        for name, slot in _RECORD_SLOTS.items():
+            try:
+                slot.__get__(self)
+            except AttributeError:
+                continue
+            yield name
+        yield from self._rare_fields(shared=True)
+    
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+    
+    # Overridden so the blob is decoded once per call, not once per rare field
+    def items(self) -> ItemsView[str, Any]:
+        return self.to_dict().items()
+    
+    def values(self) -> ValuesView[Any]:
+        return self.to_dict().values()
+    
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError("DiamondRecord is read-only; use to_dict() for a mutable copy")
+    
+    def __delattr__(self, name: str) -> None:
+        raise AttributeError("DiamondRecord is read-only; use to_dict() for a mutable copy")
+    
+    def __repr__(self) -> str:
+        return f"DiamondRecord({self.to_dict()!r})"
+    
+    def __reduce__(self) -> Tuple[Any, ...]:
+        return (DiamondRecord, (self.to_dict(),))
+
+
+_RECORD_SLOTS = {name: DiamondRecord.__dict__[name] for name in RECORD_FIELDS}
+
+
 @dataclass
 class ApiResponse:
     """Standardized API response object"""
@@ -39,6 +202,1507 @@ class ApiResponse:
     error: Optional[str] = None
     status_code: int = 200
     message: Optional[str] = None
+    headers: Mapping[str, str] = field(default_factory=dict, repr=False)
+
+
+def _as_records(response: ApiResponse) -> ApiResponse:
+    """A copy of a diamond response with DiamondRecord data; the original (which may be cached) is left alone"""
+    if not response.success:
+        return response
+    if isinstance(response.data, list):
+        data = [DiamondRecord(item) if isinstance(item, dict) else item for item in response.data]
+    elif isinstance(response.data, dict):
+        data = DiamondRecord(response.data)
+    else:
+        return response
+    return replace(response, data=data)
+
+
+@dataclass
+class WriteEvent:
+    """A successful add, update or delete made through MazalbotClient"""
+    operation: Literal["add", "update", "delete"]
+    response: ApiResponse
+    diamond_id: Optional[str] = None
+    diamonds: List[DiamondData] = field(default_factory=list)
+
+
+@dataclass
+class RequestEvent:
+    """
+    One step of an API request, passed to request hooks.
+    
+    ``kind`` is "request" before each attempt is sent, "response" when an
+    HTTP response arrives (any status), "retry" when a retry is scheduled
+    and "error" when the request finally fails, including when it is
+    cancelled or an exception escapes the client. An "error" with
+    status_code 0 ends an attempt that got no response.
+    """
+    kind: Literal["request", "response", "retry", "error"]
+    method: str
+    endpoint: str
+    route: str
+    attempt: int
+    operation: Optional[str] = None
+    status_code: Optional[int] = None
+    bytes_sent: int = 0
+    bytes_received: int = 0
+    latency: Optional[float] = None
+    retry_in: Optional[float] = None
+    error: Optional[str] = None
+
+
+REQUEST_HOOK_KINDS = ("request", "response", "retry", "error")
+
+
+class RequestHooks:
+    """
+    Registry of request hooks for a client.
+    
+    Clients only build RequestEvents for kinds that have a hook registered,
+    so an empty registry costs a single attribute check per request.
+    """
+    
+    def __init__(self):
+        self._hooks: Dict[str, List[Callable[[RequestEvent], None]]] = {kind: [] for kind in REQUEST_HOOK_KINDS}
+        self.active = False
+    
+    def add(self, hook: Callable[[RequestEvent], None], kinds: Iterable[str] = REQUEST_HOOK_KINDS) -> None:
+        kinds = tuple(kinds)
+        unknown = [kind for kind in kinds if kind not in self._hooks]
+        if unknown:
+            raise ValueError(f"Unknown request hook kind(s): {', '.join(unknown)}")
+        for kind in kinds:
+            self._hooks[kind] = self._hooks[kind] + [hook]
+        self.active = True
+    
+    def remove(self, hook: Callable[[RequestEvent], None]) -> None:
+        for kind, hooks in self._hooks.items():
+            self._hooks[kind] = [registered for registered in hooks if registered is not hook]
+        self.active = any(self._hooks.values())
+    
+    def wants(self, kind: str) -> bool:
+        return bool(self._hooks[kind])
+    
+    def emit(self, event: RequestEvent) -> None:
+        for hook in self._hooks[event.kind]:
+            try:
+                hook(event)
+            except Exception:
+                logging.getLogger("mazalbot_client").exception("Request hook %r failed", hook)
+
+
+@lru_cache(maxsize=1024)
+def endpoint_route(endpoint: str) -> str:
+    """
+    Reduce an endpoint to a low-cardinality route for metrics.
+    
+    Path segments after the resource name that look like identifiers
+    (contain a digit) are replaced with ``{id}``, e.g.
+    ``/api/v1/get_stone/3f2c9a10`` becomes ``/api/v1/get_stone/{id}``.
+    
+    Args:
+        endpoint: API endpoint (without base URL)
+        
+    Returns:
+        The templated route
+    """
+    parts = endpoint.split("?", 1)[0].split("/")
+    return "/".join(
+        "{id}" if index > 3 and any(char.isdigit() for char in part) else part
+        for index, part in enumerate(parts)
+    )
+
+
+class LatencyHistogram:
+    """
+    Fixed log-scale latency histogram.
+    
+    Buckets grow geometrically (``buckets_per_doubling`` per doubling), so
+    percentiles are accurate to a few percent across the whole range at a
+    fixed memory cost, like an HDR histogram with low precision. Not
+    thread-safe on its own; RequestStats guards it with a lock.
+    """
+    
+    def __init__(self, lowest: float = 1e-4, highest: float = 120.0, buckets_per_doubling: int = 8):
+        """
+        Create an empty histogram.
+        
+        Args:
+            lowest: Smallest distinguishable latency in seconds
+            highest: Latencies above this land in the last bucket
+            buckets_per_doubling: Resolution; 8 gives ~9% wide buckets
+        """
+        self.lowest = lowest
+        self._scale = buckets_per_doubling / math.log(2)
+        self._growth = 2 ** (1 / buckets_per_doubling)
+        self._counts = [0] * (int(math.log(highest / lowest) * self._scale) + 2)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+    
+    def record(self, value: float) -> None:
+        index = int(math.log(value / self.lowest) * self._scale) + 1 if value > self.lowest else 0
+        self._counts[min(index, len(self._counts) - 1)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+    
+    def percentile(self, percent: float) -> float:
+        """
+        Estimate a latency percentile.
+        
+        Args:
+            percent: Percentile between 0 and 100
+            
+        Returns:
+            Geometric midpoint of the bucket holding the percentile (capped
+            at the largest recorded value), or 0.0 if the histogram is empty
+        """
+        if not self.count:
+            return 0.0
+        rank = max(1, math.ceil(self.count * percent / 100))
+        seen = 0
+        for index, count in enumerate(self._counts):
+            seen += count
+            if seen >= rank:
+                return min(self.lowest * self._growth ** max(0.0, index - 0.5), self.max)
+        return self.max
+
+
+@dataclass
+class EndpointStats:
+    """Snapshot of the requests made to one method and route"""
+    method: str
+    route: str
+    requests: int = 0
+    responses: int = 0
+    network_errors: int = 0
+    retries: int = 0
+    status_429: int = 0
+    status_5xx: int = 0
+    bytes_sent: int = 0
+    bytes_received: int = 0
+    latency_mean: float = 0.0
+    latency_p50: float = 0.0
+    latency_p95: float = 0.0
+    latency_p99: float = 0.0
+    latency_max: float = 0.0
+    
+    @property
+    def rate_429(self) -> float:
+        return self.status_429 / self.requests if self.requests else 0.0
+    
+    @property
+    def rate_5xx(self) -> float:
+        return self.status_5xx / self.requests if self.requests else 0.0
+
+
+class _EndpointRecorder:
+    __slots__ = ("network_errors", "retries", "status_429", "status_5xx", "bytes_sent", "bytes_received", "latency")
+    
+    def __init__(self):
+        self.network_errors = 0
+        self.retries = 0
+        self.status_429 = 0
+        self.status_5xx = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.latency = LatencyHistogram()
+
+
+class RequestStats:
+    """
+    Per-endpoint request statistics, recorded by the clients on every attempt.
+    
+    Each attempt costs one lock acquisition and a few integer updates, so
+    the stats are cheap enough to leave on in production. Pass one instance
+    to several clients to aggregate them.
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._endpoints: Dict[Tuple[str, str], _EndpointRecorder] = {}
+        self.since = time.time()
+    
+    def _recorder(self, method: str, route: str) -> _EndpointRecorder:
+        recorder = self._endpoints.get((method, route))
+        if recorder is None:
+            recorder = self._endpoints[(method, route)] = _EndpointRecorder()
+        return recorder
+    
+    def record_response(
+        self,
+        method: str,
+        route: str,
+        status_code: int,
+        latency: float,
+        bytes_sent: int,
+        bytes_received: int
+    ) -> None:
+        with self._lock:
+            recorder = self._recorder(method, route)
+            recorder.latency.record(latency)
+            recorder.bytes_sent += bytes_sent
+            recorder.bytes_received += bytes_received
+            if status_code == 429:
+                recorder.status_429 += 1
+            elif status_code >= 500:
+                recorder.status_5xx += 1
+    
+    def record_network_error(self, method: str, route: str, bytes_sent: int) -> None:
+        with self._lock:
+            recorder = self._recorder(method, route)
+            recorder.network_errors += 1
+            recorder.bytes_sent += bytes_sent
+    
+    def record_retry(self, method: str, route: str) -> None:
+        with self._lock:
+            self._recorder(method, route).retries += 1
+    
+    def snapshot(self) -> Dict[str, EndpointStats]:
+        """
+        Get the current statistics.
+        
+        Returns:
+            Dictionary mapping "METHOD route" to EndpointStats, latencies in seconds
+        """
+        with self._lock:
+            snapshot = {}
+            for (method, route), recorder in sorted(self._endpoints.items()):
+                latency = recorder.latency
+                snapshot[f"{method} {route}"] = EndpointStats(
+                    method=method,
+                    route=route,
+                    requests=latency.count + recorder.network_errors,
+                    responses=latency.count,
+                    network_errors=recorder.network_errors,
+                    retries=recorder.retries,
+                    status_429=recorder.status_429,
+                    status_5xx=recorder.status_5xx,
+                    bytes_sent=recorder.bytes_sent,
+                    bytes_received=recorder.bytes_received,
+                    latency_mean=latency.total / latency.count if latency.count else 0.0,
+                    latency_p50=latency.percentile(50),
+                    latency_p95=latency.percentile(95),
+                    latency_p99=latency.percentile(99),
+                    latency_max=latency.max
+                )
+            return snapshot
+    
+    def reset(self) -> None:
+        """Discard all recorded statistics"""
+        with self._lock:
+            self._endpoints.clear()
+            self.since = time.time()
+
+
+# Range filters accepted by search_diamonds as min_<field>/max_<field>
+SEARCH_RANGE_FIELDS = ("weight", "carat", "price", "price_per_carat")
+
+# Query parameters that are not diamond filters
+_NON_FILTER_PARAMS = {"user_id", "page", "limit"}
+
+# Fields every uploaded diamond must carry
+REQUIRED_DIAMOND_FIELDS = ("shape", "weight", "color", "clarity")
+
+# Upload failures that may be caused by a few stones; the chunk is split to find the culprits.
+# A 400 is split only when it names the stone (see _named_stone_index).
+_SPLIT_ON_CODES = (413, 422)
+
+# Halvings allowed per chunk, so a chunk refused as a whole costs at most 2 ** 7 - 1 requests
+_MAX_SPLIT_DEPTH = 6
+
+# Fields that describe where a stone lives rather than what it is
+_IDENTITY_FIELDS = ("id", "owners", "owner_id")
+
+
+def _named_stone_index(error: Optional[str], size: int) -> Optional[int]:
+    """Position of the stone an upload error names ("... at index 3 ..."), if it names one"""
+    match = re.search(r"\bindex (\d+)\b", error or "")
+    if match is None or int(match.group(1)) >= size:
+        return None
+    return int(match.group(1))
+
+
+@dataclass
+class SearchFilter:
+    """
+    Normalised form of a search_diamonds criteria dict.
+    
+    ``equals`` maps a field to the allowed values (case-insensitive; a list
+    of values means any of them). ``ranges`` maps a numeric field to an
+    inclusive (minimum, maximum) pair where either bound may be None.
+    """
+    equals: Dict[str, Tuple[str, ...]] = field(default_factory=dict)
+    ranges: Dict[str, Tuple[Optional[float], Optional[float]]] = field(default_factory=dict)
+    
+    def matches(self, diamond: Mapping[str, Any]) -> bool:
+        """
+        Check whether a diamond satisfies the filter.
+        
+        Args:
+            diamond: Diamond data
+            
+        Returns:
+            True if every condition holds
+        """
+        for name, allowed in self.equals.items():
+            value = diamond.get(name)
+            if value is None or str(value).strip().casefold() not in allowed:
+                return False
+        for name, (low, high) in self.ranges.items():
+            value = diamond.get(name)
+            if value is None:
+                return False
+            try:
+                value = float(value)
+            except (TypeError, ValueError):
+                return False
+            if (low is not None and value < low) or (high is not None and value > high):
+                return False
+        return True
+
+
+def parse_search_criteria(search_criteria: Mapping[str, Any]) -> SearchFilter:
+    """
+    Normalise a search_diamonds criteria dict.
+    
+    Grade fields (shape, color, clarity, ...) match case-insensitively and
+    accept either a single value or a list of alternatives. Numeric fields
+    accept an exact value or inclusive bounds via ``min_<field>`` and
+    ``max_<field>`` (e.g. ``min_weight``, ``max_price_per_carat``).
+    Pagination parameters, user_id and unknown keys are ignored.
+    
+    Args:
+        search_criteria: Dictionary containing search parameters
+        
+    Returns:
+        SearchFilter describing the criteria
+    """
+    search_filter = SearchFilter()
+    known_fields = DiamondData.__annotations__
+    for key, value in search_criteria.items():
+        if value is None or key in _NON_FILTER_PARAMS:
+            continue
+        
+        bound = key[:4]
+        if bound in ("min_", "max_") and key[4:] in SEARCH_RANGE_FIELDS:
+            low, high = search_filter.ranges.get(key[4:], (None, None))
+            if bound == "min_":
+                low = float(value)
+            else:
+                high = float(value)
+            search_filter.ranges[key[4:]] = (low, high)
+        elif key in SEARCH_RANGE_FIELDS:
+            search_filter.ranges[key] = (float(value), float(value))
+        elif key in known_fields:
+            values = value if isinstance(value, (list, tuple, set, frozenset)) else [value]
+            search_filter.equals[key] = tuple(str(item).strip().casefold() for item in values)
+    return search_filter
+
+
+def diamond_content_hash(diamond: Mapping[str, Any]) -> str:
+    """
+    Compute a stable hash of a diamond's content.
+    
+    Identity fields (id, owners, owner_id) and empty values are left out and
+    numbers are normalised, so the same stone hashes identically whether it
+    came from a supplier feed or from the API.
+    
+    Args:
+        diamond: Diamond data
+        
+    Returns:
+        Hex digest identifying the diamond's content
+    """
+    canonical = []
+    for key in sorted(diamond):
+        value = diamond[key]
+        if key in _IDENTITY_FIELDS or value is None or value == "":
+            continue
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            value = repr(float(value))
+        canonical.append(f"{key}={value}")
+    return hashlib.blake2b("\x1f".join(canonical).encode("utf-8"), digest_size=16).hexdigest()
+
+
+@dataclass
+class PageTiming:
+    """Timing of a single page fetched by MazalbotClient.fetch_all_diamonds"""
+    page: int
+    elapsed: float
+    attempts: int
+    count: int
+    status_code: int
+
+
+@dataclass
+class BulkFetchResult:
+    """Result of a parallel full-inventory fetch"""
+    success: bool
+    diamonds: List[DiamondData] = field(default_factory=list)
+    total_count: Optional[int] = None
+    total_pages: int = 0
+    elapsed: float = 0.0
+    page_timings: List[PageTiming] = field(default_factory=list)
+    failed_pages: Dict[int, ApiResponse] = field(default_factory=dict)
+    error: Optional[str] = None
+
+
+@dataclass
+class UploadItemResult:
+    """Outcome of one stone sent by MazalbotClient.upload_diamonds"""
+    index: int
+    status: Literal["accepted", "rejected", "failed"]
+    stock_number: Optional[str] = None
+    reason: Optional[str] = None
+    attempts: int = 1
+    
+    @property
+    def retried(self) -> bool:
+        return self.attempts > 1
+
+
+@dataclass
+class UploadResult:
+    """
+    Result of a chunked bulk upload.
+    
+    ``unlisted`` counts accepted stones that were passed to upload_diamonds'
+    on_items callback instead of being kept in ``items`` (and
+    ``unlisted_retried`` those of them that needed more than one attempt).
+    """
+    success: bool
+    items: List[UploadItemResult] = field(default_factory=list)
+    chunks: int = 0
+    requests: int = 0
+    elapsed: float = 0.0
+    error: Optional[str] = None
+    unlisted: int = 0
+    unlisted_retried: int = 0
+    
+    def _count(self, status: str) -> int:
+        return sum(1 for item in self.items if item.status == status)
+    
+    @property
+    def total(self) -> int:
+        return len(self.items) + self.unlisted
+    
+    @property
+    def accepted(self) -> int:
+        return self._count("accepted") + self.unlisted
+    
+    @property
+    def rejected(self) -> int:
+        return self._count("rejected")
+    
+    @property
+    def failed(self) -> int:
+        return self._count("failed")
+    
+    @property
+    def retried(self) -> int:
+        return sum(1 for item in self.items if item.retried) + self.unlisted_retried
+
+
+@dataclass
+class BatchItemResult:
+    """Outcome of one stone in MazalbotClient.update_diamonds or delete_diamonds"""
+    index: int
+    diamond_id: str
+    status: Literal["ok", "failed", "skipped", "planned"]
+    status_code: int = 0
+    error: Optional[str] = None
+
+
+@dataclass
+class BatchResult:
+    """
+    Result of a batch update or delete.
+    
+    ``bulk`` is True when the server's bulk endpoint was used, False when the
+    batch fell back to one request per stone. Items are "planned" in a dry
+    run and "skipped" when the batch was aborted before reaching them.
+    """
+    success: bool
+    operation: Literal["update", "delete"]
+    items: List[BatchItemResult] = field(default_factory=list)
+    requests: int = 0
+    bulk: bool = False
+    dry_run: bool = False
+    aborted: bool = False
+    elapsed: float = 0.0
+    error: Optional[str] = None
+    
+    def _count(self, status: str) -> int:
+        return sum(1 for item in self.items if item.status == status)
+    
+    @property
+    def succeeded(self) -> int:
+        return self._count("ok")
+    
+    @property
+    def failed(self) -> int:
+        return self._count("failed")
+    
+    @property
+    def skipped(self) -> int:
+        return self._count("skipped")
+
+
+class MazalbotApiError(Exception):
+    """
+    Raised by iterators and other helpers that cannot return an ApiResponse.
+    
+    The failed ApiResponse is available as the ``response`` attribute.
+    """
+    
+    def __init__(self, response: ApiResponse):
+        super().__init__(response.error)
+        self.response = response
+
+
+def _header_int(headers: Mapping[str, str], name: str) -> Optional[int]:
+    """
+    Read an integer response header such as X-Total-Pages.
+    
+    Args:
+        headers: Response headers (case-insensitive mapping)
+        name: Header name
+        
+    Returns:
+        The header value as an int, or None if missing or malformed
+    """
+    value = headers.get(name)
+    if value is None:
+        return None
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+def _header_float(headers: Mapping[str, str], name: str) -> Optional[float]:
+    """
+    Read a numeric response header such as X-RateLimit-Reset.
+    
+    Args:
+        headers: Response headers (case-insensitive mapping)
+        name: Header name
+        
+    Returns:
+        The header value as a float, or None if missing or malformed
+    """
+    value = headers.get(name)
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _retry_after_seconds(headers: Mapping[str, str]) -> Optional[float]:
+    """
+    Parse a Retry-After header given either in seconds or as an HTTP date.
+    
+    Args:
+        headers: Response headers (case-insensitive mapping)
+        
+    Returns:
+        Seconds to wait before retrying, or None if the header is absent
+    """
+    value = headers.get("Retry-After")
+    if value is None:
+        return None
+    seconds = _header_float(headers, "Retry-After")
+    if seconds is not None:
+        return max(0.0, seconds)
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def _json_default(value: Any) -> Any:
+    # DiamondRecords are sent as the dicts they came from; anything else is formatted with str()
+    if isinstance(value, DiamondRecord):
+        return value.to_dict()
+    return str(value)
+
+
+class JsonCodec:
+    """
+    Standard-library JSON codec.
+    
+    Encodes compact UTF-8 JSON and formats values json cannot handle
+    (datetimes, Decimals, ...) with str(), like the client's logging did.
+    DiamondRecords are encoded as their DiamondData dicts.
+    """
+    
+    name = "json"
+    
+    def dumps(self, obj: Any) -> bytes:
+        return json.dumps(obj, default=_json_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    
+    def loads(self, data: Union[bytes, str]) -> Any:
+        return json.loads(data)
+
+
+class OrjsonCodec(JsonCodec):
+    """
+    JSON codec backed by the optional ``orjson`` package (``pip install orjson``).
+    
+    Several times faster than JsonCodec and decodes the same documents, but
+    its output differs for a few values: datetimes are written in ISO 8601
+    form ("2024-01-02T03:04:05" rather than "2024-01-02 03:04:05"), NaN and
+    infinities become null, large floats drop the exponent sign ("1e16"),
+    and integers outside the 64-bit range raise TypeError.
+    """
+    
+    name = "orjson"
+    
+    def __init__(self):
+        if orjson is None:
+            raise ImportError("OrjsonCodec requires orjson. Install it with: pip install orjson")
+    
+    def dumps(self, obj: Any) -> bytes:
+        return orjson.dumps(obj, default=_json_default, option=orjson.OPT_NON_STR_KEYS)
+    
+    def loads(self, data: Union[bytes, str]) -> Any:
+        return orjson.loads(data)
+
+
+def default_codec() -> JsonCodec:
+    """
+    Get the fastest available JSON codec.
+    
+    Returns:
+        OrjsonCodec if orjson is installed, otherwise JsonCodec
+    """
+    return OrjsonCodec() if orjson is not None else JsonCodec()
+
+
+_DEFAULT_CODEC = default_codec()
+
+
+def _parse_response_body(body: bytes, codec: Optional[JsonCodec] = None) -> Dict[str, Any]:
+    """
+    Decode a raw response body into a dictionary.
+    
+    Non-JSON bodies are wrapped as ``{"message": text}`` and bare JSON arrays
+    (e.g. from get_all_stones) as ``{"data": [...]}``.
+    
+    Args:
+        body: Raw response body bytes
+        codec: JSON codec to decode with (defaults to the fastest available)
+        
+    Returns:
+        Dictionary with the decoded response payload
+    """
+    try:
+        response_data = (codec or _DEFAULT_CODEC).loads(body)
+    except ValueError:
+        return {"message": body.decode("utf-8", errors="replace")}
+    
+    if not isinstance(response_data, dict):
+        response_data = {"data": response_data}
+    return response_data
+
+
+class _IncrementalArrayDecoder:
+    """
+    Push parser that yields the elements of a JSON array as bytes arrive.
+    
+    Accepts either a bare top-level array or an object whose ``key`` member
+    is the array (the other members are collected in ``extra``). Only the
+    undecoded tail of the body is buffered, so memory is bounded by the
+    largest single element rather than the whole response.
+    """
+    
+    _WHITESPACE = re.compile(r"[ \t\n\r]*")
+    
+    def __init__(self, key: str = "data"):
+        self.key = key
+        self.extra: Dict[str, Any] = {}
+        self.found = False
+        self.done = False
+        self._decoder = json.JSONDecoder()
+        self._text = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self._buffer = ""
+        self._pos = 0
+        self._state = "start"
+        self._root = ""
+        self._final = False
+    
+    def feed(self, chunk: bytes, final: bool = False) -> List[Any]:
+        """
+        Add body bytes and return the array elements completed by them.
+        
+        Args:
+            chunk: Next piece of the response body
+            final: True when chunk is the end of the body
+            
+        Returns:
+            Newly decoded array elements, in order
+        """
+        self._buffer = self._buffer[self._pos:] + self._text.decode(chunk, final)
+        self._pos = 0
+        self._final = final
+        items: List[Any] = []
+        while not self.done and self._step(items):
+            pass
+        if final and not self.done:
+            raise ValueError(f"Truncated JSON body (parser state {self._state!r})")
+        return items
+    
+    def _skip(self) -> Optional[str]:
+        """Skip whitespace and return the next character, or None if the buffer is exhausted"""
+        self._pos = self._WHITESPACE.match(self._buffer, self._pos).end()
+        return self._buffer[self._pos] if self._pos < len(self._buffer) else None
+    
+    def _value(self) -> Tuple[bool, Any]:
+        """Decode one complete JSON value at the current position"""
+        try:
+            value, end = self._decoder.raw_decode(self._buffer, self._pos)
+        except json.JSONDecodeError:
+            if self._final:
+                raise
+            return False, None
+        if not self._final and (
+            end == len(self._buffer)
+            or (isinstance(value, (int, float)) and self._buffer[end] in ".eE")
+        ):
+            # A number cut by a chunk boundary may continue in the next chunk
+            return False, None
+        self._pos = end
+        return True, value
+    
+    def _step(self, items: List[Any]) -> bool:
+        """Advance the parser by one token; False means more input is needed"""
+        char = self._skip()
+        if char is None:
+            return False
+        
+        if self._state == "start":
+            if char not in "[{":
+                raise ValueError(f"Expected a JSON array or object, got {char!r}")
+            self._pos += 1
+            self._root = char
+            self.found = char == "["
+            self._state = "first_element" if char == "[" else "first_member"
+        elif self._state in ("first_element", "element"):
+            if char == "]" and self._state == "first_element":
+                self._pos += 1
+                self._end_array()
+                return True
+            complete, value = self._value()
+            if not complete:
+                return False
+            items.append(value)
+            self._state = "element_separator"
+        elif self._state == "element_separator":
+            if char not in ",]":
+                raise ValueError(f"Expected ',' or ']' in array, got {char!r}")
+            self._pos += 1
+            if char == ",":
+                self._state = "element"
+            else:
+                self._end_array()
+        elif self._state in ("first_member", "member"):
+            if char == "}" and self._state == "first_member":
+                self._pos += 1
+                self.done = True
+                return True
+            start = self._pos
+            complete, name = self._value()
+            if not complete:
+                return False
+            char = self._skip()
+            if char is None:
+                self._pos = start
+                return False
+            if char != ":":
+                raise ValueError(f"Expected ':' after object key, got {char!r}")
+            self._pos += 1
+            char = self._skip()
+            if char is None:
+                self._pos = start
+                return False
+            if name == self.key and char == "[":
+                self._pos += 1
+                self.found = True
+                self._state = "first_element"
+                return True
+            complete, value = self._value()
+            if not complete:
+                self._pos = start
+                return False
+            self.extra[name] = value
+            self._state = "member_separator"
+        elif self._state == "member_separator":
+            if char not in ",}":
+                raise ValueError(f"Expected ',' or '}}' in object, got {char!r}")
+            self._pos += 1
+            if char == ",":
+                self._state = "member"
+            else:
+                self.done = True
+        return True
+    
+    def _end_array(self) -> None:
+        if self._root == "[":
+            self.done = True
+        else:
+            self._state = "member_separator"
+
+
+def _build_api_response(
+    status_code: int,
+    response_data: Dict[str, Any],
+    headers: Optional[Mapping[str, str]] = None
+) -> ApiResponse:
+    """
+    Convert a decoded response payload into an ApiResponse.
+    
+    Args:
+        status_code: HTTP status code of the response
+        response_data: Payload as returned by _parse_response_body
+        headers: Response headers (e.g. X-Total-Count, X-Total-Pages)
+        
+    Returns:
+        ApiResponse object with standardized response data
+    """
+    if status_code < 400:
+        return ApiResponse(
+            success=True,
+            data=response_data.get("data", response_data),
+            status_code=status_code,
+            message=response_data.get("message"),
+            headers=headers if headers is not None else {}
+        )
+    
+    error_message = response_data.get("error", response_data.get("message", f"HTTP {status_code}"))
+    return ApiResponse(
+        success=False,
+        error=error_message,
+        status_code=status_code,
+        headers=headers if headers is not None else {}
+    )
+
+
+_logger_configured = False
+
+
+def _configure_logger(log_level: Optional[str] = None) -> logging.Logger:
+    """
+    Set up the shared "mazalbot_client" logger.
+    
+    A console handler is added (and the level defaulted to INFO) only the
+    first time, and only if neither this logger nor the root logger already
+    has handlers, so applications that configure logging themselves are
+    left alone. Later calls only change the level when one is given.
+    
+    Args:
+        log_level: Logging level name (DEBUG, INFO, WARNING, ERROR, CRITICAL)
+        
+    Returns:
+        The "mazalbot_client" logger
+    """
+    global _logger_configured
+    logger = logging.getLogger("mazalbot_client")
+    if not _logger_configured:
+        _logger_configured = True
+        if not logger.handlers and not logging.getLogger().handlers:
+            handler = logging.StreamHandler()
+            formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+            handler.setFormatter(formatter)
+            logger.addHandler(handler)
+        if log_level is None and logger.level == logging.NOTSET:
+            logger.setLevel(logging.INFO)
+    if log_level is not None:
+        log_level_map = {
+            "DEBUG": logging.DEBUG,
+            "INFO": logging.INFO,
+            "WARNING": logging.WARNING,
+            "ERROR": logging.ERROR,
+            "CRITICAL": logging.CRITICAL
+        }
+        logger.setLevel(log_level_map.get(log_level, logging.INFO))
+    return logger
+
+
+class Transport(Protocol):
+    """
+    Interface MazalbotClient sends its HTTP requests through.
+    
+    ConnectionPool is the network implementation; anything with the same
+    ``request``/``close`` methods can stand in for it, e.g. the recording and
+    replaying transports in mazalbot_replay.
+    """
+    
+    def request(self, method: str, url: str, **kwargs: Any) -> requests.Response:
+        ...
+    
+    def close(self) -> None:
+        ...
+
+
+class ConnectionPool:
+    """
+    Pool of keep-alive HTTP connections shared by one or more clients.
+    
+    Wraps a ``requests.Session`` mounted with an ``HTTPAdapter`` so that
+    TCP+TLS connections to the API host are reused between requests instead
+    of being re-established on every call. The pool is thread-safe and can be
+    passed to several MazalbotClient instances in the same process.
+    
+    Example usage:
+    ```python
+    with ConnectionPool(pool_size=20, block=True) as pool:
+        sales = MazalbotClient(user_id=123, pool=pool)
+        stock = MazalbotClient(user_id=456, pool=pool)
+        ...
+    ```
+    """
+    
+    def __init__(
+        self,
+        pool_size: int = 10,
+        max_hosts: int = 4,
+        block: bool = False,
+        keep_alive: bool = True
+    ):
+        """
+        Initialize the connection pool.
+        
+        Args:
+            pool_size: Maximum number of connections kept open per host
+            max_hosts: Number of distinct hosts to keep connection pools for
+            block: If True, callers wait for a free connection once a host has
+                pool_size connections in use instead of opening extra ones
+            keep_alive: Keep connections open between requests
+        """
+        if pool_size < 1:
+            raise ValueError("pool_size must be at least 1")
+        
+        self.pool_size = pool_size
+        self.max_hosts = max_hosts
+        self.block = block
+        self.keep_alive = keep_alive
+        self.closed = False
+        
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=max_hosts,
+            pool_maxsize=pool_size,
+            pool_block=block
+        )
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        if not keep_alive:
+            self.session.headers["Connection"] = "close"
+    
+    def request(self, method: str, url: str, **kwargs: Any) -> requests.Response:
+        """
+        Send a request over a pooled connection.
+        
+        Args:
+            method: HTTP method
+            url: Absolute request URL
+            **kwargs: Extra arguments forwarded to ``requests.Session.request``
+            
+        Returns:
+            The ``requests.Response`` for the request
+        """
+        if self.closed:
+            raise RuntimeError("Connection pool is closed")
+        return self.session.request(method=method, url=url, **kwargs)
+    
+    def close(self) -> None:
+        """Close all pooled connections."""
+        if not self.closed:
+            self.closed = True
+            self.session.close()
+    
+    def __enter__(self) -> "ConnectionPool":
+        return self
+    
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+
+class RateLimiter:
+    """
+    Token-bucket scheduler that paces requests under the API rate limit.
+    
+    The bucket starts unlimited (or at the given rate) and learns the real
+    limit from the X-RateLimit-Limit/-Remaining/-Reset response headers:
+    the refill rate is set so that ``limit`` requests are spread over the
+    rate-limit window, scaled by ``safety_margin`` to stay just under it.
+    When the server reports no remaining requests, or asks for a pause via
+    Retry-After, every caller waits until the window resets.
+    
+    The limiter is thread-safe and can be shared by several clients, both
+    MazalbotClient and AsyncMazalbotClient, that use the same API key.
+    """
+    
+    def __init__(
+        self,
+        rate: Optional[float] = None,
+        burst: Optional[int] = None,
+        safety_margin: float = 0.9
+    ):
+        """
+        Initialize the rate limiter.
+        
+        Args:
+            rate: Initial requests per second, or None to send freely until the
+                server's rate-limit headers have been seen
+            burst: Maximum number of requests sent back-to-back
+            safety_margin: Fraction of the advertised limit to actually use
+        """
+        self.safety_margin = safety_margin
+        self._rate = rate
+        self._capacity = float(burst) if burst else max(1.0, rate or 1.0)
+        self._tokens = self._capacity
+        self._window: Optional[float] = None
+        self._blocked_until = 0.0
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self.throttled = 0
+        self.total_wait = 0.0
+    
+    @property
+    def rate(self) -> Optional[float]:
+        """Current refill rate in requests per second (None if unlimited)."""
+        return self._rate
+    
+    def _refill(self, now: float) -> None:
+        # Callers must hold self._lock
+        if self._rate:
+            self._tokens = min(self._capacity, self._tokens + (now - self._updated) * self._rate)
+        self._updated = now
+    
+    def reserve(self) -> float:
+        """
+        Take a token for one request.
+        
+        Returns:
+            Seconds the caller must wait before sending the request
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            delay = 0.0
+            if self._rate:
+                self._tokens -= 1
+                if self._tokens < 0:
+                    delay = -self._tokens / self._rate
+            delay = max(delay, self._blocked_until - now)
+            if delay > 0:
+                self.throttled += 1
+                self.total_wait += delay
+            return delay
+    
+    def acquire(self) -> None:
+        """Block the calling thread until a request may be sent."""
+        delay = self.reserve()
+        if delay > 0:
+            time.sleep(delay)
+    
+    async def acquire_async(self) -> None:
+        """Wait, without blocking the event loop, until a request may be sent."""
+        delay = self.reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+    
+    def block(self, seconds: float) -> None:
+        """
+        Hold back all requests for the given number of seconds.
+        
+        Args:
+            seconds: Pause requested by the server (e.g. from Retry-After)
+        """
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+    
+    def update_from_headers(self, headers: Mapping[str, str]) -> None:
+        """
+        Adjust the bucket from X-RateLimit-* response headers.
+        
+        Args:
+            headers: Response headers (case-insensitive mapping)
+        """
+        limit = _header_int(headers, "X-RateLimit-Limit")
+        remaining = _header_int(headers, "X-RateLimit-Remaining")
+        reset = _header_float(headers, "X-RateLimit-Reset")
+        if limit is None and remaining is None:
+            return
+        
+        # Some servers send an epoch timestamp rather than a delta
+        if reset is not None and reset > 1e9:
+            reset = max(0.0, reset - time.time())
+        
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            if limit and reset:
+                # The longest reset seen is the best estimate of the window length
+                self._window = max(self._window or 0.0, reset)
+                self._rate = max(limit * self.safety_margin / self._window, 1e-3)
+                self._capacity = max(1.0, limit * self.safety_margin)
+            if remaining is not None:
+                self._tokens = min(self._tokens, remaining * self.safety_margin)
+                if remaining <= 0 and reset:
+                    self._blocked_until = max(self._blocked_until, now + reset)
+
+
+@dataclass
+class _CacheEntry:
+    operation: str
+    endpoint: str
+    params: Dict[str, Any]
+    response: ApiResponse
+    expires: float
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+
+class ResponseCache:
+    """
+    In-memory LRU cache for the client's read endpoints.
+    
+    Entries are keyed by operation, endpoint and query parameters, bounded by
+    ``max_entries`` (least recently used entries are evicted first) and expire
+    after a per-operation TTL. Expired entries that carried an ETag or
+    Last-Modified header are revalidated with If-None-Match/If-Modified-Since,
+    so an unchanged resource costs a 304 instead of a full body. The client
+    invalidates affected entries when update/delete/add calls succeed.
+    
+    Cached ApiResponse data is shared between callers; treat it as read-only.
+    
+    Example usage:
+    ```python
+    cache = ResponseCache(max_entries=5000, ttls={"get_dashboard_stats": 5})
+    client = MazalbotClient(user_id=123, cache=cache)
+    client.get_dashboard_stats()  # network
+    client.get_dashboard_stats()  # served from cache
+    print(cache.stats())
+    ```
+    """
+    
+    DEFAULT_TTLS: Dict[str, float] = {
+        "get_diamond": 60.0,
+        "get_report": 300.0,
+        "get_dashboard_stats": 10.0,
+        "get_inventory_by_shape": 30.0,
+        "get_recent_sales": 10.0
+    }
+    
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        ttls: Optional[Dict[str, float]] = None
+    ):
+        """
+        Initialize the cache.
+        
+        Args:
+            max_entries: Maximum number of cached responses
+            ttls: Per-operation TTLs in seconds, merged over DEFAULT_TTLS.
+                A TTL of 0 disables caching for that operation.
+        """
+        self.max_entries = max_entries
+        self.ttls = {**self.DEFAULT_TTLS, **(ttls or {})}
+        self._entries: "OrderedDict[Tuple[Any, ...], _CacheEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = {
+            "hits": 0,
+            "misses": 0,
+            "revalidations": 0,
+            "evictions": 0,
+            "invalidations": 0
+        }
+    
+    def ttl_for(self, operation: Optional[str]) -> float:
+        """
+        Get the TTL for an operation.
+        
+        Args:
+            operation: Client operation name (e.g. "get_diamond")
+            
+        Returns:
+            TTL in seconds; 0 if the operation is not cached
+        """
+        if operation is None:
+            return 0.0
+        return self.ttls.get(operation, 0.0)
+    
+    @staticmethod
+    def make_key(operation: str, endpoint: str, params: Dict[str, Any]) -> Tuple[Any, ...]:
+        return (operation, endpoint, tuple(sorted((key, str(value)) for key, value in params.items())))
+    
+    def lookup(self, key: Tuple[Any, ...]) -> Tuple[Optional[ApiResponse], Optional[_CacheEntry]]:
+        """
+        Look up a cached response.
+        
+        Args:
+            key: Key from make_key
+            
+        Returns:
+            Tuple of (fresh response or None, stale entry usable for
+            revalidation or None)
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._counters["misses"] += 1
+                return None, None
+            
+            self._entries.move_to_end(key)
+            if entry.expires > time.monotonic():
+                self._counters["hits"] += 1
+                return replace(entry.response), None
+            
+            self._counters["misses"] += 1
+            if entry.etag is None and entry.last_modified is None:
+                del self._entries[key]
+                return None, None
+            return None, entry
+    
+    def store(
+        self,
+        key: Tuple[Any, ...],
+        params: Dict[str, Any],
+        response: ApiResponse,
+        ttl: float
+    ) -> None:
+        """
+        Cache a successful response.
+        
+        Args:
+            key: Key from make_key
+            params: Query parameters of the request (used for invalidation)
+            response: Response to cache
+            ttl: Time to live in seconds
+        """
+        entry = _CacheEntry(
+            operation=key[0],
+            endpoint=key[1],
+            params=dict(params),
+            response=response,
+            expires=time.monotonic() + ttl,
+            etag=response.headers.get("ETag"),
+            last_modified=response.headers.get("Last-Modified")
+        )
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._counters["evictions"] += 1
+    
+    def refresh(self, key: Tuple[Any, ...], entry: _CacheEntry, ttl: float) -> ApiResponse:
+        """
+        Extend a stale entry after the server answered 304 Not Modified.
+        
+        Args:
+            key: Key from make_key
+            entry: The stale entry that was revalidated
+            ttl: Time to live in seconds
+            
+        Returns:
+            The cached response
+        """
+        with self._lock:
+            entry.expires = time.monotonic() + ttl
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            self._counters["revalidations"] += 1
+        return replace(entry.response)
+    
+    def invalidate(
+        self,
+        operation: Optional[str] = None,
+        endpoint: Optional[str] = None,
+        **params: Any
+    ) -> int:
+        """
+        Drop cached entries matching all of the given conditions.
+        
+        Args:
+            operation: Only drop entries for this operation
+            endpoint: Only drop entries for this endpoint
+            **params: Only drop entries whose query parameters have these values
+            
+        Returns:
+            Number of entries dropped
+        """
+        return self.invalidate_where(
+            lambda entry: (operation is None or entry.operation == operation)
+            and (endpoint is None or entry.endpoint == endpoint)
+            and all(str(entry.params.get(name)) == str(value) for name, value in params.items())
+        )
+    
+    def invalidate_where(self, predicate: Callable[[_CacheEntry], bool]) -> int:
+        """
+        Drop every cached entry for which predicate returns True.
+        
+        The entries are scanned once under the lock, so several conditions
+        combined into one predicate cost a single pass over the cache.
+        
+        Args:
+            predicate: Callable receiving a cache entry
+            
+        Returns:
+            Number of entries dropped
+        """
+        with self._lock:
+            stale = [key for key, entry in self._entries.items() if predicate(entry)]
+            for key in stale:
+                del self._entries[key]
+            self._counters["invalidations"] += len(stale)
+            return len(stale)
+    
+    def clear(self) -> None:
+        """Drop every cached entry."""
+        with self._lock:
+            self._counters["invalidations"] += len(self._entries)
+            self._entries.clear()
+    
+    def stats(self) -> Dict[str, int]:
+        """
+        Get cache counters.
+        
+        Returns:
+            Dict with hits, misses, revalidations, evictions, invalidations and
+            the current number of entries
+        """
+        with self._lock:
+            return {**self._counters, "entries": len(self._entries)}
+
+
+class SingleFlight:
+    """
+    Request coalescing for identical concurrent reads.
+    
+    While a GET is in flight, identical GETs (same endpoint and query
+    parameters, from clients with the same base URL and token) wait for it
+    and receive the same ApiResponse instead of sending their own request.
+    A read that starts after the first one has finished sends a new request;
+    combine with ResponseCache to also reuse recent responses.
+    
+    Works for threads (do) and asyncio callers (do_async); a thread and a
+    coroutine asking for the same read at once do not share a request.
+    Shared ApiResponse data is shared between callers; treat it as read-only.
+    
+    Example usage:
+    ```python
+    flights = SingleFlight()
+    client = MazalbotClient(user_id=123, single_flight=flights)
+    with ThreadPoolExecutor(max_workers=50) as executor:
+        list(executor.map(lambda _: client.get_dashboard_stats(), range(50)))
+    print(flights.stats())  # e.g. {"requests": 1, "saved": 49, "in_flight": 0}
+    ```
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Tuple[Any, ...], Future] = {}
+        self._tasks: Dict[Tuple[Any, ...], "asyncio.Future[ApiResponse]"] = {}
+        self._counters = {"requests": 0, "saved": 0}
+    
+    @staticmethod
+    def make_key(scope: Tuple[Any, ...], endpoint: str, params: Dict[str, Any]) -> Tuple[Any, ...]:
+        return (scope, endpoint, tuple(sorted((key, str(value)) for key, value in params.items())))
+    
+    def do(self, key: Tuple[Any, ...], call: Callable[[], ApiResponse]) -> ApiResponse:
+        """
+        Run call(), or wait for the identical call already in flight.
+        
+        Args:
+            key: Key from make_key
+            call: Sends the request
+            
+        Returns:
+            The ApiResponse of the request that was sent
+        """
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+                self._counters["requests"] += 1
+            else:
+                self._counters["saved"] += 1
+        if not leader:
+            return future.result()
+        
+        try:
+            response = call()
+        except BaseException as e:
+            with self._lock:
+                del self._calls[key]
+            future.set_exception(e)
+            raise
+        # Forget the call before publishing it, so later reads send a fresh request
+        with self._lock:
+            del self._calls[key]
+        future.set_result(response)
+        return response
+    
+    async def do_async(self, key: Tuple[Any, ...], call: Callable[[], Awaitable[ApiResponse]]) -> ApiResponse:
+        """
+        Await call(), or the identical call already in flight on this loop.
+        
+        The request runs in its own task, so a caller that is cancelled does
+        not cancel it for the others.
+        
+        Args:
+            key: Key from make_key
+            call: Coroutine function that sends the request
+            
+        Returns:
+            The ApiResponse of the request that was sent
+        """
+        key = (id(asyncio.get_running_loop()),) + key
+        
+        async def run() -> ApiResponse:
+            try:
+                return await call()
+            finally:
+                with self._lock:
+                    self._tasks.pop(key, None)
+        
+        with self._lock:
+            task = self._tasks.get(key)
+            if task is None:
+                task = self._tasks[key] = asyncio.ensure_future(run())
+                # Retrieve the outcome even if every caller was cancelled
+                task.add_done_callback(lambda done: done.cancelled() or done.exception())
+                self._counters["requests"] += 1
+            else:
+                self._counters["saved"] += 1
+        return await asyncio.shield(task)
+    
+    def stats(self) -> Dict[str, int]:
+        """
+        Get coalescing counters.
+        
+        Returns:
+            Dict with requests (sent), saved (reads served by another
+            caller's request) and the number of requests in flight
+        """
+        with self._lock:
+            return {**self._counters, "in_flight": len(self._calls) + len(self._tasks)}
+    
+    def reset_stats(self) -> None:
+        """Reset the requests and saved counters"""
+        with self._lock:
+            self._counters = {"requests": 0, "saved": 0}
 
 
 class MazalbotClient:
@@ -82,9 +1746,18 @@ class MazalbotClient:
     response = client.delete_diamond("diamond_id_here")
     if response.success:
         print("Diamond deleted successfully")
+    
+    # Release pooled connections when done (or use the client as a
+    # context manager: ``with MazalbotClient(...) as client:``)
+    client.close()
     ```
     """
     
+    # Bulk write endpoints tried by update_diamonds/delete_diamonds before
+    # falling back to one request per stone; None always fans out
+    BULK_UPDATE_ENDPOINT: Optional[str] = "/api/v1/update_diamonds"
+    BULK_DELETE_ENDPOINT: Optional[str] = "/api/v1/delete_diamonds"
+    
     def __init__(
         self, 
         base_url: str = "https://api.mazalbot.com", 
@@ -93,7 +1766,16 @@ class MazalbotClient:
         max_retries: int = 3,
         retry_delay: float = 1.0,
         timeout: int = 30,
-        log_level: str = "INFO"
+        log_level: Optional[str] = None,
+        pool: Optional[Transport] = None,
+        pool_size: int = 10,
+        pool_block: bool = False,
+        rate_limiter: Optional[RateLimiter] = None,
+        cache: Optional[ResponseCache] = None,
+        codec: Optional[JsonCodec] = None,
+        hooks: Optional[RequestHooks] = None,
+        request_stats: Optional[RequestStats] = None,
+        single_flight: Optional[SingleFlight] = None
     ):
         """
         Initialize the Mazalbot API client.
@@ -105,7 +1787,26 @@ class MazalbotClient:
             max_retries: Maximum number of retry attempts for failed requests
             retry_delay: Delay between retry attempts in seconds
             timeout: Request timeout in seconds
-            log_level: Logging level (DEBUG, INFO, WARNING, ERROR, CRITICAL)
+            log_level: Logging level (DEBUG, INFO, WARNING, ERROR, CRITICAL) for
+                the shared "mazalbot_client" logger. If omitted, the level is
+                left as configured (INFO the first time a client is created).
+            pool: Shared ConnectionPool (or other Transport) to send requests
+                through. If omitted, the client creates and owns a private pool.
+            pool_size: Connections kept open per host for a private pool
+            pool_block: Cap a private pool at pool_size connections per host
+            rate_limiter: Shared RateLimiter for clients using the same API key.
+                If omitted, the client paces itself with a private limiter.
+            cache: Optional ResponseCache for get_diamond, get_report and the
+                dashboard endpoints
+            codec: JSON codec for request and response bodies. If omitted,
+                orjson is used when installed, otherwise the stdlib json module.
+            hooks: RequestHooks registry to share with other clients. If omitted,
+                the client has its own (see add_request_hook).
+            request_stats: RequestStats to record into, e.g. one shared by several
+                clients. If omitted, the client keeps its own (see stats()).
+            single_flight: Optional SingleFlight that lets identical concurrent
+                GET requests share one HTTP request; may be shared by several
+                clients
         """
         self.base_url = base_url.rstrip('/')
         self.access_token = access_token
@@ -114,25 +1815,42 @@ class MazalbotClient:
         self.retry_delay = retry_delay
         self.timeout = timeout
         
-        # Set up logging
-        self.logger = logging.getLogger("mazalbot_client")
-        log_level_map = {
-            "DEBUG": logging.DEBUG,
-            "INFO": logging.INFO,
-            "WARNING": logging.WARNING,
-            "ERROR": logging.ERROR,
-            "CRITICAL": logging.CRITICAL
-        }
-        self.logger.setLevel(log_level_map.get(log_level, logging.INFO))
+        # Reuse connections across requests; only close pools we created
+        self._owns_pool = pool is None
+        self.pool = pool if pool is not None else ConnectionPool(
+            pool_size=pool_size,
+            block=pool_block
+        )
+        self.rate_limiter = rate_limiter if rate_limiter is not None else RateLimiter()
+        self.cache = cache
+        self.single_flight = single_flight
+        self.codec = codec if codec is not None else _DEFAULT_CODEC
+        self._write_listeners: List[Callable[[WriteEvent], None]] = []
+        # Bulk endpoint -> whether the server has it, learned on first use
+        self._bulk_endpoints: Dict[str, bool] = {}
         
-        # Create console handler if none exists
-        if not self.logger.handlers:
-            handler = logging.StreamHandler()
-            formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-            handler.setFormatter(formatter)
-            self.logger.addHandler(handler)
+        self.hooks = hooks if hooks is not None else RequestHooks()
+        self.request_stats = request_stats if request_stats is not None else RequestStats()
+        
+        # Set up logging
+        self.logger = _configure_logger(log_level)
+        self.logger.info("Initialized Mazalbot client with base URL: %s", self.base_url)
+    
+    def close(self) -> None:
+        """
+        Release the client's connections.
         
-        self.logger.info(f"Initialized Mazalbot client with base URL: {self.base_url}")
+        A shared pool passed in via the ``pool`` argument is left open so
+        other clients can keep using it; close it separately when done.
+        """
+        if self._owns_pool:
+            self.pool.close()
+    
+    def __enter__(self) -> "MazalbotClient":
+        return self
+    
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
     
     def _get_headers(self) -> Dict[str, str]:
         """
@@ -152,25 +1870,29 @@ class MazalbotClient:
         method: Literal["GET", "POST", "PUT", "DELETE"], 
         endpoint: str, 
         params: Optional[Dict[str, Any]] = None,
-        data: Optional[Dict[str, Any]] = None,
-        retry_on_codes: List[int] = [429, 500, 502, 503, 504]
+        data: Optional[Union[Dict[str, Any], bytes]] = None,
+        retry_on_codes: List[int] = [429, 500, 502, 503, 504],
+        operation: Optional[str] = None
     ) -> ApiResponse:
         """
         Make an HTTP request to the API with retry logic.
         
+        With a SingleFlight, a GET identical to one already in flight waits
+        for it and returns the same response.
+        
         Args:
             method: HTTP method (GET, POST, PUT, DELETE)
             endpoint: API endpoint (without base URL)
             params: Query parameters
-            data: Request body data
+            data: Request body data, or a body already encoded with the
+                client's codec
             retry_on_codes: HTTP status codes that should trigger a retry
+            operation: Name of the client method making the request, used to
+                look up cache TTLs
             
         Returns:
             ApiResponse object with standardized response data
         """
-        url = urljoin(self.base_url, endpoint.lstrip('/'))
-        headers = self._get_headers()
-        
         # Add user_id to params if not present and available
         if params is None:
             params = {}
@@ -178,76 +1900,211 @@ class MazalbotClient:
         if self.user_id is not None and 'user_id' not in params:
             params['user_id'] = self.user_id
         
-        self.logger.debug(f"Making {method} request to {url}")
-        self.logger.debug(f"Params: {params}")
-        if data:
-            self.logger.debug(f"Data: {json.dumps(data, default=str)[:500]}...")
+        if self.single_flight is None or method != "GET" or data is not None:
+            return self._send_request(method, endpoint, params, data, retry_on_codes, operation)
+        key = self.single_flight.make_key((self.base_url, self.access_token), endpoint, params)
+        return self.single_flight.do(
+            key, lambda: self._send_request(method, endpoint, params, data, retry_on_codes, operation)
+        )
+    
+    def _send_request(
+        self,
+        method: Literal["GET", "POST", "PUT", "DELETE"],
+        endpoint: str,
+        params: Dict[str, Any],
+        data: Optional[Union[Dict[str, Any], bytes]],
+        retry_on_codes: List[int],
+        operation: Optional[str],
+        stream: bool = False
+    ) -> ApiResponse:
+        """
+        Send a request, with the cache and retries (see _make_request).
+        
+        With stream=True the cache is bypassed and a successful response's
+        body is left unread: the ApiResponse's data is the open
+        requests.Response, which the caller must close. Its size is taken
+        from Content-Length for the statistics and hooks.
+        """
+        url = urljoin(self.base_url, endpoint.lstrip('/'))
+        headers = self._get_headers()
+        
+        # Encode the body once; the same bytes are sent on every attempt and logged
+        body = None
+        if data is not None:
+            body = data if isinstance(data, (bytes, bytearray)) else self.codec.dumps(data)
+        
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug("Making %s request to %s", method, url)
+            self.logger.debug("Params: %s", params)
+            if body:
+                self.logger.debug("Data: %s...", body[:500].decode("utf-8", errors="replace"))
+        
+        # Serve fresh cached reads; revalidate stale ones conditionally
+        cache_key = None
+        stale_entry = None
+        cache_ttl = self.cache.ttl_for(operation) if self.cache is not None and method == "GET" and not stream else 0.0
+        if cache_ttl > 0:
+            cache_key = self.cache.make_key(operation, endpoint, params)
+            cached, stale_entry = self.cache.lookup(cache_key)
+            if cached is not None:
+                self.logger.debug("Cache hit for %s", operation)
+                return cached
+            if stale_entry is not None:
+                headers = dict(headers)
+                if stale_entry.etag:
+                    headers["If-None-Match"] = stale_entry.etag
+                if stale_entry.last_modified:
+                    headers["If-Modified-Since"] = stale_entry.last_modified
+        
+        # Hooks are looked up once; with none registered no events are built
+        hooks = self.hooks if self.hooks.active else None
+        route = endpoint_route(endpoint)
+        bytes_sent = len(body) if body else 0
         
         attempts = 0
         while attempts < self.max_retries:
+            if hooks is not None and hooks.wants("request"):
+                hooks.emit(RequestEvent(
+                    "request", method, endpoint, route, attempts + 1, operation,
+                    bytes_sent=bytes_sent
+                ))
+            # True until a response or network error closes the attempt for hooks
+            attempt_open = True
             try:
-                response = requests.request(
+                self.rate_limiter.acquire()
+                started = time.perf_counter()
+                response = self.pool.request(
                     method=method,
                     url=url,
                     headers=headers,
                     params=params,
-                    json=data,
-                    timeout=self.timeout
+                    data=body,
+                    timeout=self.timeout,
+                    stream=stream
+                )
+                latency = time.perf_counter() - started
+                self.rate_limiter.update_from_headers(response.headers)
+                if stream:
+                    bytes_received = int(response.headers.get("Content-Length") or 0)
+                else:
+                    bytes_received = len(response.content)
+                self.request_stats.record_response(
+                    method, route, response.status_code, latency, bytes_sent, bytes_received
                 )
                 
-                # Try to parse JSON response
-                try:
-                    response_data = response.json()
-                except (json.JSONDecodeError, ValueError):
-                    response_data = {"message": response.text}
+                attempt_open = False
+                if hooks is not None and hooks.wants("response"):
+                    hooks.emit(RequestEvent(
+                        "response", method, endpoint, route, attempts + 1, operation,
+                        status_code=response.status_code,
+                        bytes_sent=bytes_sent,
+                        bytes_received=bytes_received,
+                        latency=latency
+                    ))
+                
+                if response.status_code == 304 and stale_entry is not None:
+                    self.logger.debug("Cache revalidated for %s", operation)
+                    return self.cache.refresh(cache_key, stale_entry, cache_ttl)
                 
-                # Check if response was successful
-                if response.status_code < 400:
-                    self.logger.debug(f"Request successful: {response.status_code}")
+                if stream and response.status_code < 400:
+                    self.logger.debug("Request successful: %s (streaming)", response.status_code)
                     return ApiResponse(
                         success=True,
-                        data=response_data.get("data", response_data),
+                        data=response,
                         status_code=response.status_code,
-                        message=response_data.get("message")
+                        headers=response.headers
                     )
                 
+                # Error bodies are small, so a streamed one is read in full
+                response_data = _parse_response_body(response.content, self.codec)
+                
+                # Check if response was successful
+                if response.status_code < 400:
+                    self.logger.debug("Request successful: %s", response.status_code)
+                    api_response = _build_api_response(response.status_code, response_data, response.headers)
+                    if cache_key is not None:
+                        self.cache.store(cache_key, params, api_response, cache_ttl)
+                    return api_response
+                
                 # Check if we should retry
                 if response.status_code in retry_on_codes and attempts < self.max_retries - 1:
                     attempts += 1
-                    retry_time = self.retry_delay * (2 ** attempts)  # Exponential backoff
+                    retry_after = _retry_after_seconds(response.headers)
+                    if retry_after is not None:
+                        retry_time = retry_after
+                    else:
+                        retry_time = self.retry_delay * (2 ** attempts)  # Exponential backoff
+                    if response.status_code == 429:
+                        # Hold back every caller sharing the limiter, not just this one
+                        self.rate_limiter.block(retry_time)
                     self.logger.warning(
-                        f"Request failed with status {response.status_code}. "
-                        f"Retrying in {retry_time:.2f}s ({attempts}/{self.max_retries})"
+                        "Request failed with status %s. Retrying in %.2fs (%d/%d)",
+                        response.status_code, retry_time, attempts, self.max_retries
                     )
+                    self.request_stats.record_retry(method, route)
+                    if hooks is not None and hooks.wants("retry"):
+                        hooks.emit(RequestEvent(
+                            "retry", method, endpoint, route, attempts, operation,
+                            status_code=response.status_code,
+                            retry_in=retry_time
+                        ))
                     time.sleep(retry_time)
                     continue
                 
                 # Request failed and we're not retrying
-                error_message = response_data.get("error", response_data.get("message", f"HTTP {response.status_code}"))
-                self.logger.error(f"Request failed: {response.status_code} - {error_message}")
-                return ApiResponse(
-                    success=False,
-                    error=error_message,
-                    status_code=response.status_code
-                )
+                api_response = _build_api_response(response.status_code, response_data, response.headers)
+                self.logger.error("Request failed: %s - %s", response.status_code, api_response.error)
+                if hooks is not None and hooks.wants("error"):
+                    hooks.emit(RequestEvent(
+                        "error", method, endpoint, route, attempts + 1, operation,
+                        status_code=response.status_code,
+                        error=api_response.error
+                    ))
+                return api_response
                 
             except requests.RequestException as e:
                 # Network-related error
+                self.request_stats.record_network_error(method, route, bytes_sent)
+                attempt_open = False
                 attempts += 1
                 if attempts < self.max_retries:
                     retry_time = self.retry_delay * (2 ** attempts)
                     self.logger.warning(
-                        f"Request failed with exception: {str(e)}. "
-                        f"Retrying in {retry_time:.2f}s ({attempts}/{self.max_retries})"
+                        "Request failed with exception: %s. Retrying in %.2fs (%d/%d)",
+                        e, retry_time, attempts, self.max_retries
                     )
+                    self.request_stats.record_retry(method, route)
+                    if hooks is not None and hooks.wants("retry"):
+                        hooks.emit(RequestEvent(
+                            "retry", method, endpoint, route, attempts, operation,
+                            retry_in=retry_time,
+                            error=str(e)
+                        ))
                     time.sleep(retry_time)
                 else:
-                    self.logger.error(f"Request failed after {self.max_retries} attempts: {str(e)}")
+                    self.logger.error("Request failed after %d attempts: %s", self.max_retries, e)
+                    if hooks is not None and hooks.wants("error"):
+                        hooks.emit(RequestEvent(
+                            "error", method, endpoint, route, attempts, operation,
+                            status_code=0,
+                            error=f"Network error: {str(e)}"
+                        ))
                     return ApiResponse(
                         success=False,
                         error=f"Network error: {str(e)}",
                         status_code=0
                     )
+                
+            except BaseException as e:
+                # Cancelled, interrupted or an unexpected error: report the failure before
+                # propagating, closing the open attempt (status 0) for in-flight gauges
+                if hooks is not None and hooks.wants("error"):
+                    hooks.emit(RequestEvent(
+                        "error", method, endpoint, route, attempts + 1, operation,
+                        status_code=0 if attempt_open else None,
+                        error=f"Aborted: {e!r}"
+                    ))
+                raise
         
         # This should never be reached, but just in case
         return ApiResponse(
@@ -256,11 +2113,167 @@ class MazalbotClient:
             status_code=0
         )
     
+    def stats(self) -> Dict[str, EndpointStats]:
+        """
+        Get per-endpoint request statistics.
+        
+        Every attempt is counted, including retries; routes have id-like
+        path segments replaced with ``{id}`` (see endpoint_route).
+        
+        Returns:
+            Dictionary mapping "METHOD route" to EndpointStats, latencies in seconds
+        """
+        return self.request_stats.snapshot()
+    
+    def reset_stats(self) -> None:
+        """Discard the request statistics recorded so far"""
+        self.request_stats.reset()
+    
+    def add_request_hook(
+        self,
+        hook: Callable[[RequestEvent], None],
+        kinds: Iterable[str] = REQUEST_HOOK_KINDS
+    ) -> None:
+        """
+        Register a callback for request instrumentation events.
+        
+        Hooks run synchronously on the thread making the request, so keep
+        them cheap; exceptions they raise are logged and ignored.
+        
+        Args:
+            hook: Callable receiving a RequestEvent
+            kinds: Event kinds to receive ("request", "response", "retry", "error")
+        """
+        self.hooks.add(hook, kinds)
+    
+    def remove_request_hook(self, hook: Callable[[RequestEvent], None]) -> None:
+        """
+        Unregister a request hook added with add_request_hook.
+        
+        Args:
+            hook: The callable to remove
+        """
+        self.hooks.remove(hook)
+    
+    def add_write_listener(self, listener: Callable[[WriteEvent], None]) -> None:
+        """
+        Register a callback for successful add, update and delete calls.
+        
+        Listeners run synchronously on the calling thread after the write
+        succeeds; exceptions they raise are logged and otherwise ignored.
+        
+        Args:
+            listener: Callable receiving a WriteEvent
+        """
+        self._write_listeners.append(listener)
+    
+    def remove_write_listener(self, listener: Callable[[WriteEvent], None]) -> None:
+        """
+        Unregister a callback added with add_write_listener.
+        
+        Args:
+            listener: The callable to remove
+        """
+        if listener in self._write_listeners:
+            self._write_listeners.remove(listener)
+    
+    def _after_write(
+        self,
+        operation: Literal["add", "update", "delete"],
+        response: ApiResponse,
+        diamond_id: Optional[str] = None,
+        diamonds: Optional[List[DiamondData]] = None
+    ) -> None:
+        """
+        Drop cached reads made stale by a successful write and notify listeners.
+        
+        Args:
+            operation: Kind of write (add, update or delete)
+            response: The successful ApiResponse
+            diamond_id: ID of the diamond that changed, if known
+            diamonds: Diamond data that was sent
+        """
+        self._invalidate_written([diamond_id] if diamond_id is not None else [])
+        self._notify_write(operation, response, diamond_id, diamonds)
+    
+    def _after_writes(
+        self,
+        operation: Literal["update", "delete"],
+        response: ApiResponse,
+        written: List[Tuple[str, Optional[DiamondData]]]
+    ) -> None:
+        """
+        Like _after_write for several stones written by one request.
+        
+        The cache is scanned once for the whole batch instead of once per
+        stone; listeners still receive one WriteEvent per stone.
+        
+        Args:
+            operation: Kind of write (update or delete)
+            response: The successful ApiResponse
+            written: (diamond id, fields sent) pairs; fields is None for deletes
+        """
+        if not written:
+            return
+        self._invalidate_written([diamond_id for diamond_id, _ in written])
+        for diamond_id, fields in written:
+            self._notify_write(operation, response, diamond_id, [fields] if fields is not None else None)
+    
+    def _invalidate_written(self, diamond_ids: List[str]) -> None:
+        """
+        Drop the cached stones and reports of diamond_ids, and the aggregate
+        reads every write makes stale, in a single pass over the cache.
+        
+        Args:
+            diamond_ids: IDs of the diamonds that changed
+        """
+        if self.cache is None:
+            return
+        endpoints = {f"/api/v1/get_stone/{diamond_id}" for diamond_id in diamond_ids}
+        ids = {str(diamond_id) for diamond_id in diamond_ids}
+        aggregates = ("get_dashboard_stats", "get_inventory_by_shape", "get_recent_sales")
+        self.cache.invalidate_where(
+            lambda entry: entry.operation in aggregates
+            or (entry.operation == "get_diamond" and entry.endpoint in endpoints)
+            or (entry.operation == "get_report" and str(entry.params.get("diamond_id")) in ids)
+        )
+    
+    def _notify_write(
+        self,
+        operation: Literal["add", "update", "delete"],
+        response: ApiResponse,
+        diamond_id: Optional[str],
+        diamonds: Optional[List[DiamondData]]
+    ) -> None:
+        """
+        Send a WriteEvent to every registered write listener.
+        
+        Args:
+            operation: Kind of write (add, update or delete)
+            response: The successful ApiResponse
+            diamond_id: ID of the diamond that changed, if known
+            diamonds: Diamond data that was sent
+        """
+        if not self._write_listeners:
+            return
+        event = WriteEvent(
+            operation=operation,
+            response=response,
+            diamond_id=diamond_id,
+            diamonds=list(diamonds or [])
+        )
+        for listener in list(self._write_listeners):
+            try:
+                listener(event)
+            except Exception:
+                self.logger.exception("Write listener %r failed", listener)
+    
     def get_diamonds(
         self, 
         page: int = 1, 
         limit: int = 100,
-        filters: Optional[Dict[str, Any]] = None
+        filters: Optional[Dict[str, Any]] = None,
+        as_records: bool = False
     ) -> ApiResponse:
         """
         Get diamonds from the inventory with pagination.
@@ -269,6 +2282,7 @@ class MazalbotClient:
             page: Page number (1-based)
             limit: Number of items per page
             filters: Optional filters to apply (shape, color, clarity, etc.)
+            as_records: Return compact DiamondRecord objects instead of dicts
             
         Returns:
             ApiResponse containing the list of diamonds if successful
@@ -290,18 +2304,295 @@ class MazalbotClient:
         if filters:
             params.update(filters)
         
-        return self._make_request(
+        response = self._make_request(
             method="GET",
             endpoint="/api/v1/get_all_stones",
             params=params
         )
+        return _as_records(response) if as_records else response
+    
+    def iter_diamonds(
+        self,
+        filters: Optional[Dict[str, Any]] = None,
+        page_size: int = 100,
+        as_records: bool = False
+    ) -> Iterator[Union[DiamondData, DiamondRecord]]:
+        """
+        Iterate over every diamond in the inventory, one page at a time.
+        
+        The next page is fetched in a background thread while the current
+        one is being consumed, so at most two pages are held in memory
+        regardless of the inventory size. Iteration stops after the page
+        given by the X-Total-Pages header, or at the first short page when
+        the server does not send it.
+        
+        Args:
+            filters: Optional filters to apply (shape, color, clarity, etc.)
+            page_size: Number of diamonds to request per page
+            as_records: Yield compact DiamondRecord objects instead of dicts
+            
+        Yields:
+            DiamondData dictionaries (or DiamondRecords) in server order
+            
+        Raises:
+            MazalbotApiError: If a page request fails
+        """
+        if self.user_id is None:
+            raise MazalbotApiError(ApiResponse(
+                success=False,
+                error="User ID is required for this operation",
+                status_code=400
+            ))
+        
+        executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="mazalbot-prefetch")
+        page = 1
+        pending = executor.submit(self.get_diamonds, page, page_size, filters, as_records)
+        try:
+            while pending is not None:
+                response = pending.result()
+                if not response.success:
+                    raise MazalbotApiError(response)
+                
+                stones = response.data or []
+                total_pages = _header_int(response.headers, "X-Total-Pages")
+                if total_pages is not None:
+                    has_more = page < total_pages
+                else:
+                    # Without pagination headers a full page means there may be more;
+                    # an oversized page means the server ignored the limit
+                    has_more = len(stones) == page_size
+                
+                page += 1
+                pending = executor.submit(self.get_diamonds, page, page_size, filters, as_records) if has_more else None
+                del response
+                
+                yield from stones
+        finally:
+            if pending is not None:
+                pending.cancel()
+            executor.shutdown(wait=False)
+    
+    def stream_diamonds(
+        self,
+        filters: Optional[Dict[str, Any]] = None,
+        chunk_size: int = 64 * 1024
+    ) -> Iterator[DiamondData]:
+        """
+        Stream the unpaginated inventory, decoding stones as they arrive.
+        
+        Sends a single get_all_stones request without page/limit and parses
+        the JSON array incrementally from the socket, so each stone is
+        yielded as soon as its bytes are received and peak memory stays
+        around one stone plus one read chunk instead of the full body, its
+        decoded text and the object tree. Failed responses are retried like
+        any other request; a connection lost mid-body is not retried,
+        because the stones already yielded cannot be taken back.
+        
+        Args:
+            filters: Optional filters to apply (shape, color, clarity, etc.)
+            chunk_size: Number of bytes read from the socket at a time
+            
+        Yields:
+            DiamondData dictionaries in server order
+            
+        Raises:
+            MazalbotApiError: If the request fails or the body is not valid JSON
+        """
+        if self.user_id is None:
+            raise MazalbotApiError(ApiResponse(
+                success=False,
+                error="User ID is required for this operation",
+                status_code=400
+            ))
+        
+        params = {"user_id": self.user_id}
+        if filters:
+            params.update(filters)
+        
+        api_response = self._send_request(
+            "GET", "/api/v1/get_all_stones", params, None, [429, 500, 502, 503, 504], "stream_diamonds",
+            stream=True
+        )
+        if not api_response.success:
+            raise MazalbotApiError(api_response)
+        response = api_response.data
+        
+        decoder = _IncrementalArrayDecoder("data")
+        count = 0
+        try:
+            for chunk in response.iter_content(chunk_size=chunk_size):
+                stones = decoder.feed(chunk)
+                count += len(stones)
+                yield from stones
+            stones = decoder.feed(b"", final=True)
+            count += len(stones)
+            yield from stones
+        except requests.RequestException as e:
+            raise MazalbotApiError(ApiResponse(
+                success=False,
+                error=f"Network error after {count} stones: {str(e)}",
+                status_code=0,
+                headers=response.headers
+            ))
+        except ValueError as e:
+            raise MazalbotApiError(ApiResponse(
+                success=False,
+                error=f"Invalid JSON after {count} stones: {str(e)}",
+                status_code=response.status_code,
+                headers=response.headers
+            ))
+        finally:
+            response.close()
+        
+        if not decoder.found and decoder.extra.get("error"):
+            raise MazalbotApiError(ApiResponse(
+                success=False,
+                error=str(decoder.extra["error"]),
+                status_code=response.status_code,
+                headers=response.headers
+            ))
+        self.logger.debug("Streamed %d diamonds", count)
+    
+    def _fetch_page(
+        self,
+        page: int,
+        page_size: int,
+        filters: Optional[Dict[str, Any]],
+        page_retries: int
+    ) -> Tuple[ApiResponse, PageTiming]:
+        """
+        Fetch one page of diamonds, retrying just that page on failure.
+        
+        Args:
+            page: Page number (1-based)
+            page_size: Number of items per page
+            filters: Optional filters to apply
+            page_retries: Extra attempts for the page after a failed response
+            
+        Returns:
+            Tuple of the last ApiResponse and the page's timing
+        """
+        start = time.perf_counter()
+        attempts = 0
+        while True:
+            attempts += 1
+            response = self.get_diamonds(page=page, limit=page_size, filters=filters)
+            if response.success or attempts > page_retries or response.status_code == 400:
+                break
+            self.logger.warning(
+                "Page %d failed: %s. Retrying (%d/%d)", page, response.error, attempts, page_retries
+            )
+        
+        timing = PageTiming(
+            page=page,
+            elapsed=time.perf_counter() - start,
+            attempts=attempts,
+            count=len(response.data) if response.success and response.data else 0,
+            status_code=response.status_code
+        )
+        return response, timing
+    
+    def fetch_all_diamonds(
+        self,
+        filters: Optional[Dict[str, Any]] = None,
+        page_size: int = 100,
+        workers: int = 8,
+        page_retries: int = 2
+    ) -> BulkFetchResult:
+        """
+        Fetch the whole inventory, requesting pages concurrently.
+        
+        The first page is fetched on its own to read X-Total-Pages (or
+        X-Total-Count); the remaining pages are then fetched by a pool of
+        worker threads and reassembled in page order. A failed page is
+        retried on its own up to page_retries times without restarting the
+        fetch. If the server sends no pagination headers, pages are fetched
+        sequentially until a short page is returned.
+        
+        For best results keep ``workers`` at or below the client's pool_size
+        so every worker reuses a pooled connection.
+        
+        Args:
+            filters: Optional filters to apply (shape, color, clarity, etc.)
+            page_size: Number of diamonds to request per page
+            workers: Number of pages fetched concurrently
+            page_retries: Extra attempts for a page that fails
+            
+        Returns:
+            BulkFetchResult with the diamonds in page order and per-page timings
+        """
+        if self.user_id is None:
+            return BulkFetchResult(success=False, error="User ID is required for this operation")
+        
+        start = time.perf_counter()
+        first, first_timing = self._fetch_page(1, page_size, filters, page_retries)
+        result = BulkFetchResult(success=False, page_timings=[first_timing])
+        if not first.success:
+            result.failed_pages[1] = first
+            result.error = first.error
+            result.elapsed = time.perf_counter() - start
+            return result
+        
+        pages: Dict[int, List[DiamondData]] = {1: first.data or []}
+        result.total_count = _header_int(first.headers, "X-Total-Count")
+        total_pages = _header_int(first.headers, "X-Total-Pages")
+        if total_pages is None and result.total_count is not None:
+            total_pages = max(1, math.ceil(result.total_count / page_size))
+        
+        if total_pages is None:
+            # No pagination headers: walk pages until a short one
+            page = 1
+            while len(pages[page]) == page_size:
+                page += 1
+                response, timing = self._fetch_page(page, page_size, filters, page_retries)
+                result.page_timings.append(timing)
+                if not response.success:
+                    result.failed_pages[page] = response
+                    break
+                pages[page] = response.data or []
+            total_pages = page
+        elif total_pages > 1:
+            with ThreadPoolExecutor(
+                max_workers=max(1, workers),
+                thread_name_prefix="mazalbot-fetch"
+            ) as executor:
+                futures = {
+                    executor.submit(self._fetch_page, page, page_size, filters, page_retries): page
+                    for page in range(2, total_pages + 1)
+                }
+                for future in as_completed(futures):
+                    page = futures[future]
+                    response, timing = future.result()
+                    result.page_timings.append(timing)
+                    if response.success:
+                        pages[page] = response.data or []
+                    else:
+                        result.failed_pages[page] = response
+        
+        result.total_pages = total_pages
+        result.page_timings.sort(key=lambda timing: timing.page)
+        for page in sorted(pages):
+            result.diamonds.extend(pages[page])
+        
+        result.success = not result.failed_pages
+        if result.failed_pages:
+            failed = sorted(result.failed_pages)
+            result.error = f"Failed to fetch {len(failed)} page(s): {failed}"
+        result.elapsed = time.perf_counter() - start
+        
+        self.logger.info(
+            "Fetched %d diamonds in %d pages (%.2fs, %d failed)",
+            len(result.diamonds), result.total_pages, result.elapsed, len(result.failed_pages)
+        )
+        return result
     
-    def get_diamond(self, diamond_id: str) -> ApiResponse:
+    def get_diamond(self, diamond_id: str, as_records: bool = False) -> ApiResponse:
         """
         Get a specific diamond by ID.
         
         Args:
             diamond_id: The ID of the diamond to retrieve
+            as_records: Return a compact DiamondRecord instead of a dict
             
         Returns:
             ApiResponse containing the diamond data if successful
@@ -315,11 +2606,13 @@ class MazalbotClient:
         
         params = {"user_id": self.user_id}
         
-        return self._make_request(
+        response = self._make_request(
             method="GET",
             endpoint=f"/api/v1/get_stone/{diamond_id}",
-            params=params
+            params=params,
+            operation="get_diamond"
         )
+        return _as_records(response) if as_records else response
     
     def add_diamond(self, diamond_data: DiamondData) -> ApiResponse:
         """
@@ -339,8 +2632,7 @@ class MazalbotClient:
             )
         
         # Validate required fields
-        required_fields = ["shape", "weight", "color", "clarity"]
-        missing_fields = [field for field in required_fields if field not in diamond_data]
+        missing_fields = [field for field in REQUIRED_DIAMOND_FIELDS if field not in diamond_data]
         
         if missing_fields:
             return ApiResponse(
@@ -355,11 +2647,14 @@ class MazalbotClient:
             "diamonds": [diamond_data]
         }
         
-        return self._make_request(
+        response = self._make_request(
             method="POST",
             endpoint="/api/v1/upload-inventory",
             data=data
         )
+        if response.success:
+            self._after_write("add", response, diamonds=[diamond_data])
+        return response
     
     def add_diamonds(self, diamonds: List[DiamondData]) -> ApiResponse:
         """
@@ -386,9 +2681,8 @@ class MazalbotClient:
             )
         
         # Validate required fields for each diamond
-        required_fields = ["shape", "weight", "color", "clarity"]
         for i, diamond in enumerate(diamonds):
-            missing_fields = [field for field in required_fields if field not in diamond]
+            missing_fields = [field for field in REQUIRED_DIAMOND_FIELDS if field not in diamond]
             if missing_fields:
                 return ApiResponse(
                     success=False,
@@ -402,11 +2696,230 @@ class MazalbotClient:
             "diamonds": diamonds
         }
         
-        return self._make_request(
+        response = self._make_request(
             method="POST",
             endpoint="/api/v1/upload-inventory",
             data=data
         )
+        if response.success:
+            self._after_write("add", response, diamonds=diamonds)
+        return response
+    
+    def upload_diamonds(
+        self,
+        diamonds: Iterable[DiamondData],
+        chunk_size: int = 500,
+        max_chunk_bytes: int = 1_000_000,
+        concurrency: int = 4,
+        chunk_retries: int = 2,
+        on_items: Optional[Callable[[List[UploadItemResult]], None]] = None
+    ) -> UploadResult:
+        """
+        Upload a large feed of diamonds in concurrent chunks.
+        
+        Diamonds are read lazily from any iterable and grouped into chunks
+        of at most chunk_size stones and roughly max_chunk_bytes of JSON.
+        Up to ``concurrency`` chunks are in flight at once and only a few
+        more are buffered, so the full feed never has to be held in memory.
+        
+        Stones missing required fields are rejected before sending. A chunk
+        the server refuses as too large or unprocessable (413/422) is split
+        in half and resent until the offending stones are isolated and
+        rejected with the server's error, so one bad stone does not sink its
+        neighbours; after six halvings the remaining pieces are rejected
+        whole. A 400 that names the offending stone by index rejects that
+        stone and resends the rest; any other 400 rejects the whole chunk.
+        Other failures retry the chunk on its own up to chunk_retries times.
+        
+        Args:
+            diamonds: Iterable of dictionaries containing diamond data
+            chunk_size: Maximum number of stones per request
+            max_chunk_bytes: Approximate maximum JSON size of one request
+            concurrency: Number of chunks uploaded concurrently
+            chunk_retries: Extra attempts for a chunk that fails
+            on_items: Called on the calling thread with the items of each
+                finished chunk (and of each stone rejected before sending).
+                Accepted items are then not kept in the result, so memory
+                stays flat however long the feed is
+            
+        Returns:
+            UploadResult with one UploadItemResult per input stone, in input
+            order; with on_items, only the stones that were not accepted
+        """
+        if self.user_id is None:
+            return UploadResult(success=False, error="User ID is required for this operation")
+        
+        start = time.perf_counter()
+        result = UploadResult(success=False)
+        counter = {"requests": 0}
+        counter_lock = threading.Lock()
+        pending: set = set()
+        
+        def finish(items: List[UploadItemResult]) -> None:
+            if on_items is None:
+                result.items.extend(items)
+                return
+            on_items(items)
+            for item in items:
+                if item.status != "accepted":
+                    result.items.append(item)
+                else:
+                    result.unlisted += 1
+                    result.unlisted_retried += item.retried
+        
+        def collect(done: Iterable[Future]) -> None:
+            for future in done:
+                pending.discard(future)
+                finish(future.result())
+        
+        with ThreadPoolExecutor(
+            max_workers=max(1, concurrency),
+            thread_name_prefix="mazalbot-upload"
+        ) as executor:
+            chunk: List[Tuple[int, DiamondData, bytes]] = []
+            chunk_bytes = 0
+            
+            def submit() -> None:
+                result.chunks += 1
+                pending.add(executor.submit(
+                    self._upload_chunk, chunk, chunk_retries, counter, counter_lock
+                ))
+                # Back-pressure: stop reading the feed while the pool is saturated
+                while len(pending) >= 2 * max(1, concurrency):
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    collect(done)
+            
+            for index, diamond in enumerate(diamonds):
+                missing_fields = [name for name in REQUIRED_DIAMOND_FIELDS if name not in diamond]
+                if missing_fields:
+                    finish([UploadItemResult(
+                        index=index,
+                        status="rejected",
+                        stock_number=diamond.get("stock_number"),
+                        reason=f"Missing required fields: {', '.join(missing_fields)}",
+                        attempts=0
+                    )])
+                    continue
+                
+                # Each stone is encoded once; chunk bodies are spliced from these bytes
+                encoded = self.codec.dumps(diamond)
+                if chunk and (len(chunk) >= chunk_size or chunk_bytes + len(encoded) + 1 > max_chunk_bytes):
+                    submit()
+                    chunk, chunk_bytes = [], 0
+                chunk.append((index, diamond, encoded))
+                chunk_bytes += len(encoded) + 1
+            if chunk:
+                submit()
+            collect(list(pending))
+        
+        result.items.sort(key=lambda item: item.index)
+        result.requests = counter["requests"]
+        result.success = result.total > 0 and result.accepted == result.total
+        if not result.total:
+            result.error = "No diamonds provided"
+        elif not result.success:
+            result.error = (
+                f"{result.rejected} diamond(s) rejected, {result.failed} failed "
+                f"out of {result.total}"
+            )
+        result.elapsed = time.perf_counter() - start
+        
+        self.logger.info(
+            "Uploaded %d/%d diamonds in %d chunks (%d requests, %.2fs)",
+            result.accepted, result.total, result.chunks, result.requests, result.elapsed
+        )
+        return result
+    
+    def _upload_chunk(
+        self,
+        chunk: List[Tuple[int, DiamondData, bytes]],
+        chunk_retries: int,
+        counter: Dict[str, int],
+        counter_lock: threading.Lock,
+        depth: int = 0
+    ) -> List[UploadItemResult]:
+        """
+        Upload one chunk, splitting it on content errors and retrying it on others.
+        
+        Args:
+            chunk: (input index, diamond, encoded diamond) triples to upload
+            chunk_retries: Extra attempts for the chunk after a failed response
+            counter: Shared request counter
+            counter_lock: Lock guarding counter
+            depth: Number of halvings that produced this chunk
+            
+        Returns:
+            One UploadItemResult per stone in the chunk
+        """
+        chunk = list(chunk)
+        rejected: List[UploadItemResult] = []
+        body = None
+        attempts = 0
+        retries = 0
+        while True:
+            if body is None:
+                body = b"".join((
+                    b'{"user_id":',
+                    self.codec.dumps(self.user_id),
+                    b',"diamonds":[',
+                    b",".join(encoded for _, _, encoded in chunk),
+                    b"]}"
+                ))
+            attempts += 1
+            with counter_lock:
+                counter["requests"] += 1
+            response = self._make_request(
+                method="POST",
+                endpoint="/api/v1/upload-inventory",
+                data=body
+            )
+            if response.success:
+                self._after_write("add", response, diamonds=[diamond for _, diamond, _ in chunk])
+                return rejected + [
+                    UploadItemResult(index, "accepted", diamond.get("stock_number"), attempts=attempts)
+                    for index, diamond, _ in chunk
+                ]
+            
+            if response.status_code == 400:
+                # A 400 naming one stone rejects just that stone; any other 400 rejects the chunk
+                culprit = _named_stone_index(response.error, len(chunk))
+                if culprit is None or len(chunk) == 1:
+                    return rejected + [
+                        UploadItemResult(index, "rejected", diamond.get("stock_number"), response.error, attempts)
+                        for index, diamond, _ in chunk
+                    ]
+                index, diamond, _ = chunk.pop(culprit)
+                rejected.append(UploadItemResult(index, "rejected", diamond.get("stock_number"), response.error, attempts))
+                body = None
+                continue
+            
+            if response.status_code in _SPLIT_ON_CODES:
+                if len(chunk) == 1 or depth >= _MAX_SPLIT_DEPTH:
+                    return rejected + [
+                        UploadItemResult(index, "rejected", diamond.get("stock_number"), response.error, attempts)
+                        for index, diamond, _ in chunk
+                    ]
+                middle = len(chunk) // 2
+                self.logger.debug("Chunk of %d refused (%s); splitting", len(chunk), response.status_code)
+                items = rejected
+                for half in (chunk[:middle], chunk[middle:]):
+                    for item in self._upload_chunk(half, chunk_retries, counter, counter_lock, depth + 1):
+                        item.attempts += attempts
+                        items.append(item)
+                return items
+            
+            retries += 1
+            if retries > chunk_retries:
+                return rejected + [
+                    UploadItemResult(index, "failed", diamond.get("stock_number"), response.error, attempts)
+                    for index, diamond, _ in chunk
+                ]
+            retry_time = self.retry_delay * (2 ** retries)
+            self.logger.warning(
+                "Chunk of %d failed: %s. Retrying in %.2fs (%d/%d)",
+                len(chunk), response.error, retry_time, retries, chunk_retries
+            )
+            time.sleep(retry_time)
     
     def update_diamond(self, diamond_id: str, diamond_data: DiamondData) -> ApiResponse:
         """
@@ -432,11 +2945,14 @@ class MazalbotClient:
             **diamond_data
         }
         
-        return self._make_request(
+        response = self._make_request(
             method="PUT",
             endpoint=f"/api/v1/update_diamond/{diamond_id}",
             data=data
         )
+        if response.success:
+            self._after_write("update", response, diamond_id=diamond_id, diamonds=[diamond_data])
+        return response
     
     def delete_diamond(self, diamond_id: str) -> ApiResponse:
         """
@@ -457,11 +2973,301 @@ class MazalbotClient:
         
         params = {"user_id": self.user_id}
         
-        return self._make_request(
+        response = self._make_request(
             method="DELETE",
             endpoint=f"/api/v1/delete_diamond",
             params={"diamond_id": diamond_id, "user_id": self.user_id}
         )
+        if response.success:
+            self._after_write("delete", response, diamond_id=diamond_id)
+        return response
+    
+    def update_diamonds(
+        self,
+        updates: Union[Mapping[str, DiamondData], Iterable[Tuple[str, DiamondData]]],
+        concurrency: int = 8,
+        chunk_size: int = 500,
+        dry_run: bool = False,
+        max_failures: Optional[int] = None
+    ) -> BatchResult:
+        """
+        Update many diamonds.
+        
+        Updates are sent in chunks to BULK_UPDATE_ENDPOINT when the server
+        has it; otherwise (or for a chunk the server refuses as invalid)
+        each stone is sent to update_diamond by a pool of ``concurrency``
+        threads, paced by the client's rate limiter.
+        
+        Args:
+            updates: Mapping of diamond id to the fields to change, or
+                (diamond id, fields) pairs
+            concurrency: Number of requests in flight at once
+            chunk_size: Stones per bulk request
+            dry_run: Only validate the input; nothing is sent
+            max_failures: Abort once more than this many stones have failed;
+                stones not yet sent are reported as skipped
+                
+        Returns:
+            BatchResult with one BatchItemResult per input pair, in input order
+        """
+        pairs = list(updates.items()) if isinstance(updates, Mapping) else list(updates)
+        return self._batch_write("update", pairs, concurrency, chunk_size, dry_run, max_failures)
+    
+    def delete_diamonds(
+        self,
+        diamond_ids: Iterable[str],
+        concurrency: int = 8,
+        chunk_size: int = 500,
+        dry_run: bool = False,
+        max_failures: Optional[int] = None
+    ) -> BatchResult:
+        """
+        Delete many diamonds.
+        
+        Works like update_diamonds, using BULK_DELETE_ENDPOINT or falling
+        back to delete_diamond per stone.
+        
+        Args:
+            diamond_ids: IDs of the diamonds to delete
+            concurrency: Number of requests in flight at once
+            chunk_size: Stones per bulk request
+            dry_run: Only validate the input; nothing is sent
+            max_failures: Abort once more than this many stones have failed
+            
+        Returns:
+            BatchResult with one BatchItemResult per input id, in input order
+        """
+        pairs = [(diamond_id, None) for diamond_id in diamond_ids]
+        return self._batch_write("delete", pairs, concurrency, chunk_size, dry_run, max_failures)
+    
+    def _batch_write(
+        self,
+        operation: Literal["update", "delete"],
+        pairs: List[Tuple[str, Optional[DiamondData]]],
+        concurrency: int,
+        chunk_size: int,
+        dry_run: bool,
+        max_failures: Optional[int]
+    ) -> BatchResult:
+        """
+        Shared implementation of update_diamonds and delete_diamonds.
+        
+        Args:
+            operation: "update" or "delete"
+            pairs: (diamond id, fields) pairs; fields is None for deletes
+            concurrency: Number of requests in flight at once
+            chunk_size: Stones per bulk request
+            dry_run: Only validate the input
+            max_failures: Abort once more than this many stones have failed
+            
+        Returns:
+            BatchResult in input order
+        """
+        result = BatchResult(success=False, operation=operation, dry_run=dry_run)
+        if self.user_id is None:
+            result.error = "User ID is required for this operation"
+            return result
+        
+        start = time.perf_counter()
+        items: List[Optional[BatchItemResult]] = [None] * len(pairs)
+        work: List[Tuple[int, str, Optional[DiamondData]]] = []
+        seen = set()
+        for index, (diamond_id, diamond_data) in enumerate(pairs):
+            if not diamond_id:
+                error = "Missing diamond id"
+            elif diamond_id in seen:
+                error = "Duplicate diamond id"
+            elif operation == "update" and not diamond_data:
+                error = "No fields to update"
+            else:
+                seen.add(diamond_id)
+                work.append((index, diamond_id, diamond_data))
+                continue
+            items[index] = BatchItemResult(index, diamond_id, "failed", 400, error)
+        failures = len(pairs) - len(work)
+        
+        endpoint = self.BULK_UPDATE_ENDPOINT if operation == "update" else self.BULK_DELETE_ENDPOINT
+        counter = {"requests": 0}
+        counter_lock = threading.Lock()
+        aborted = threading.Event()
+        if max_failures is not None and failures > max_failures:
+            aborted.set()
+        
+        def record(done_items: List[BatchItemResult]) -> None:
+            nonlocal failures
+            for item in done_items:
+                items[item.index] = item
+                if item.status == "failed":
+                    failures += 1
+            if max_failures is not None and failures > max_failures:
+                aborted.set()
+        
+        if dry_run:
+            for index, diamond_id, _ in work:
+                items[index] = BatchItemResult(index, diamond_id, "planned")
+        elif work and not aborted.is_set():
+            size = max(1, chunk_size)
+            chunks = [work[offset:offset + size] for offset in range(0, len(work), size)]
+            tasks: deque = deque()
+            if endpoint is not None and self._bulk_endpoints.get(endpoint, True):
+                if endpoint not in self._bulk_endpoints:
+                    # Probe with the first chunk; its outcome decides how the rest are sent
+                    done_items, fan_out = self._bulk_write_chunk(
+                        operation, endpoint, chunks.pop(0), counter, counter_lock
+                    )
+                    record(done_items)
+                    tasks.extend(("item", entry) for entry in fan_out)
+                if self._bulk_endpoints.get(endpoint):
+                    result.bulk = True
+                    tasks.extend(("bulk", chunk) for chunk in chunks)
+                else:
+                    tasks.extend(("item", entry) for chunk in chunks for entry in chunk)
+            else:
+                tasks.extend(("item", entry) for entry in work)
+            
+            def run(kind: str, payload: Any) -> Tuple[List[BatchItemResult], List[Tuple[int, str, Optional[DiamondData]]]]:
+                if aborted.is_set():
+                    return [], []
+                if kind == "bulk":
+                    return self._bulk_write_chunk(operation, endpoint, payload, counter, counter_lock)
+                index, diamond_id, diamond_data = payload
+                with counter_lock:
+                    counter["requests"] += 1
+                if operation == "update":
+                    response = self.update_diamond(diamond_id, diamond_data)
+                else:
+                    response = self.delete_diamond(diamond_id)
+                return [BatchItemResult(
+                    index, diamond_id, "ok" if response.success else "failed",
+                    response.status_code, None if response.success else response.error
+                )], []
+            
+            pending: set = set()
+            with ThreadPoolExecutor(
+                max_workers=max(1, concurrency),
+                thread_name_prefix=f"mazalbot-{operation}"
+            ) as executor:
+                while pending or (tasks and not aborted.is_set()):
+                    # Keep a bounded number of tasks queued so an abort takes effect quickly
+                    while tasks and len(pending) < 2 * max(1, concurrency) and not aborted.is_set():
+                        pending.add(executor.submit(run, *tasks.popleft()))
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        pending.discard(future)
+                        done_items, fan_out = future.result()
+                        record(done_items)
+                        tasks.extend(("item", entry) for entry in fan_out)
+        
+        result.items = [
+            item if item is not None else BatchItemResult(index, pairs[index][0], "skipped", error="Batch aborted")
+            for index, item in enumerate(items)
+        ]
+        result.requests = counter["requests"]
+        result.aborted = aborted.is_set()
+        result.success = bool(result.items) and result.failed == 0 and result.skipped == 0
+        if not result.items:
+            result.error = "No diamonds provided"
+        elif result.aborted:
+            result.error = f"Aborted after {result.failed} failure(s); {result.skipped} diamond(s) skipped"
+        elif not result.success:
+            result.error = f"{result.failed} of {len(result.items)} diamond(s) failed"
+        result.elapsed = time.perf_counter() - start
+        
+        self.logger.info(
+            "Batch %s%s: %d ok, %d failed, %d skipped (%d requests, %.2fs)",
+            operation, " (dry run)" if dry_run else "", result.succeeded, result.failed,
+            result.skipped, result.requests, result.elapsed
+        )
+        return result
+    
+    def _bulk_write_chunk(
+        self,
+        operation: Literal["update", "delete"],
+        endpoint: str,
+        chunk: List[Tuple[int, str, Optional[DiamondData]]],
+        counter: Dict[str, int],
+        counter_lock: threading.Lock,
+        depth: int = 0
+    ) -> Tuple[List[BatchItemResult], List[Tuple[int, str, Optional[DiamondData]]]]:
+        """
+        Send one chunk to a bulk endpoint.
+        
+        A successful response may list stones it could not apply under
+        ``data.failed`` as ``{"id": ..., "error": ...}`` objects. A chunk
+        refused with 413/422 is split in half and resent, at most six
+        levels deep, like upload chunks; a 400 naming a stone by index
+        fails that stone and resends the rest, and any other 400 fails the
+        whole chunk.
+        
+        Args:
+            operation: "update" or "delete"
+            endpoint: Bulk endpoint to POST to
+            chunk: (input index, diamond id, fields) triples
+            counter: Shared request counter
+            counter_lock: Lock guarding counter
+            depth: Number of halvings that produced this chunk
+            
+        Returns:
+            Tuple of (finished items, entries to resend one by one). Entries
+            are returned for resending when the server has no bulk endpoint.
+        """
+        chunk = list(chunk)
+        rejected: List[BatchItemResult] = []
+        while True:
+            if operation == "update":
+                data = {"user_id": self.user_id, "diamonds": [{**fields, "id": diamond_id} for _, diamond_id, fields in chunk]}
+            else:
+                data = {"user_id": self.user_id, "diamond_ids": [diamond_id for _, diamond_id, _ in chunk]}
+            with counter_lock:
+                counter["requests"] += 1
+            response = self._make_request(method="POST", endpoint=endpoint, data=data)
+            
+            if response.status_code in (404, 405, 501) and not self._bulk_endpoints.get(endpoint):
+                if endpoint not in self._bulk_endpoints:
+                    self.logger.info("No bulk endpoint at %s; sending one request per diamond", endpoint)
+                self._bulk_endpoints[endpoint] = False
+                return rejected, chunk
+            self._bulk_endpoints[endpoint] = True
+            
+            # A 400 naming one stone fails just that stone; the rest are resent
+            culprit = _named_stone_index(response.error, len(chunk)) if response.status_code == 400 else None
+            if culprit is None or len(chunk) == 1:
+                break
+            index, diamond_id, _ = chunk.pop(culprit)
+            rejected.append(BatchItemResult(index, diamond_id, "failed", response.status_code, response.error))
+        
+        if not response.success:
+            if response.status_code in _SPLIT_ON_CODES and len(chunk) > 1 and depth < _MAX_SPLIT_DEPTH:
+                middle = len(chunk) // 2
+                self.logger.debug("Chunk of %d refused (%s); splitting", len(chunk), response.status_code)
+                items, fan_out = rejected, []
+                for half in (chunk[:middle], chunk[middle:]):
+                    half_items, half_fan_out = self._bulk_write_chunk(
+                        operation, endpoint, half, counter, counter_lock, depth + 1
+                    )
+                    items.extend(half_items)
+                    fan_out.extend(half_fan_out)
+                return items, fan_out
+            return rejected + [
+                BatchItemResult(index, diamond_id, "failed", response.status_code, response.error)
+                for index, diamond_id, _ in chunk
+            ], []
+        
+        failed: Dict[str, str] = {}
+        if isinstance(response.data, dict):
+            for entry in response.data.get("failed") or []:
+                if isinstance(entry, dict) and entry.get("id") is not None:
+                    failed[str(entry["id"])] = entry.get("error") or "Rejected by server"
+        items = rejected
+        written: List[Tuple[str, Optional[DiamondData]]] = []
+        for index, diamond_id, fields in chunk:
+            if diamond_id in failed:
+                items.append(BatchItemResult(index, diamond_id, "failed", response.status_code, failed[diamond_id]))
+                continue
+            items.append(BatchItemResult(index, diamond_id, "ok", response.status_code))
+            written.append((diamond_id, fields if operation == "update" else None))
+        self._after_writes(operation, response, written)
+        return items, []
     
     def create_report(self, diamond_id: str, report_type: str = "standard") -> ApiResponse:
         """
@@ -487,11 +3293,14 @@ class MazalbotClient:
             "report_type": report_type
         }
         
-        return self._make_request(
+        response = self._make_request(
             method="POST",
             endpoint="/api/v1/create-report",
             data=data
         )
+        if response.success and self.cache is not None:
+            self.cache.invalidate("get_report", diamond_id=diamond_id)
+        return response
     
     def get_report(self, report_id: str) -> ApiResponse:
         """
@@ -518,15 +3327,17 @@ class MazalbotClient:
         return self._make_request(
             method="GET",
             endpoint="/api/v1/get-report",
-            params=params
+            params=params,
+            operation="get_report"
         )
     
-    def search_diamonds(self, search_criteria: Dict[str, Any]) -> ApiResponse:
+    def search_diamonds(self, search_criteria: Dict[str, Any], as_records: bool = False) -> ApiResponse:
         """
         Search for diamonds based on specific criteria.
         
         Args:
             search_criteria: Dictionary containing search parameters
+            as_records: Return compact DiamondRecord objects instead of dicts
             
         Returns:
             ApiResponse containing the matching diamonds if successful
@@ -541,11 +3352,12 @@ class MazalbotClient:
         # Add user_id to search criteria
         search_criteria["user_id"] = self.user_id
         
-        return self._make_request(
+        response = self._make_request(
             method="GET",
             endpoint="/api/v1/get_all_stones",
             params=search_criteria
         )
+        return _as_records(response) if as_records else response
     
     def get_dashboard_stats(self) -> ApiResponse:
         """
@@ -563,7 +3375,8 @@ class MazalbotClient:
         
         return self._make_request(
             method="GET",
-            endpoint=f"/api/v1/users/{self.user_id}/dashboard/stats"
+            endpoint=f"/api/v1/users/{self.user_id}/dashboard/stats",
+            operation="get_dashboard_stats"
         )
     
     def get_inventory_by_shape(self) -> ApiResponse:
@@ -582,7 +3395,8 @@ class MazalbotClient:
         
         return self._make_request(
             method="GET",
-            endpoint=f"/api/v1/users/{self.user_id}/inventory/by-shape"
+            endpoint=f"/api/v1/users/{self.user_id}/inventory/by-shape",
+            operation="get_inventory_by_shape"
         )
     
     def get_recent_sales(self) -> ApiResponse:
@@ -601,7 +3415,8 @@ class MazalbotClient:
         
         return self._make_request(
             method="GET",
-            endpoint=f"/api/v1/users/{self.user_id}/sales/recent"
+            endpoint=f"/api/v1/users/{self.user_id}/sales/recent",
+            operation="get_recent_sales"
         )
 
 
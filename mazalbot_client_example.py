@@ -127,6 +127,9 @@ def main():
         print(json.dumps(response.data, indent=2))
     else:
         print(f"Error getting inventory distribution: {response.error}")
+    
+    # Release pooled keep-alive connections
+    client.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,564 @@
+"""
+Columnar container for large diamond inventories.
+
+A DiamondFrame holds an inventory as NumPy arrays instead of one dict per
+stone: float64 arrays for weight, price and price_per_carat, and
+dictionary-encoded integer codes for the grade columns (shape, color,
+clarity, ...). A 500k-stone inventory then takes tens of MB instead of
+hundreds, and filtering, sorting and group-by run as vectorised array
+operations. Rows can be turned back into DiamondData dicts on demand.
+
+Requires the optional ``numpy`` dependency (``pip install numpy``).
+
+Example usage:
+```python
+client = MazalbotClient(user_id=123456789)
+frame = DiamondFrame.from_records(client.iter_diamonds(page_size=500))
+
+rounds = frame.where({"shape": "Round", "min_weight": 1.0})
+by_color = rounds.groupby("color", value="price")
+cheapest = rounds.sort_by("price_per_carat").head(10).to_records()
+```
+"""
+
+from array import array
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, Tuple, Union
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
+
+from mazalbot_client import ApiResponse, DiamondData, parse_search_criteria
+
+
+NUMERIC_COLUMNS = ("weight", "price", "price_per_carat")
+
+CATEGORICAL_COLUMNS = (
+    "shape", "color", "clarity", "cut", "polish", "symmetry", "lab", "fluorescence", "status"
+)
+
+# Fields kept outside the columns and only used to rebuild DiamondData
+_KEY_COLUMNS = ("id", "stock_number")
+_COLUMN_FIELDS = set(NUMERIC_COLUMNS) | set(CATEGORICAL_COLUMNS) | set(_KEY_COLUMNS)
+
+# Code used for a missing categorical value
+MISSING = -1
+
+GroupKey = Tuple[Optional[str], ...]
+
+
+def _require_numpy() -> None:
+    if np is None:
+        raise ImportError("DiamondFrame requires numpy. Install it with: pip install numpy")
+
+
+class _FrameBuilder:
+    """Accumulates rows into compact typed buffers, encoding categories on the fly."""
+    
+    def __init__(self) -> None:
+        self.numeric = {name: array("d") for name in NUMERIC_COLUMNS}
+        self.codes = {name: array("i") for name in CATEGORICAL_COLUMNS}
+        self.lookup: Dict[str, Dict[str, int]] = {name: {} for name in CATEGORICAL_COLUMNS}
+        self.categories: Dict[str, List[str]] = {name: [] for name in CATEGORICAL_COLUMNS}
+        self.ids: List[Optional[str]] = []
+        self.stock_numbers: List[Optional[str]] = []
+        self.extras: List[Optional[Dict[str, Any]]] = []
+        self.has_extras = False
+    
+    def add(self, diamond: Mapping[str, Any]) -> None:
+        nan = float("nan")
+        for name in NUMERIC_COLUMNS:
+            value = diamond.get(name)
+            try:
+                self.numeric[name].append(float(value) if value is not None else nan)
+            except (TypeError, ValueError):
+                self.numeric[name].append(nan)
+        
+        for name in CATEGORICAL_COLUMNS:
+            value = diamond.get(name)
+            if value is None:
+                self.codes[name].append(MISSING)
+                continue
+            value = str(value)
+            code = self.lookup[name].get(value)
+            if code is None:
+                code = len(self.categories[name])
+                self.lookup[name][value] = code
+                self.categories[name].append(value)
+            self.codes[name].append(code)
+        
+        diamond_id = diamond.get("id")
+        self.ids.append(str(diamond_id) if diamond_id is not None else None)
+        self.stock_numbers.append(diamond.get("stock_number"))
+        
+        extra = {key: value for key, value in diamond.items() if key not in _COLUMN_FIELDS}
+        if extra:
+            self.has_extras = True
+            self.extras.append(extra)
+        else:
+            self.extras.append(None)
+    
+    def build(self) -> "DiamondFrame":
+        count = len(self.ids)
+        extras = None
+        if self.has_extras:
+            extras = np.empty(count, dtype=object)
+            extras[:] = self.extras
+        return DiamondFrame(
+            numeric={name: np.frombuffer(buffer, dtype=np.float64).copy() for name, buffer in self.numeric.items()},
+            codes={name: np.frombuffer(buffer, dtype=np.int32).copy() for name, buffer in self.codes.items()},
+            categories={name: list(values) for name, values in self.categories.items()},
+            ids=np.array(self.ids, dtype=object),
+            stock_numbers=np.array(self.stock_numbers, dtype=object),
+            extras=extras
+        )
+
+
+class DiamondFrame:
+    """
+    Column-oriented, immutable view of an inventory.
+    
+    Numeric columns are float64 arrays with NaN for missing values.
+    Categorical columns are int32 code arrays indexing into a per-column
+    list of categories, with MISSING (-1) for missing values. All methods
+    that select rows return a new frame sharing the category lists.
+    """
+    
+    def __init__(
+        self,
+        numeric: Dict[str, "np.ndarray"],
+        codes: Dict[str, "np.ndarray"],
+        categories: Dict[str, List[str]],
+        ids: "np.ndarray",
+        stock_numbers: "np.ndarray",
+        extras: Optional["np.ndarray"] = None
+    ):
+        """
+        Create a frame from prepared arrays. Use from_records or from_pages
+        to build one from API data.
+        
+        Args:
+            numeric: Float64 arrays keyed by numeric column name
+            codes: Int32 code arrays keyed by categorical column name
+            categories: Category values keyed by categorical column name
+            ids: Object array of diamond IDs
+            stock_numbers: Object array of stock numbers
+            extras: Object array of dicts with the remaining fields, or None
+        """
+        _require_numpy()
+        self.numeric = numeric
+        self.codes = codes
+        self.categories = categories
+        self.ids = ids
+        self.stock_numbers = stock_numbers
+        self.extras = extras
+    
+    # Construction
+    
+    @classmethod
+    def from_records(cls, diamonds: Iterable[Mapping[str, Any]]) -> "DiamondFrame":
+        """
+        Build a frame from DiamondData dicts.
+        
+        The input is consumed one row at a time, so it can be a generator
+        such as MazalbotClient.iter_diamonds without materialising a list.
+        
+        Args:
+            diamonds: Iterable of DiamondData dictionaries
+            
+        Returns:
+            A new DiamondFrame
+        """
+        _require_numpy()
+        builder = _FrameBuilder()
+        for diamond in diamonds:
+            builder.add(diamond)
+        return builder.build()
+    
+    @classmethod
+    def from_pages(cls, pages: Iterable[Union[ApiResponse, List[DiamondData]]]) -> "DiamondFrame":
+        """
+        Build a frame from get_diamonds pages.
+        
+        Args:
+            pages: Iterable of successful ApiResponse objects or lists of diamonds
+            
+        Returns:
+            A new DiamondFrame
+        """
+        _require_numpy()
+        builder = _FrameBuilder()
+        for page in pages:
+            stones = page.data if isinstance(page, ApiResponse) else page
+            for diamond in stones or []:
+                builder.add(diamond)
+        return builder.build()
+    
+    # Access
+    
+    def __len__(self) -> int:
+        return len(self.ids)
+    
+    def __repr__(self) -> str:
+        return f"DiamondFrame({len(self)} diamonds)"
+    
+    @property
+    def nbytes(self) -> int:
+        """Approximate size of the column arrays in bytes (excluding object payloads)."""
+        total = sum(column.nbytes for column in self.numeric.values())
+        total += sum(column.nbytes for column in self.codes.values())
+        return total + self.ids.nbytes + self.stock_numbers.nbytes
+    
+    def column(self, name: str) -> "np.ndarray":
+        """
+        Get a column as an array.
+        
+        Numeric columns are returned as-is; categorical columns are decoded
+        into an object array of strings (None where missing).
+        
+        Args:
+            name: Column name
+            
+        Returns:
+            Array with one value per row
+        """
+        if name in self.numeric:
+            return self.numeric[name]
+        if name in self.codes:
+            lookup = np.array(self.categories[name] + [None], dtype=object)
+            return lookup[self.codes[name]]
+        if name == "id":
+            return self.ids
+        if name == "stock_number":
+            return self.stock_numbers
+        raise KeyError(name)
+    
+    def value_codes(self, name: str, values: Iterable[Any]) -> "np.ndarray":
+        """
+        Translate category values into codes, matching case-insensitively.
+        
+        Args:
+            name: Categorical column name
+            values: Values to look up
+            
+        Returns:
+            Int32 array of the codes of every matching category
+        """
+        wanted = {str(value).strip().casefold() for value in values}
+        return np.array(
+            [code for code, category in enumerate(self.categories[name])
+             if category.strip().casefold() in wanted],
+            dtype=np.int32
+        )
+    
+    # Selection
+    
+    def mask(self, search_criteria: Mapping[str, Any]) -> "np.ndarray":
+        """
+        Evaluate search criteria as a boolean row mask.
+        
+        Uses the same semantics as search_diamonds (see
+        parse_search_criteria).
+        
+        Args:
+            search_criteria: Dictionary containing search parameters
+            
+        Returns:
+            Boolean array, True for matching rows
+        """
+        search_filter = parse_search_criteria(search_criteria)
+        result = np.ones(len(self), dtype=bool)
+        for name, allowed in search_filter.equals.items():
+            if name in self.codes:
+                result &= np.isin(self.codes[name], self.value_codes(name, allowed))
+            elif name in ("id", "stock_number"):
+                column = self.column(name)
+                result &= np.array(
+                    [value is not None and str(value).strip().casefold() in allowed for value in column],
+                    dtype=bool
+                )
+            elif self.extras is not None:
+                result &= np.array(
+                    [extra is not None and extra.get(name) is not None
+                     and str(extra[name]).strip().casefold() in allowed for extra in self.extras],
+                    dtype=bool
+                )
+            else:
+                result[:] = False
+        for name, (low, high) in search_filter.ranges.items():
+            values = self._numeric_values(name)
+            with np.errstate(invalid="ignore"):
+                if low is not None:
+                    result &= values >= low
+                if high is not None:
+                    result &= values <= high
+        return result
+    
+    def where(self, search_criteria: Mapping[str, Any]) -> "DiamondFrame":
+        """
+        Select the rows matching search criteria.
+        
+        Args:
+            search_criteria: Dictionary containing search parameters
+            
+        Returns:
+            A new frame with the matching rows
+        """
+        return self.take(np.flatnonzero(self.mask(search_criteria)))
+    
+    def filter(self, mask: "np.ndarray") -> "DiamondFrame":
+        """
+        Select rows with a boolean mask.
+        
+        Args:
+            mask: Boolean array with one entry per row
+            
+        Returns:
+            A new frame with the selected rows
+        """
+        return self.take(np.flatnonzero(mask))
+    
+    def take(self, indices: Union[Sequence[int], "np.ndarray"]) -> "DiamondFrame":
+        """
+        Select rows by position.
+        
+        Args:
+            indices: Row positions
+            
+        Returns:
+            A new frame with the rows in the given order
+        """
+        indices = np.asarray(indices, dtype=np.intp)
+        return DiamondFrame(
+            numeric={name: column[indices] for name, column in self.numeric.items()},
+            codes={name: column[indices] for name, column in self.codes.items()},
+            categories=self.categories,
+            ids=self.ids[indices],
+            stock_numbers=self.stock_numbers[indices],
+            extras=self.extras[indices] if self.extras is not None else None
+        )
+    
+    def head(self, count: int = 10) -> "DiamondFrame":
+        """First ``count`` rows."""
+        return self.take(np.arange(min(count, len(self))))
+    
+    def sort_by(self, columns: Union[str, Sequence[str]], descending: bool = False) -> "DiamondFrame":
+        """
+        Sort rows by one or more columns.
+        
+        Numeric columns sort by value and categorical columns by category
+        value; missing values sort last in either direction.
+        
+        Args:
+            columns: Column name or names, most significant first
+            descending: Sort in descending order
+            
+        Returns:
+            A new, sorted frame
+        """
+        if isinstance(columns, str):
+            columns = [columns]
+        
+        keys = []
+        for name in reversed(columns):
+            if name in self.numeric:
+                values = self.numeric[name]
+                key = -values if descending else values.copy()
+                key[np.isnan(key)] = np.inf
+            else:
+                key = self._sort_ranks(name)
+                if descending:
+                    # Ranks become <= 0; missing rows go after them
+                    key = np.where(self.codes[name] == MISSING, 1, -key)
+            keys.append(key)
+        return self.take(np.lexsort(keys))
+    
+    def add_bands(self, name: str, column: str, edges: Sequence[float]) -> "DiamondFrame":
+        """
+        Add a categorical column that buckets a numeric column.
+        
+        Band labels look like ``"1.00-1.50"``, with an open-ended last band
+        such as ``"5.00+"``. Values below the first edge are missing.
+        
+        Args:
+            name: Name of the new categorical column (e.g. "carat_band")
+            column: Numeric column to bucket (e.g. "weight")
+            edges: Ascending band lower bounds
+            
+        Returns:
+            A new frame with the extra column
+            
+        Raises:
+            ValueError: If edges is empty or not strictly ascending
+        """
+        edges = list(edges)
+        if not edges:
+            raise ValueError("add_bands needs at least one band edge")
+        if any(high <= low for low, high in zip(edges, edges[1:])):
+            raise ValueError(f"Band edges must be strictly ascending: {edges}")
+        labels = [
+            f"{low:.2f}-{high:.2f}" for low, high in zip(edges, edges[1:])
+        ] + [f"{edges[-1]:.2f}+"]
+        values = self.numeric[column]
+        with np.errstate(invalid="ignore"):
+            codes = np.searchsorted(np.asarray(edges, dtype=np.float64), values, side="right").astype(np.int32) - 1
+        codes[np.isnan(values)] = MISSING
+        
+        frame = self.take(np.arange(len(self)))
+        frame.codes[name] = codes
+        frame.categories = {**self.categories, name: labels}
+        return frame
+    
+    # Aggregation
+    
+    def group_codes(self, by: Union[str, Sequence[str]]) -> Tuple["np.ndarray", List[GroupKey]]:
+        """
+        Assign every row a dense group number for the given columns.
+        
+        Args:
+            by: Categorical column name or names
+            
+        Returns:
+            Tuple of (int array of group numbers per row, group keys in
+            group-number order)
+        """
+        if isinstance(by, str):
+            by = [by]
+        
+        combined = np.zeros(len(self), dtype=np.int64)
+        for name in by:
+            # Shift codes by one so MISSING becomes 0
+            combined = combined * (len(self.categories[name]) + 1) + (self.codes[name].astype(np.int64) + 1)
+        unique, groups = np.unique(combined, return_inverse=True)
+        
+        keys: List[GroupKey] = []
+        for value in unique:
+            parts: List[Optional[str]] = []
+            for name in reversed(by):
+                size = len(self.categories[name]) + 1
+                value, code = divmod(int(value), size)
+                parts.append(self.categories[name][code - 1] if code else None)
+            keys.append(tuple(reversed(parts)))
+        return groups.reshape(-1), keys
+    
+    def groupby(
+        self,
+        by: Union[str, Sequence[str]],
+        value: str = "price",
+        aggregates: Sequence[str] = ("count", "sum", "mean", "min", "max")
+    ) -> Dict[GroupKey, Dict[str, float]]:
+        """
+        Aggregate a numeric column per group.
+        
+        ``count`` counts rows in the group; the other aggregates (``sum``,
+        ``mean``, ``min``, ``max``, ``median``) ignore missing values.
+        
+        Args:
+            by: Categorical column name or names to group by
+            value: Numeric column to aggregate
+            aggregates: Aggregates to compute
+            
+        Returns:
+            Dict mapping each group key (a tuple of category values, None for
+            missing) to a dict of aggregate name to value
+        """
+        groups, keys = self.group_codes(by)
+        group_count = len(keys)
+        values = self._numeric_values(value)
+        valid = ~np.isnan(values)
+        
+        results: Dict[str, np.ndarray] = {}
+        results["count"] = np.bincount(groups, minlength=group_count).astype(np.float64)
+        
+        valid_groups = groups[valid]
+        valid_values = values[valid]
+        counts = np.bincount(valid_groups, minlength=group_count)
+        sums = np.bincount(valid_groups, weights=valid_values, minlength=group_count)
+        results["sum"] = sums
+        with np.errstate(invalid="ignore", divide="ignore"):
+            results["mean"] = np.where(counts > 0, sums / counts, np.nan)
+        
+        if any(name in aggregates for name in ("min", "max", "median")):
+            order = np.lexsort((valid_values, valid_groups))
+            sorted_groups = valid_groups[order]
+            sorted_values = valid_values[order]
+            starts = np.searchsorted(sorted_groups, np.arange(group_count), side="left")
+            ends = np.searchsorted(sorted_groups, np.arange(group_count), side="right")
+            present = ends > starts
+            minimum = np.full(group_count, np.nan)
+            maximum = np.full(group_count, np.nan)
+            median = np.full(group_count, np.nan)
+            minimum[present] = sorted_values[starts[present]]
+            maximum[present] = sorted_values[ends[present] - 1]
+            low_mid = sorted_values[(starts[present] + ends[present] - 1) // 2]
+            high_mid = sorted_values[(starts[present] + ends[present]) // 2]
+            median[present] = (low_mid + high_mid) / 2
+            results.update(min=minimum, max=maximum, median=median)
+        
+        return {
+            key: {name: float(results[name][index]) for name in aggregates}
+            for index, key in enumerate(keys)
+        }
+    
+    # Conversion
+    
+    def record(self, index: int) -> DiamondData:
+        """
+        Rebuild the DiamondData dict for one row.
+        
+        Args:
+            index: Row position
+            
+        Returns:
+            DiamondData dictionary (missing values are omitted)
+        """
+        diamond: DiamondData = {}
+        if self.ids[index] is not None:
+            diamond["id"] = self.ids[index]
+        if self.stock_numbers[index] is not None:
+            diamond["stock_number"] = self.stock_numbers[index]
+        for name in CATEGORICAL_COLUMNS:
+            code = self.codes[name][index]
+            if code != MISSING:
+                diamond[name] = self.categories[name][code]
+        for name in NUMERIC_COLUMNS:
+            value = self.numeric[name][index]
+            if not np.isnan(value):
+                diamond[name] = float(value)
+        if self.extras is not None and self.extras[index]:
+            diamond.update(self.extras[index])
+        return diamond
+    
+    def iter_records(self) -> Iterator[DiamondData]:
+        """Iterate over rows as DiamondData dicts."""
+        for index in range(len(self)):
+            yield self.record(index)
+    
+    def to_records(self) -> List[DiamondData]:
+        """All rows as a list of DiamondData dicts."""
+        return list(self.iter_records())
+    
+    # Helpers
+    
+    def _numeric_values(self, name: str) -> "np.ndarray":
+        if name in self.numeric:
+            return self.numeric[name]
+        if self.extras is None:
+            return np.full(len(self), np.nan)
+        values = np.full(len(self), np.nan)
+        for index, extra in enumerate(self.extras):
+            if extra is not None and extra.get(name) is not None:
+                try:
+                    values[index] = float(extra[name])
+                except (TypeError, ValueError):
+                    pass
+        return values
+    
+    def _sort_ranks(self, name: str) -> "np.ndarray":
+        """Rank of each row's category in sorted category order, missing last."""
+        categories = self.categories[name]
+        ranks = np.empty(len(categories) + 1, dtype=np.int64)
+        ranks[np.argsort(np.array(categories, dtype=object), kind="stable")] = np.arange(len(categories))
+        ranks[-1] = len(categories)
+        return ranks[self.codes[name]]
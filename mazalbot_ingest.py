@@ -0,0 +1,451 @@
+"""
+Streaming ingest of supplier CSV feeds into a Mazalbot inventory.
+
+Supplier feeds can be several gigabytes, so nothing here loads a whole file.
+The pipeline has three stages:
+
+1. The CSV file is read row by row and grouped into small batches.
+2. Batches are normalised and validated in a process pool. Header aliases
+   ("Stock #", "Carat", "PPC", ...) are mapped to DiamondData fields,
+   numbers are coerced, grade spellings ("RB", "VVS 1", "VG") are mapped to
+   the app's vocabulary, and price is derived from price_per_carat * weight
+   (or the other way round).
+3. Valid stones stream straight into MazalbotClient.upload_diamonds.
+
+Only a bounded number of batches is in flight at any time, and upload
+outcomes are consumed chunk by chunk, keeping only counts and the rejected
+rows, so memory stays flat whatever the file size while normalisation uses
+every core.
+
+Example usage:
+```python
+client = MazalbotClient(user_id=123456789)
+report = ingest_csv(client, "supplier_feed.csv")
+print(f"{report.uploaded} uploaded, {len(report.errors)} rows with errors")
+for error in report.errors[:10]:
+    print(f"line {error.line}: {error.reason}")
+```
+"""
+
+import csv
+import itertools
+import logging
+import os
+import re
+import time
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, TextIO, Tuple, Union
+
+from mazalbot_client import REQUIRED_DIAMOND_FIELDS, DiamondData, MazalbotClient, UploadItemResult, UploadResult
+
+
+# Grade vocabulary used by the app (src/components/inventory/form/diamondFormConstants.ts)
+SHAPES = ("Round", "Princess", "Cushion", "Emerald", "Oval", "Radiant", "Asscher", "Marquise", "Heart", "Pear")
+COLORS = ("D", "E", "F", "G", "H", "I", "J", "K", "L", "M")
+CLARITIES = ("FL", "IF", "VVS1", "VVS2", "VS1", "VS2", "SI1", "SI2", "I1", "I2", "I3")
+FINISH_GRADES = ("Excellent", "Very Good", "Good", "Fair", "Poor")
+STATUSES = ("Available", "Reserved", "Sold")
+FLUORESCENCES = ("None", "Faint", "Medium", "Strong", "Very Strong")
+
+
+def _key(value: str) -> str:
+    """Reduce a header or grade to lowercase letters and digits for lookup"""
+    return re.sub(r"[^a-z0-9]", "", value.lower())
+
+
+def _vocabulary(canonical: Iterable[str], aliases: Mapping[str, str]) -> Dict[str, str]:
+    lookup = {_key(value): value for value in canonical}
+    lookup.update({_key(alias): value for alias, value in aliases.items()})
+    return lookup
+
+
+# Feed column header -> DiamondData field
+_HEADER_ALIASES = _vocabulary((), {
+    "id": "id",
+    "stock #": "stock_number", "stock no": "stock_number", "stock number": "stock_number",
+    "sku": "stock_number",
+    "shape": "shape",
+    "weight": "weight", "carat": "weight", "carats": "weight", "size": "weight", "ct": "weight",
+    "color": "color", "colour": "color",
+    "clarity": "clarity",
+    "cut": "cut", "cut grade": "cut",
+    "polish": "polish", "pol": "polish",
+    "symmetry": "symmetry", "sym": "symmetry",
+    "price per carat": "price_per_carat",
+    "ppc": "price_per_carat", "price/ct": "price_per_carat", "per carat": "price_per_carat",
+    "price": "price", "total price": "price", "total": "price", "amount": "price",
+    "status": "status", "availability": "status",
+    "picture": "picture", "image": "picture", "image url": "picture", "photo": "picture",
+    "certificate url": "certificate_url", "cert url": "certificate_url",
+    "certificate number": "certificate_number", "certificate #": "certificate_number",
+    "cert #": "certificate_number", "cert no": "certificate_number", "report #": "certificate_number",
+    "lab": "lab", "grading lab": "lab",
+    "fluorescence": "fluorescence", "fluor": "fluorescence", "fluorescence intensity": "fluorescence",
+})
+
+_SHAPE_VALUES = _vocabulary(SHAPES, {
+    "RB": "Round", "BR": "Round", "RD": "Round", "Round Brilliant": "Round",
+    "PR": "Princess", "PRIN": "Princess",
+    "CU": "Cushion", "CUSH": "Cushion", "Cushion Brilliant": "Cushion", "Cushion Modified": "Cushion",
+    "EM": "Emerald", "EC": "Emerald",
+    "OV": "Oval",
+    "RA": "Radiant", "RAD": "Radiant",
+    "AS": "Asscher", "SQ Emerald": "Asscher",
+    "MQ": "Marquise", "MAR": "Marquise",
+    "HS": "Heart", "HT": "Heart",
+    "PS": "Pear", "PE": "Pear",
+})
+
+_COLOR_VALUES = _vocabulary(COLORS, {})
+
+_CLARITY_VALUES = _vocabulary(CLARITIES, {"Flawless": "FL", "Internally Flawless": "IF"})
+
+_FINISH_VALUES = _vocabulary(FINISH_GRADES, {
+    "EX": "Excellent", "EXC": "Excellent", "Ideal": "Excellent", "ID": "Excellent",
+    "VG": "Very Good",
+    "G": "Good", "GD": "Good",
+    "F": "Fair", "FR": "Fair",
+    "P": "Poor", "PR": "Poor",
+})
+
+_STATUS_VALUES = _vocabulary(STATUSES, {
+    "A": "Available", "AV": "Available", "AVL": "Available", "Avail": "Available", "In Stock": "Available",
+    "Hold": "Reserved", "On Hold": "Reserved", "Memo": "Reserved", "On Memo": "Reserved",
+    "S": "Sold",
+})
+
+_FLUORESCENCE_VALUES = _vocabulary(FLUORESCENCES, {
+    "N": "None", "NON": "None", "NIL": "None",
+    "FNT": "Faint", "FA": "Faint", "SL": "Faint", "Slight": "Faint",
+    "MED": "Medium", "MD": "Medium",
+    "STG": "Strong", "ST": "Strong", "SG": "Strong",
+    "VST": "Very Strong", "VSTG": "Very Strong", "VS": "Very Strong",
+})
+
+# DiamondData field -> grade lookup table
+_GRADE_FIELDS: Dict[str, Dict[str, str]] = {
+    "shape": _SHAPE_VALUES,
+    "color": _COLOR_VALUES,
+    "clarity": _CLARITY_VALUES,
+    "cut": _FINISH_VALUES,
+    "polish": _FINISH_VALUES,
+    "symmetry": _FINISH_VALUES,
+    "status": _STATUS_VALUES,
+    "fluorescence": _FLUORESCENCE_VALUES,
+}
+
+_NUMERIC_FIELDS = ("weight", "price_per_carat", "price")
+
+_EMPTY_VALUES = {"", "-", "n/a", "na", "null"}
+
+
+@dataclass
+class RowError:
+    """A feed row that could not be ingested"""
+    line: int
+    reason: str
+    stock_number: Optional[str] = None
+
+
+@dataclass
+class IngestReport:
+    """Outcome of a feed ingest"""
+    success: bool
+    rows: int = 0
+    valid: int = 0
+    uploaded: int = 0
+    errors: List[RowError] = field(default_factory=list)
+    upload: Optional[UploadResult] = None
+    elapsed: float = 0.0
+    error: Optional[str] = None
+
+
+def _parse_number(value: str) -> float:
+    cleaned = value.replace(",", "").replace("$", "").replace(" ", "")
+    number = float(cleaned)
+    if number != number or number in (float("inf"), float("-inf")):
+        raise ValueError(value)
+    return number
+
+
+@dataclass
+class RowBatch:
+    """A batch of raw feed rows sharing one header line"""
+    headers: List[str]
+    rows: List[Tuple[int, List[str]]] = field(default_factory=list)
+
+
+def _resolve_headers(headers: Iterable[Optional[str]]) -> List[Optional[str]]:
+    """Map feed column headers to DiamondData fields; unknown and repeated columns map to None"""
+    fields: List[Optional[str]] = []
+    for header in headers:
+        name = _HEADER_ALIASES.get(_key(header)) if header is not None else None
+        fields.append(name if name not in fields else None)
+    return fields
+
+
+@lru_cache(maxsize=4096)
+def _grade(name: str, value: str) -> Optional[str]:
+    return _GRADE_FIELDS[name].get(_key(value))
+
+
+def _normalise_values(
+    fields: List[Optional[str]],
+    values: Iterable[Optional[str]]
+) -> Tuple[Optional[DiamondData], Optional[str]]:
+    diamond: Dict[str, Any] = {}
+    for name, raw in zip(fields, values):
+        if name is None or raw is None:
+            continue
+        value = raw.strip()
+        if value.lower() in _EMPTY_VALUES:
+            continue
+        
+        if name in _GRADE_FIELDS:
+            grade = _grade(name, value)
+            if grade is None:
+                return None, f"Unknown {name} {value!r}"
+            diamond[name] = grade
+        elif name in _NUMERIC_FIELDS:
+            try:
+                diamond[name] = _parse_number(value)
+            except ValueError:
+                return None, f"Invalid {name} {value!r}"
+        else:
+            diamond[name] = value
+    
+    missing_fields = [name for name in REQUIRED_DIAMOND_FIELDS if name not in diamond]
+    if missing_fields:
+        return None, f"Missing required fields: {', '.join(missing_fields)}"
+    
+    weight = diamond["weight"]
+    if weight <= 0:
+        return None, f"Invalid weight {weight!r}"
+    for name in ("price_per_carat", "price"):
+        if diamond.get(name, 0) < 0:
+            return None, f"Invalid {name} {diamond[name]!r}"
+    
+    if "price_per_carat" in diamond:
+        diamond["price"] = round(diamond["price_per_carat"] * weight, 2)
+    elif "price" in diamond:
+        diamond["price_per_carat"] = round(diamond["price"] / weight, 2)
+    
+    if "lab" in diamond and len(diamond["lab"]) <= 5:
+        diamond["lab"] = diamond["lab"].upper()
+    return diamond, None
+
+
+def normalise_row(row: Mapping[Optional[str], Optional[str]]) -> Tuple[Optional[DiamondData], Optional[str]]:
+    """
+    Convert one raw feed row into DiamondData.
+    
+    Args:
+        row: Mapping of feed column header to raw cell text
+        
+    Returns:
+        Tuple of (diamond, None) on success or (None, reason) if the row is invalid
+    """
+    return _normalise_values(_resolve_headers(row.keys()), row.values())
+
+
+def _normalise_batch(batch: RowBatch) -> List[Union[Tuple[int, DiamondData], RowError]]:
+    """Process-pool entry point: normalise a batch of rows"""
+    fields = _resolve_headers(batch.headers)
+    stock_column = fields.index("stock_number") if "stock_number" in fields else None
+    results: List[Union[Tuple[int, DiamondData], RowError]] = []
+    for line, values in batch.rows:
+        diamond, reason = _normalise_values(fields, values)
+        if diamond is not None:
+            results.append((line, diamond))
+        else:
+            stock_number = values[stock_column] if stock_column is not None and stock_column < len(values) else None
+            results.append(RowError(line=line, reason=reason or "Invalid row", stock_number=stock_number))
+    return results
+
+
+def read_csv_rows(
+    source: Union[str, os.PathLike, TextIO],
+    batch_size: int = 2000,
+    delimiter: Optional[str] = None,
+    encoding: str = "utf-8-sig"
+) -> Iterator[RowBatch]:
+    """
+    Stream a CSV feed as batches of raw rows.
+    
+    Args:
+        source: Path to the CSV file, or an open text file
+        batch_size: Number of rows per batch
+        delimiter: Field delimiter; sniffed from the header line if omitted
+        encoding: File encoding when source is a path
+        
+    Returns:
+        Iterator over RowBatch objects with the feed's header line
+    """
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, newline="", encoding=encoding, errors="replace") as handle:
+            yield from read_csv_rows(handle, batch_size, delimiter)
+        return
+    
+    if delimiter is None:
+        header = source.readline()
+        delimiter = max(",;\t|", key=header.count)
+        source = itertools.chain([header], source)
+    
+    reader = csv.reader(source, delimiter=delimiter)
+    headers = next(reader, None)
+    if headers is None:
+        return
+    batch = RowBatch(headers)
+    for values in reader:
+        if not values:
+            continue
+        batch.rows.append((reader.line_num, values))
+        if len(batch.rows) >= batch_size:
+            yield batch
+            batch = RowBatch(headers)
+    if batch.rows:
+        yield batch
+
+
+def _ordered_results(
+    executor: Optional[Executor],
+    batches: Iterable[RowBatch],
+    max_pending: int
+) -> Iterator[List[Union[Tuple[int, DiamondData], RowError]]]:
+    """Normalise batches with at most max_pending in flight, yielding results in input order"""
+    if executor is None:
+        for batch in batches:
+            yield _normalise_batch(batch)
+        return
+    
+    pending: List[Future] = []
+    for batch in batches:
+        pending.append(executor.submit(_normalise_batch, batch))
+        if len(pending) >= max_pending:
+            yield pending.pop(0).result()
+    while pending:
+        yield pending.pop(0).result()
+
+
+def ingest_rows(
+    client: MazalbotClient,
+    batches: Iterable[RowBatch],
+    workers: Optional[int] = None,
+    chunk_size: int = 500,
+    concurrency: int = 4,
+    dry_run: bool = False
+) -> IngestReport:
+    """
+    Normalise raw feed rows in a process pool and upload the valid ones.
+    
+    Args:
+        client: Client used to upload the stones
+        batches: Batches of raw rows, e.g. from read_csv_rows
+        workers: Normalisation processes; defaults to the CPU count, 0 normalises
+            in the calling process
+        chunk_size: Stones per upload request
+        concurrency: Upload requests in flight
+        dry_run: Validate only; nothing is uploaded
+        
+    Returns:
+        IngestReport with one RowError per rejected row
+    """
+    start = time.perf_counter()
+    report = IngestReport(success=False)
+    # Upload index -> feed line, only for stones whose outcome is still pending
+    lines: Dict[int, int] = {}
+    logger = logging.getLogger("mazalbot_client")
+    
+    def valid_diamonds(results: Iterator[List[Union[Tuple[int, DiamondData], RowError]]]) -> Iterator[DiamondData]:
+        for batch in results:
+            for result in batch:
+                report.rows += 1
+                if isinstance(result, RowError):
+                    report.errors.append(result)
+                    continue
+                line, diamond = result
+                if not dry_run:
+                    lines[report.valid] = line
+                report.valid += 1
+                yield diamond
+    
+    def uploaded(items: List[UploadItemResult]) -> None:
+        for item in items:
+            line = lines.pop(item.index)
+            if item.status != "accepted":
+                report.errors.append(RowError(
+                    line=line,
+                    reason=item.reason or "Upload failed",
+                    stock_number=item.stock_number
+                ))
+    
+    workers = (os.cpu_count() or 1) if workers is None else workers
+    executor = ProcessPoolExecutor(max_workers=workers) if workers > 0 else None
+    try:
+        diamonds = valid_diamonds(_ordered_results(executor, batches, 2 * max(1, workers)))
+        if dry_run:
+            for _ in diamonds:
+                pass
+        else:
+            report.upload = client.upload_diamonds(
+                diamonds, chunk_size=chunk_size, concurrency=concurrency, on_items=uploaded
+            )
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+    
+    if report.upload is not None:
+        report.uploaded = report.upload.accepted
+        if report.upload.error and not report.upload.total:
+            report.error = report.upload.error
+    report.errors.sort(key=lambda error: error.line)
+    
+    report.success = report.error is None and not report.errors
+    if report.error is None and report.errors:
+        report.error = f"{len(report.errors)} of {report.rows} rows could not be ingested"
+    report.elapsed = time.perf_counter() - start
+    
+    logger.info(
+        "Ingested %d rows: %d valid, %d uploaded, %d errors (%.2fs)",
+        report.rows, report.valid, report.uploaded, len(report.errors), report.elapsed
+    )
+    return report
+
+
+def ingest_csv(
+    client: MazalbotClient,
+    source: Union[str, os.PathLike, TextIO],
+    batch_size: int = 2000,
+    workers: Optional[int] = None,
+    chunk_size: int = 500,
+    concurrency: int = 4,
+    delimiter: Optional[str] = None,
+    dry_run: bool = False
+) -> IngestReport:
+    """
+    Stream a supplier CSV feed into the inventory.
+    
+    Args:
+        client: Client used to upload the stones
+        source: Path to the CSV file, or an open text file
+        batch_size: Rows per normalisation batch
+        workers: Normalisation processes; defaults to the CPU count, 0 normalises
+            in the calling process
+        chunk_size: Stones per upload request
+        concurrency: Upload requests in flight
+        delimiter: Field delimiter; sniffed from the header line if omitted
+        dry_run: Validate only; nothing is uploaded
+        
+    Returns:
+        IngestReport with one RowError per rejected row
+    """
+    return ingest_rows(
+        client,
+        read_csv_rows(source, batch_size=batch_size, delimiter=delimiter),
+        workers=workers,
+        chunk_size=chunk_size,
+        concurrency=concurrency,
+        dry_run=dry_run
+    )
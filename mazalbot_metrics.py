@@ -0,0 +1,189 @@
+"""
+Prometheus-style metrics for Mazalbot clients.
+
+MetricsCollector is a request hook (see MazalbotClient.add_request_hook) that
+aggregates request counts, retries, failures, bytes and a latency histogram
+per method and route, and renders them in the Prometheus text exposition
+format. It has no dependencies; serve ``collector.render()`` from any HTTP
+endpoint, or write it to a node_exporter textfile.
+
+Example usage:
+```python
+client = MazalbotClient(user_id=123456789)
+metrics = MetricsCollector()
+metrics.attach(client)
+
+client.get_diamonds()
+print(metrics.render())
+```
+"""
+
+import bisect
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from mazalbot_client import RequestEvent
+
+
+# Latency histogram bucket upper bounds in seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[Any]) -> str:
+    return ",".join(f'{name}="{_escape(str(value))}"' for name, value in zip(names, values))
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class MetricsCollector:
+    """
+    Thread-safe metrics aggregated from request hook events.
+    
+    One collector can be attached to any number of sync and async clients.
+    """
+    
+    def __init__(self, namespace: str = "mazalbot", buckets: Sequence[float] = DEFAULT_BUCKETS):
+        """
+        Create an empty collector.
+        
+        Args:
+            namespace: Prefix for every metric name
+            buckets: Latency histogram bucket upper bounds in seconds
+        """
+        self.namespace = namespace
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        self._requests: Dict[Tuple[str, str, str], int] = {}
+        self._retries: Dict[Tuple[str, str, str], int] = {}
+        self._errors: Dict[Tuple[str, str], int] = {}
+        self._bytes_sent: Dict[Tuple[str, str], int] = {}
+        self._bytes_received: Dict[Tuple[str, str], int] = {}
+        self._in_flight: Dict[Tuple[str, str], int] = {}
+        # (method, route) -> [per-bucket counts..., +Inf count], sum of latencies
+        self._latency: Dict[Tuple[str, str], Tuple[List[int], List[float]]] = {}
+        self._clients: List[Any] = []
+    
+    def attach(self, client: Any) -> None:
+        """
+        Start collecting metrics from a MazalbotClient or AsyncMazalbotClient.
+        
+        Args:
+            client: Client to instrument
+        """
+        client.add_request_hook(self)
+        self._clients.append(client)
+    
+    def detach(self, client: Optional[Any] = None) -> None:
+        """
+        Stop collecting metrics from one client, or from all attached clients.
+        
+        Args:
+            client: Client to stop instrumenting; all clients if omitted
+        """
+        for attached in list(self._clients):
+            if client is None or attached is client:
+                attached.remove_request_hook(self)
+                self._clients.remove(attached)
+    
+    def __call__(self, event: RequestEvent) -> None:
+        key = (event.method, event.route)
+        with self._lock:
+            if event.kind == "request":
+                self._in_flight[key] = self._in_flight.get(key, 0) + 1
+                self._bytes_sent[key] = self._bytes_sent.get(key, 0) + event.bytes_sent
+            elif event.kind == "response":
+                self._in_flight[key] = max(0, self._in_flight.get(key, 0) - 1)
+                status_key = (event.method, event.route, str(event.status_code))
+                self._requests[status_key] = self._requests.get(status_key, 0) + 1
+                self._bytes_received[key] = self._bytes_received.get(key, 0) + event.bytes_received
+                if event.latency is not None:
+                    counts, total = self._latency.setdefault(key, ([0] * (len(self.buckets) + 1), [0.0]))
+                    counts[bisect.bisect_left(self.buckets, event.latency)] += 1
+                    total[0] += event.latency
+            elif event.kind == "retry":
+                if event.status_code is None:
+                    # Network failure: no response event closes the attempt
+                    self._in_flight[key] = max(0, self._in_flight.get(key, 0) - 1)
+                reason = str(event.status_code) if event.status_code is not None else "network"
+                retry_key = (event.method, event.route, reason)
+                self._retries[retry_key] = self._retries.get(retry_key, 0) + 1
+            elif event.kind == "error":
+                if event.status_code == 0:
+                    # The attempt ended without a response: network failure, cancellation
+                    # or an exception escaping the client
+                    self._in_flight[key] = max(0, self._in_flight.get(key, 0) - 1)
+                self._errors[key] = self._errors.get(key, 0) + 1
+    
+    def reset(self) -> None:
+        """Clear every metric (attached clients stay attached)"""
+        with self._lock:
+            for metric in (
+                self._requests, self._retries, self._errors,
+                self._bytes_sent, self._bytes_received, self._in_flight, self._latency
+            ):
+                metric.clear()
+    
+    def render(self) -> str:
+        """
+        Render the metrics in the Prometheus text exposition format.
+        
+        Returns:
+            Exposition text, ending with a newline
+        """
+        prefix = self.namespace
+        lines: List[str] = []
+        
+        def family(name: str, help_text: str, kind: str, label_names: Sequence[str], values: Dict) -> None:
+            lines.append(f"# HELP {prefix}_{name} {help_text}")
+            lines.append(f"# TYPE {prefix}_{name} {kind}")
+            for key in sorted(values):
+                lines.append(f"{prefix}_{name}{{{_labels(label_names, key)}}} {values[key]}")
+        
+        with self._lock:
+            family(
+                "requests_total", "HTTP responses received, by status code.", "counter",
+                ("method", "route", "status"), self._requests
+            )
+            family(
+                "request_retries_total", "Retries scheduled, by triggering status or network failure.", "counter",
+                ("method", "route", "reason"), self._retries
+            )
+            family(
+                "request_failures_total", "Requests that failed after all retries.", "counter",
+                ("method", "route"), self._errors
+            )
+            family(
+                "request_bytes_total", "Request body bytes sent.", "counter",
+                ("method", "route"), self._bytes_sent
+            )
+            family(
+                "response_bytes_total", "Response body bytes received.", "counter",
+                ("method", "route"), self._bytes_received
+            )
+            family(
+                "requests_in_flight", "Requests currently waiting for a response.", "gauge",
+                ("method", "route"), self._in_flight
+            )
+            
+            name = f"{prefix}_request_duration_seconds"
+            lines.append(f"# HELP {name} Time from sending a request to receiving its response.")
+            lines.append(f"# TYPE {name} histogram")
+            for key in sorted(self._latency):
+                counts, total = self._latency[key]
+                labels = _labels(("method", "route"), key)
+                cumulative = 0
+                for bound, count in zip(self.buckets, counts):
+                    cumulative += count
+                    lines.append(f'{name}_bucket{{{labels},le="{_number(bound)}"}} {cumulative}')
+                cumulative += counts[-1]
+                lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {cumulative}')
+                lines.append(f"{name}_sum{{{labels}}} {total[0]!r}")
+                lines.append(f"{name}_count{{{labels}}} {cumulative}")
+        
+        return "\n".join(lines) + "\n"
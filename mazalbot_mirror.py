@@ -0,0 +1,522 @@
+"""
+Local SQLite mirror of a Mazalbot inventory.
+
+InventoryMirror keeps a DiamondData-shaped SQLite table in sync with the API
+so that reporting jobs can read the inventory locally instead of paging
+through get_all_stones on every run. A full sync loads everything once; later
+refreshes diff the remote inventory against the mirror by id (falling back to
+stock_number) and content hash, and only write rows that changed. Stones that
+disappear remotely are kept as tombstones so downstream jobs can see what was
+deleted. Writes made through the attached client pass straight through to the
+mirror.
+
+Example usage:
+```python
+client = MazalbotClient(user_id=123456789)
+mirror = InventoryMirror(client, "inventory.db")
+mirror.full_sync()
+
+# Served from SQLite, no network
+response = mirror.search_diamonds({"shape": "Round", "min_weight": 1.0})
+
+# Nightly: fetch and apply only what changed
+report = mirror.refresh()
+print(f"{report.added} added, {report.updated} updated, {report.deleted} deleted")
+```
+"""
+
+import json
+import logging
+import math
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from mazalbot_client import (
+    ApiResponse,
+    DiamondData,
+    MazalbotClient,
+    WriteEvent,
+    diamond_content_hash,
+    _as_records,
+    parse_search_criteria,
+)
+
+
+# Column name -> SQLite type; mirrors DiamondData
+_COLUMNS: Dict[str, str] = {
+    "id": "TEXT PRIMARY KEY",
+    "stock_number": "TEXT",
+    "shape": "TEXT COLLATE NOCASE",
+    "weight": "REAL",
+    "carat": "REAL",
+    "color": "TEXT COLLATE NOCASE",
+    "clarity": "TEXT COLLATE NOCASE",
+    "cut": "TEXT COLLATE NOCASE",
+    "polish": "TEXT COLLATE NOCASE",
+    "symmetry": "TEXT COLLATE NOCASE",
+    "price_per_carat": "REAL",
+    "price": "REAL",
+    "status": "TEXT COLLATE NOCASE",
+    "picture": "TEXT",
+    "certificate_url": "TEXT",
+    "certificate_number": "TEXT",
+    "lab": "TEXT COLLATE NOCASE",
+    "fluorescence": "TEXT COLLATE NOCASE",
+    "owners": "TEXT",
+    "owner_id": "INTEGER"
+}
+
+_FIELDS = list(_COLUMNS)
+
+_INDEXED_COLUMNS = ("stock_number", "shape", "color", "clarity", "weight", "price", "price_per_carat")
+
+# Prefix for ids of stones added locally before the server assigned one
+_LOCAL_ID_PREFIX = "local:"
+
+
+@dataclass
+class SyncReport:
+    """Outcome of a mirror sync"""
+    success: bool
+    added: int = 0
+    updated: int = 0
+    deleted: int = 0
+    unchanged: int = 0
+    elapsed: float = 0.0
+    error: Optional[str] = None
+
+
+class InventoryMirror:
+    """
+    SQLite mirror of the inventory of a MazalbotClient's user.
+    
+    The mirror is thread-safe. Rows deleted remotely or through the client
+    are kept as tombstones (``deleted = 1``) until purge_tombstones is
+    called; they are excluded from all reads.
+    """
+    
+    def __init__(
+        self,
+        client: MazalbotClient,
+        path: str = ":memory:",
+        attach: bool = True
+    ):
+        """
+        Open (or create) the mirror database.
+        
+        Args:
+            client: Client used to fetch the inventory
+            path: SQLite database file, or ":memory:"
+            attach: Pass writes made through the client through to the mirror
+        """
+        self.client = client
+        self.path = path
+        self.logger = logging.getLogger("mazalbot_client")
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._create_schema()
+        
+        self._attached = attach
+        if attach:
+            client.add_write_listener(self._on_write)
+    
+    def _create_schema(self) -> None:
+        columns = ",\n".join(f"{name} {sql_type}" for name, sql_type in _COLUMNS.items())
+        with self._lock, self._conn:
+            self._conn.execute(f"""
+                CREATE TABLE IF NOT EXISTS diamonds (
+                    {columns},
+                    content_hash TEXT NOT NULL,
+                    deleted INTEGER NOT NULL DEFAULT 0,
+                    updated_at REAL NOT NULL
+                )
+            """)
+            for column in _INDEXED_COLUMNS:
+                self._conn.execute(
+                    f"CREATE INDEX IF NOT EXISTS idx_diamonds_{column} "
+                    f"ON diamonds ({column}) WHERE deleted = 0"
+                )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS mirror_meta (key TEXT PRIMARY KEY, value TEXT)"
+            )
+    
+    def close(self) -> None:
+        """Detach from the client and close the database."""
+        if self._attached:
+            self.client.remove_write_listener(self._on_write)
+            self._attached = False
+        with self._lock:
+            self._conn.close()
+    
+    def __enter__(self) -> "InventoryMirror":
+        return self
+    
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+    
+    # Sync
+    
+    def full_sync(self, page_size: int = 500, workers: int = 8) -> SyncReport:
+        """
+        Replace the mirror's contents with the full remote inventory.
+        
+        Args:
+            page_size: Diamonds per page when fetching
+            workers: Pages fetched concurrently
+            
+        Returns:
+            SyncReport; on failure the mirror is left untouched
+        """
+        start = time.perf_counter()
+        fetched = self.client.fetch_all_diamonds(page_size=page_size, workers=workers)
+        if not fetched.success:
+            return SyncReport(success=False, error=fetched.error, elapsed=time.perf_counter() - start)
+        
+        now = time.time()
+        rows = [self._to_row(diamond, now) for diamond in fetched.diamonds]
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM diamonds")
+            self._conn.executemany(self._upsert_sql(), rows)
+            self._set_meta("last_full_sync", now)
+            self._set_meta("last_refresh", now)
+            self._set_meta("stale", 0)
+        
+        report = SyncReport(success=True, added=len(rows), elapsed=time.perf_counter() - start)
+        self.logger.info("Mirror full sync: %d diamonds in %.2fs", report.added, report.elapsed)
+        return report
+    
+    def refresh(self, page_size: int = 500, workers: int = 8) -> SyncReport:
+        """
+        Bring the mirror up to date, writing only rows that changed.
+        
+        The API has no change feed, so the remote inventory is still fetched,
+        but rows are compared by content hash and only new, changed and
+        deleted stones are written. Remote stones are matched to mirror rows
+        by id, or by stock_number for stones added locally before their id
+        was known. Stones missing remotely become tombstones.
+        
+        Args:
+            page_size: Diamonds per page when fetching
+            workers: Pages fetched concurrently
+            
+        Returns:
+            SyncReport; on a partial fetch nothing is changed
+        """
+        start = time.perf_counter()
+        fetched = self.client.fetch_all_diamonds(page_size=page_size, workers=workers)
+        if not fetched.success:
+            return SyncReport(success=False, error=fetched.error, elapsed=time.perf_counter() - start)
+        
+        with self._lock:
+            known: Dict[str, Tuple[str, int]] = {}
+            by_stock_number: Dict[str, str] = {}
+            for row in self._conn.execute("SELECT id, stock_number, content_hash, deleted FROM diamonds"):
+                known[row["id"]] = (row["content_hash"], row["deleted"])
+                if row["stock_number"]:
+                    by_stock_number[row["stock_number"]] = row["id"]
+            
+            report = SyncReport(success=True)
+            now = time.time()
+            seen = set()
+            upserts = []
+            replaced = []
+            for diamond in fetched.diamonds:
+                diamond_id = str(diamond.get("id", ""))
+                if not diamond_id:
+                    continue
+                seen.add(diamond_id)
+                
+                existing = known.get(diamond_id)
+                if existing is None:
+                    local_id = by_stock_number.get(diamond.get("stock_number") or "")
+                    if local_id is not None and local_id.startswith(_LOCAL_ID_PREFIX):
+                        replaced.append((local_id,))
+                        seen.add(local_id)
+                    report.added += 1
+                elif existing[0] != diamond_content_hash(diamond) or existing[1]:
+                    report.updated += 1
+                else:
+                    report.unchanged += 1
+                    continue
+                upserts.append(self._to_row(diamond, now))
+            
+            gone = [(now, diamond_id) for diamond_id, (_, deleted) in known.items()
+                    if diamond_id not in seen and not deleted]
+            report.deleted = len(gone)
+            
+            with self._conn:
+                self._conn.executemany("DELETE FROM diamonds WHERE id = ?", replaced)
+                self._conn.executemany(self._upsert_sql(), upserts)
+                self._conn.executemany(
+                    "UPDATE diamonds SET deleted = 1, updated_at = ? WHERE id = ?", gone
+                )
+                self._set_meta("last_refresh", now)
+                self._set_meta("stale", 0)
+        
+        report.elapsed = time.perf_counter() - start
+        self.logger.info(
+            "Mirror refresh: %d added, %d updated, %d deleted, %d unchanged in %.2fs",
+            report.added, report.updated, report.deleted, report.unchanged, report.elapsed
+        )
+        return report
+    
+    # Reads
+    
+    def get_diamond(self, diamond_id: str, as_records: bool = False) -> ApiResponse:
+        """
+        Get a diamond from the mirror.
+        
+        Args:
+            diamond_id: The ID of the diamond to retrieve
+            as_records: Return a compact DiamondRecord instead of a dict
+            
+        Returns:
+            ApiResponse containing the diamond data, or a 404 response
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM diamonds WHERE id = ? AND deleted = 0", (diamond_id,)
+            ).fetchone()
+        if row is None:
+            return ApiResponse(success=False, error="Diamond not found", status_code=404)
+        response = ApiResponse(success=True, data=self._from_row(row))
+        return _as_records(response) if as_records else response
+    
+    def get_diamonds(
+        self,
+        page: int = 1,
+        limit: int = 100,
+        filters: Optional[Dict[str, Any]] = None,
+        as_records: bool = False
+    ) -> ApiResponse:
+        """
+        Get a page of diamonds from the mirror, like MazalbotClient.get_diamonds.
+        
+        The response carries X-Total-Count and X-Total-Pages headers.
+        
+        Args:
+            page: Page number (1-based)
+            limit: Number of items per page
+            filters: Optional search criteria (see parse_search_criteria)
+            as_records: Return compact DiamondRecord objects instead of dicts
+            
+        Returns:
+            ApiResponse containing the list of diamonds
+        """
+        where, args = self._where(filters or {})
+        with self._lock:
+            total = self._conn.execute(f"SELECT COUNT(*) FROM diamonds WHERE {where}", args).fetchone()[0]
+            rows = self._conn.execute(
+                f"SELECT * FROM diamonds WHERE {where} ORDER BY rowid LIMIT ? OFFSET ?",
+                (*args, limit, (page - 1) * limit)
+            ).fetchall()
+        response = ApiResponse(
+            success=True,
+            data=[self._from_row(row) for row in rows],
+            headers={
+                "X-Total-Count": str(total),
+                "X-Total-Pages": str(max(1, math.ceil(total / limit)))
+            }
+        )
+        return _as_records(response) if as_records else response
+    
+    def search_diamonds(self, search_criteria: Dict[str, Any], as_records: bool = False) -> ApiResponse:
+        """
+        Search the mirror, like MazalbotClient.search_diamonds.
+        
+        Args:
+            search_criteria: Dictionary containing search parameters
+            as_records: Return compact DiamondRecord objects instead of dicts
+            
+        Returns:
+            ApiResponse containing the matching diamonds
+        """
+        where, args = self._where(search_criteria)
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT * FROM diamonds WHERE {where} ORDER BY rowid", args
+            ).fetchall()
+        response = ApiResponse(success=True, data=[self._from_row(row) for row in rows])
+        return _as_records(response) if as_records else response
+    
+    def iter_diamonds(self, filters: Optional[Dict[str, Any]] = None, batch_size: int = 1000) -> Iterator[DiamondData]:
+        """
+        Iterate over mirrored diamonds without loading them all at once.
+        
+        Args:
+            filters: Optional search criteria
+            batch_size: Rows read from SQLite per batch
+            
+        Yields:
+            DiamondData dictionaries
+        """
+        where, args = self._where(filters or {})
+        last_rowid = 0
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    f"SELECT rowid AS _rowid, * FROM diamonds WHERE {where} AND rowid > ? "
+                    f"ORDER BY rowid LIMIT ?",
+                    (*args, last_rowid, batch_size)
+                ).fetchall()
+            if not rows:
+                return
+            last_rowid = rows[-1]["_rowid"]
+            for row in rows:
+                yield self._from_row(row)
+    
+    @property
+    def stale(self) -> bool:
+        """
+        Whether a write made through the client could not be mirrored.
+        
+        Set when the client updates a stone the mirror does not have, so
+        its full row is unknown; cleared by full_sync and refresh.
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM mirror_meta WHERE key = 'stale'").fetchone()
+        return row is not None and row[0] == "1"
+    
+    def count(self) -> int:
+        """Number of live (non-deleted) diamonds in the mirror."""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM diamonds WHERE deleted = 0").fetchone()[0]
+    
+    def tombstones(self, since: Optional[float] = None) -> List[str]:
+        """
+        IDs of diamonds deleted remotely or through the client.
+        
+        Args:
+            since: Only return deletions recorded after this Unix timestamp
+            
+        Returns:
+            List of diamond IDs
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id FROM diamonds WHERE deleted = 1 AND updated_at > ?", (since or 0.0,)
+            ).fetchall()
+        return [row["id"] for row in rows]
+    
+    def purge_tombstones(self, older_than: Optional[float] = None) -> int:
+        """
+        Permanently remove tombstones.
+        
+        Args:
+            older_than: Only purge deletions recorded before this Unix timestamp
+            
+        Returns:
+            Number of rows removed
+        """
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "DELETE FROM diamonds WHERE deleted = 1 AND updated_at < ?",
+                (older_than if older_than is not None else time.time(),)
+            )
+        return cursor.rowcount
+    
+    # Write pass-through
+    
+    def _on_write(self, event: WriteEvent) -> None:
+        now = time.time()
+        with self._lock, self._conn:
+            if event.operation == "delete":
+                self._conn.execute(
+                    "UPDATE diamonds SET deleted = 1, updated_at = ? WHERE id = ?",
+                    (now, event.diamond_id)
+                )
+            elif event.operation == "update":
+                row = self._conn.execute(
+                    "SELECT * FROM diamonds WHERE id = ?", (event.diamond_id,)
+                ).fetchone()
+                if row is None:
+                    # Only the changed fields are known; a partial row would pass for the whole stone
+                    self.logger.warning(
+                        "Mirror has no diamond %s; update skipped, refresh() needed", event.diamond_id
+                    )
+                    self._set_meta("stale", 1)
+                    return
+                merged = self._from_row(row)
+                for changes in event.diamonds:
+                    merged.update({key: value for key, value in changes.items() if key in _COLUMNS})
+                merged["id"] = event.diamond_id
+                self._conn.execute(self._upsert_sql(), self._to_row(merged, now))
+            elif event.operation == "add":
+                # The server answers with [{"id": ..., "stock_number": ...}]
+                created = event.response.data if isinstance(event.response.data, list) else []
+                ids = {
+                    item.get("stock_number"): item.get("id")
+                    for item in created
+                    if isinstance(item, dict) and item.get("id")
+                }
+                rows = []
+                for diamond in event.diamonds:
+                    stock_number = diamond.get("stock_number")
+                    diamond_id = ids.get(stock_number) or diamond.get("id")
+                    if not diamond_id:
+                        if not stock_number:
+                            continue
+                        diamond_id = f"{_LOCAL_ID_PREFIX}{stock_number}"
+                    rows.append(self._to_row({**diamond, "id": str(diamond_id)}, now))
+                self._conn.executemany(self._upsert_sql(), rows)
+    
+    # Helpers
+    
+    def _set_meta(self, key: str, value: Any) -> None:
+        self._conn.execute(
+            "INSERT OR REPLACE INTO mirror_meta (key, value) VALUES (?, ?)", (key, str(value))
+        )
+    
+    @staticmethod
+    def _upsert_sql() -> str:
+        names = ", ".join(_FIELDS + ["content_hash", "deleted", "updated_at"])
+        placeholders = ", ".join("?" for _ in range(len(_FIELDS) + 3))
+        return f"INSERT OR REPLACE INTO diamonds ({names}) VALUES ({placeholders})"
+    
+    @staticmethod
+    def _to_row(diamond: DiamondData, now: float) -> Tuple[Any, ...]:
+        values = []
+        for name in _FIELDS:
+            value = diamond.get(name)
+            if name == "owners" and value is not None:
+                value = json.dumps(value)
+            elif name == "id" and value is not None:
+                value = str(value)
+            values.append(value)
+        return (*values, diamond_content_hash(diamond), 0, now)
+    
+    @staticmethod
+    def _from_row(row: sqlite3.Row) -> DiamondData:
+        diamond: DiamondData = {}
+        for name in _FIELDS:
+            value = row[name]
+            if value is None:
+                continue
+            if name == "owners":
+                value = json.loads(value)
+            diamond[name] = value
+        return diamond
+    
+    @staticmethod
+    def _where(search_criteria: Dict[str, Any]) -> Tuple[str, List[Any]]:
+        """Translate search criteria into a SQL condition with the same semantics."""
+        search_filter = parse_search_criteria(search_criteria)
+        clauses = ["deleted = 0"]
+        args: List[Any] = []
+        for name, allowed in search_filter.equals.items():
+            if name not in _COLUMNS:
+                continue
+            clauses.append(f"{name} COLLATE NOCASE IN ({', '.join('?' for _ in allowed)})")
+            args.extend(allowed)
+        for name, (low, high) in search_filter.ranges.items():
+            if low is not None:
+                clauses.append(f"{name} >= ?")
+                args.append(low)
+            if high is not None:
+                clauses.append(f"{name} <= ?")
+                args.append(high)
+        return " AND ".join(clauses), args
@@ -0,0 +1,519 @@
+"""
+Reference price grid and mispricing detection.
+
+PriceGrid groups the inventory into cells of shape x color x clarity x
+carat band and keeps the price-per-carat quartiles (median and IQR) of
+every cell. Each stone is scored by how far its price per carat sits from
+its cell's median, in IQR units, and stones outside the Tukey fences of a
+large enough cell are reported as outliers.
+
+The grid is built with array operations (one sort of the whole inventory),
+so a million stones take a couple of seconds once loaded into a DiamondFrame.
+After that it is maintained incrementally: attached to a client, every add,
+update and delete adjusts only the affected cells, whose quartiles are
+recomputed lazily on the next query.
+
+Requires the optional ``numpy`` dependency (``pip install numpy``).
+
+Example usage:
+```python
+client = MazalbotClient(user_id=123456789)
+grid = PriceGrid(DiamondFrame.from_records(client.iter_diamonds(page_size=500)))
+grid.attach(client)
+
+cell = grid.cell("Round", "G", "VS1", 1.2)
+print(cell.median, cell.iqr)
+for outlier in grid.outliers()[:20]:
+    print(outlier.stock_number, outlier.direction, round(outlier.score, 1))
+```
+"""
+
+import bisect
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Literal, Mapping, Optional, Sequence, Tuple, Union
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
+
+from mazalbot_analytics import DEFAULT_CARAT_EDGES
+from mazalbot_client import DiamondData, MazalbotClient, WriteEvent
+from mazalbot_frame import DiamondFrame
+
+# (shape, color, clarity, carat band); None where the stone has no value
+CellKey = Tuple[Optional[str], Optional[str], Optional[str], Optional[str]]
+
+_CELL_FIELDS = ("shape", "color", "clarity")
+
+
+def _require_numpy() -> None:
+    if np is None:
+        raise ImportError("PriceGrid requires numpy. Install it with: pip install numpy")
+
+
+def _number(value: Any) -> float:
+    try:
+        return float(value) if value is not None else float("nan")
+    except (TypeError, ValueError):
+        return float("nan")
+
+
+def _quartiles(values: "np.ndarray", starts: "np.ndarray", sizes: "np.ndarray") -> Tuple["np.ndarray", ...]:
+    """Q1, median and Q3 of sorted runs, interpolated like numpy.percentile"""
+    results = []
+    present = sizes > 0
+    for fraction in (0.25, 0.5, 0.75):
+        column = np.full(len(sizes), np.nan)
+        position = starts[present] + (sizes[present] - 1) * fraction
+        low = np.floor(position).astype(np.int64)
+        high = np.ceil(position).astype(np.int64)
+        column[present] = values[low] + (values[high] - values[low]) * (position - low)
+        results.append(column)
+    return tuple(results)
+
+
+@dataclass
+class PriceCell:
+    """Price-per-carat statistics of one grid cell"""
+    shape: Optional[str]
+    color: Optional[str]
+    clarity: Optional[str]
+    carat_band: Optional[str]
+    count: int
+    median: Optional[float]
+    q1: Optional[float]
+    q3: Optional[float]
+    
+    @property
+    def iqr(self) -> Optional[float]:
+        return self.q3 - self.q1 if self.q1 is not None and self.q3 is not None else None
+
+
+@dataclass
+class PriceOutlier:
+    """A stone priced outside its cell's fences"""
+    id: Optional[str]
+    stock_number: Optional[str]
+    cell: CellKey
+    price_per_carat: float
+    median: float
+    iqr: float
+    score: float
+    direction: Literal["under", "over"]
+
+
+class PriceGrid:
+    """
+    Incrementally maintained price-per-carat grid.
+    
+    Thread-safe. Stones are tracked by id (stock_number when a stone has no
+    id yet), so updates and deletes find the cell a stone was in.
+    """
+    
+    def __init__(
+        self,
+        inventory: Union[DiamondFrame, Iterable[DiamondData]],
+        carat_edges: Sequence[float] = DEFAULT_CARAT_EDGES,
+        min_cell_size: int = 5
+    ):
+        """
+        Build the grid.
+        
+        Args:
+            inventory: The inventory as a DiamondFrame or DiamondData dicts
+            carat_edges: Ascending carat band lower bounds
+            min_cell_size: Cells with fewer priced stones are never used to
+                flag outliers
+        """
+        _require_numpy()
+        frame = inventory if isinstance(inventory, DiamondFrame) else DiamondFrame.from_records(inventory)
+        self.carat_edges = tuple(carat_edges)
+        self.min_cell_size = min_cell_size
+        self._edges = np.asarray(self.carat_edges, dtype=np.float64)
+        self._band_labels = [
+            f"{low:.2f}-{high:.2f}" for low, high in zip(self.carat_edges, self.carat_edges[1:])
+        ] + [f"{self.carat_edges[-1]:.2f}+"]
+        self.logger = logging.getLogger("mazalbot_client")
+        self._lock = threading.RLock()
+        self._client: Optional[MazalbotClient] = None
+        self._build(frame)
+    
+    # Construction
+    
+    def _build(self, frame: DiamondFrame) -> None:
+        size = len(frame)
+        ppc = frame.numeric["price_per_carat"].copy()
+        weight = frame.numeric["weight"].copy()
+        with np.errstate(invalid="ignore", divide="ignore"):
+            derived = frame.numeric["price"] / weight
+        missing = np.isnan(ppc)
+        ppc[missing] = derived[missing]
+        ppc[~np.isfinite(ppc)] = np.nan
+        
+        banded = frame.add_bands("carat_band", "weight", self.carat_edges)
+        groups, keys = banded.group_codes(list(_CELL_FIELDS) + ["carat_band"])
+        self._cells: List[CellKey] = [tuple(key) for key in keys]
+        self._cell_index: Dict[CellKey, int] = {key: index for index, key in enumerate(self._cells)}
+        
+        # Per-row state; arrays grow by doubling as stones are added
+        self._size = size
+        self._row_cell = groups.astype(np.int64)
+        self._ppc = ppc
+        self._weight = weight
+        self._ids = frame.ids.copy()
+        self._stock_numbers = frame.stock_numbers.copy()
+        self._rows: Dict[str, int] = {}
+        for row, (diamond_id, stock_number) in enumerate(zip(self._ids, self._stock_numbers)):
+            key = diamond_id if diamond_id is not None else stock_number
+            if key is not None:
+                self._rows[str(key)] = row
+        
+        # One sort gives every cell's values as a contiguous sorted run
+        valid = ~np.isnan(ppc)
+        valid_cells = self._row_cell[valid]
+        valid_values = ppc[valid]
+        order = np.lexsort((valid_values, valid_cells))
+        sorted_cells = valid_cells[order]
+        sorted_values = valid_values[order]
+        cell_ids = np.arange(len(self._cells))
+        starts = np.searchsorted(sorted_cells, cell_ids, side="left")
+        sizes = np.searchsorted(sorted_cells, cell_ids, side="right") - starts
+        self._q1, self._median, self._q3 = _quartiles(sorted_values, starts, sizes)
+        self._count = sizes.astype(np.int64)
+        # Cell -> sorted values; a cell becomes a list once it is modified
+        self._cell_values: List[Union["np.ndarray", List[float]]] = [
+            sorted_values[start:start + count] for start, count in zip(starts, sizes)
+        ]
+        self._dirty: set = set()
+    
+    def _band(self, weight: float) -> Optional[str]:
+        if np.isnan(weight):
+            return None
+        index = int(np.searchsorted(self._edges, weight, side="right")) - 1
+        return self._band_labels[index] if index >= 0 else None
+    
+    def _cell_for(self, values: Mapping[str, Any], weight: float) -> int:
+        key = tuple(
+            str(values[name]) if values.get(name) is not None else None for name in _CELL_FIELDS
+        ) + (self._band(weight),)
+        index = self._cell_index.get(key)
+        if index is None:
+            index = len(self._cells)
+            self._cells.append(key)
+            self._cell_index[key] = index
+            self._cell_values.append([])
+            self._q1 = np.append(self._q1, np.nan)
+            self._median = np.append(self._median, np.nan)
+            self._q3 = np.append(self._q3, np.nan)
+            self._count = np.append(self._count, 0)
+        return index
+    
+    # Incremental maintenance
+    
+    def _cell_list(self, cell: int) -> List[float]:
+        values = self._cell_values[cell]
+        if not isinstance(values, list):
+            values = self._cell_values[cell] = values.tolist()
+        return values
+    
+    def _insert_value(self, cell: int, value: float) -> None:
+        if not np.isnan(value):
+            bisect.insort(self._cell_list(cell), value)
+            self._dirty.add(cell)
+    
+    def _remove_value(self, cell: int, value: float) -> None:
+        if not np.isnan(value):
+            values = self._cell_list(cell)
+            position = bisect.bisect_left(values, value)
+            if position < len(values) and values[position] == value:
+                del values[position]
+            self._dirty.add(cell)
+    
+    def _grow(self) -> None:
+        capacity = max(16, 2 * len(self._row_cell))
+        self._row_cell = np.resize(self._row_cell, capacity)
+        self._ppc = np.resize(self._ppc, capacity)
+        self._weight = np.resize(self._weight, capacity)
+        self._ids = np.resize(self._ids, capacity)
+        self._stock_numbers = np.resize(self._stock_numbers, capacity)
+    
+    @staticmethod
+    def _price_per_carat(values: Mapping[str, Any], weight: float) -> float:
+        ppc = _number(values.get("price_per_carat"))
+        if np.isnan(ppc) and weight > 0:
+            ppc = _number(values.get("price")) / weight
+        return ppc if np.isfinite(ppc) else float("nan")
+    
+    def add(self, diamond: Mapping[str, Any]) -> None:
+        """
+        Add a stone, or replace it if a stone with its id is already tracked.
+        
+        Args:
+            diamond: DiamondData of the stone
+        """
+        key = diamond.get("id") if diamond.get("id") is not None else diamond.get("stock_number")
+        with self._lock:
+            if key is not None and str(key) in self._rows:
+                self.remove(str(key))
+            weight = _number(diamond.get("weight"))
+            ppc = self._price_per_carat(diamond, weight)
+            cell = self._cell_for(diamond, weight)
+            if self._size == len(self._row_cell):
+                self._grow()
+            row = self._size
+            self._size += 1
+            self._row_cell[row] = cell
+            self._ppc[row] = ppc
+            self._weight[row] = weight
+            self._ids[row] = str(diamond["id"]) if diamond.get("id") is not None else None
+            self._stock_numbers[row] = diamond.get("stock_number")
+            if key is not None:
+                self._rows[str(key)] = row
+            self._insert_value(cell, ppc)
+    
+    def update(self, diamond_id: str, fields: Mapping[str, Any]) -> None:
+        """
+        Apply changed fields to a tracked stone.
+        
+        Only the changed fields are known, so an untracked stone is skipped
+        rather than added as a partial row.
+        
+        Args:
+            diamond_id: ID (or stock number) of the stone
+            fields: Changed fields; missing fields keep their values
+        """
+        with self._lock:
+            row = self._rows.get(str(diamond_id))
+            if row is None:
+                self.logger.debug("Price grid has no diamond %s; update skipped", diamond_id)
+                return
+            old_cell = int(self._row_cell[row])
+            old_ppc = float(self._ppc[row])
+            shape, color, clarity, _ = self._cells[old_cell]
+            current = {"shape": shape, "color": color, "clarity": clarity}
+            current.update({name: fields[name] for name in _CELL_FIELDS if name in fields})
+            
+            weight = float(self._weight[row])
+            if "weight" in fields:
+                weight = _number(fields["weight"])
+            # A weight change alone keeps the price per carat
+            if "price_per_carat" in fields or "price" in fields:
+                ppc = self._price_per_carat(fields, weight)
+            else:
+                ppc = old_ppc
+            cell = self._cell_for(current, weight)
+            
+            if cell != old_cell or not (ppc == old_ppc or (np.isnan(ppc) and np.isnan(old_ppc))):
+                self._remove_value(old_cell, old_ppc)
+                self._insert_value(cell, ppc)
+            self._row_cell[row] = cell
+            self._ppc[row] = ppc
+            self._weight[row] = weight
+            if "stock_number" in fields:
+                self._stock_numbers[row] = fields["stock_number"]
+    
+    def remove(self, diamond_id: str) -> None:
+        """
+        Stop tracking a stone.
+        
+        Args:
+            diamond_id: ID (or stock number) of the stone
+        """
+        with self._lock:
+            row = self._rows.pop(str(diamond_id), None)
+            if row is None:
+                return
+            self._remove_value(int(self._row_cell[row]), float(self._ppc[row]))
+            self._row_cell[row] = -1
+            self._ppc[row] = np.nan
+    
+    def attach(self, client: MazalbotClient) -> None:
+        """
+        Keep the grid up to date with writes made through a client.
+        
+        Args:
+            client: Client to follow
+        """
+        self.detach()
+        self._client = client
+        client.add_write_listener(self._on_write)
+    
+    def detach(self) -> None:
+        """Stop following the attached client."""
+        if self._client is not None:
+            self._client.remove_write_listener(self._on_write)
+            self._client = None
+    
+    def _on_write(self, event: WriteEvent) -> None:
+        if event.operation == "delete" and event.diamond_id is not None:
+            self.remove(event.diamond_id)
+        elif event.operation == "update" and event.diamond_id is not None:
+            for fields in event.diamonds or [{}]:
+                self.update(event.diamond_id, fields)
+        elif event.operation == "add":
+            # Take server-assigned ids from the response when it lists them in order
+            created = event.response.data
+            if isinstance(created, dict):
+                created = [created] if len(event.diamonds) == 1 else []
+            elif not isinstance(created, list):
+                created = []
+            for index, diamond in enumerate(event.diamonds):
+                if diamond.get("id") is None and index < len(created) and isinstance(created[index], dict):
+                    if created[index].get("id") is not None:
+                        diamond = {**diamond, "id": created[index]["id"]}
+                self.add(diamond)
+    
+    # Queries
+    
+    def _refresh(self) -> None:
+        for cell in self._dirty:
+            values = np.asarray(self._cell_values[cell], dtype=np.float64)
+            q1, median, q3 = _quartiles(values, np.zeros(1, dtype=np.int64), np.array([len(values)]))
+            self._q1[cell], self._median[cell], self._q3[cell] = q1[0], median[0], q3[0]
+            self._count[cell] = len(values)
+        self._dirty.clear()
+    
+    def _make_cell(self, cell: int) -> PriceCell:
+        shape, color, clarity, band = self._cells[cell]
+        
+        def value(array: "np.ndarray") -> Optional[float]:
+            return None if np.isnan(array[cell]) else float(array[cell])
+        
+        return PriceCell(
+            shape, color, clarity, band, int(self._count[cell]),
+            value(self._median), value(self._q1), value(self._q3)
+        )
+    
+    def cell(self, shape: str, color: str, clarity: str, weight: float) -> Optional[PriceCell]:
+        """
+        Look up the cell a stone with these grades would fall in.
+        
+        Args:
+            shape: Shape
+            color: Color grade
+            clarity: Clarity grade
+            weight: Carat weight
+            
+        Returns:
+            PriceCell, or None if no stone has been seen in that cell
+        """
+        key = (shape, color, clarity, self._band(_number(weight)))
+        with self._lock:
+            index = self._cell_index.get(key)
+            if index is None:
+                return None
+            self._refresh()
+            return self._make_cell(index)
+    
+    def cells(self, min_count: int = 1) -> List[PriceCell]:
+        """
+        All cells with at least min_count priced stones.
+        
+        Args:
+            min_count: Minimum number of priced stones
+            
+        Returns:
+            List of PriceCell, largest first
+        """
+        with self._lock:
+            self._refresh()
+            indices = np.flatnonzero(self._count >= min_count)
+            indices = indices[np.argsort(-self._count[indices], kind="stable")]
+            return [self._make_cell(int(index)) for index in indices]
+    
+    def scores(self) -> Tuple["np.ndarray", "np.ndarray"]:
+        """
+        Score every tracked stone against its cell.
+        
+        The score is (price per carat - cell median) / cell IQR, with the
+        IQR floored at 1% of the median so tight cells do not blow up.
+        
+        Returns:
+            Tuple of (row ids as an object array, float scores; NaN where a
+            stone has no price or its cell is smaller than min_cell_size)
+        """
+        with self._lock:
+            self._refresh()
+            live = np.flatnonzero(self._row_cell[:self._size] >= 0)
+            cells = self._row_cell[live]
+            median = self._median[cells]
+            scale = np.maximum(self._q3[cells] - self._q1[cells], np.abs(median) * 0.01)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                scores = (self._ppc[live] - median) / scale
+            scores[self._count[cells] < self.min_cell_size] = np.nan
+            return self._ids[live], scores
+    
+    def outliers(self, fence: float = 1.5) -> List[PriceOutlier]:
+        """
+        Stones priced outside their cell's Tukey fences.
+        
+        A stone is flagged when its price per carat is below
+        Q1 - fence x IQR or above Q3 + fence x IQR of a cell with at least
+        min_cell_size priced stones.
+        
+        Args:
+            fence: Fence width in IQRs (1.5 is the usual choice, 3 for only
+                extreme outliers)
+                
+        Returns:
+            List of PriceOutlier, most extreme first
+        """
+        with self._lock:
+            self._refresh()
+            live = np.flatnonzero(self._row_cell[:self._size] >= 0)
+            cells = self._row_cell[live]
+            ppc = self._ppc[live]
+            q1, q3, median = self._q1[cells], self._q3[cells], self._median[cells]
+            iqr = q3 - q1
+            with np.errstate(invalid="ignore"):
+                eligible = (self._count[cells] >= self.min_cell_size) & ~np.isnan(ppc)
+                low = eligible & (ppc < q1 - fence * iqr)
+                high = eligible & (ppc > q3 + fence * iqr)
+            flagged = np.flatnonzero(low | high)
+            scale = np.maximum(iqr[flagged], np.abs(median[flagged]) * 0.01)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                scores = (ppc[flagged] - median[flagged]) / scale
+            order = np.argsort(-np.abs(scores), kind="stable")
+            return [
+                PriceOutlier(
+                    id=self._ids[live[flagged[index]]],
+                    stock_number=self._stock_numbers[live[flagged[index]]],
+                    cell=self._cells[int(cells[flagged[index]])],
+                    price_per_carat=float(ppc[flagged[index]]),
+                    median=float(median[flagged[index]]),
+                    iqr=float(iqr[flagged[index]]),
+                    score=float(scores[index]),
+                    direction="over" if high[flagged[index]] else "under"
+                )
+                for index in order
+            ]
+    
+    def score(self, diamond: Mapping[str, Any]) -> Optional[float]:
+        """
+        Score a stone (tracked or not) against the grid.
+        
+        Args:
+            diamond: DiamondData of the stone
+            
+        Returns:
+            Score in IQR units, or None if the stone has no price or its cell
+            has fewer than min_cell_size priced stones
+        """
+        weight = _number(diamond.get("weight"))
+        ppc = self._price_per_carat(diamond, weight)
+        key = tuple(
+            str(diamond[name]) if diamond.get(name) is not None else None for name in _CELL_FIELDS
+        ) + (self._band(weight),)
+        with self._lock:
+            index = self._cell_index.get(key)
+            if index is None or np.isnan(ppc):
+                return None
+            self._refresh()
+            if self._count[index] < self.min_cell_size:
+                return None
+            median = self._median[index]
+            scale = max(self._q3[index] - self._q1[index], abs(median) * 0.01)
+            return float((ppc - median) / scale) if scale > 0 else None
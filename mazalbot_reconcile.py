@@ -0,0 +1,275 @@
+"""
+Reconcile a Mazalbot inventory with a desired feed, sending only the changes.
+
+plan_reconcile compares the desired inventory (e.g. a supplier feed read
+with mazalbot_ingest) with the current remote one, keyed by stock_number.
+Each matched pair is compared as one tuple of values over the fields the
+feed provides, so fields only the server fills in do not count as changes
+and an unchanged stone costs a single C-level tuple comparison (1 == 1.0,
+so numbers need no normalising); only stones that differ are diffed field
+by field with the same value normalisation as diamond_content_hash.
+reconcile then applies the plan with upload_diamonds, update_diamonds
+(sending only the changed fields) and delete_diamonds.
+
+Example usage:
+```python
+client = MazalbotClient(user_id=123456789)
+with open("feed.csv", newline="") as feed:
+    desired = [diamond for diamond, _ in map(normalise_row, csv.DictReader(feed)) if diamond]
+
+report = reconcile(client, desired)
+print(f"{report.plan.added} added, {report.plan.updated} updated, "
+      f"{report.plan.deleted} deleted, {report.plan.unchanged} unchanged")
+
+# Compare against a local mirror instead of fetching, and only preview
+plan = plan_reconcile(desired, mirror.iter_diamonds())
+```
+"""
+
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from mazalbot_client import (
+    BatchResult,
+    DiamondData,
+    MazalbotClient,
+    UploadResult,
+)
+
+
+@dataclass
+class ReconcilePlan:
+    """Changes needed to turn the current inventory into the desired one"""
+    adds: List[DiamondData] = field(default_factory=list)
+    updates: List[Tuple[str, DiamondData]] = field(default_factory=list)
+    deletes: List[str] = field(default_factory=list)
+    unchanged: int = 0
+    # Desired stones without a stock_number, and stock numbers listed twice
+    unkeyed: int = 0
+    duplicates: List[str] = field(default_factory=list)
+    # IDs of remote stones sharing a stock_number with an earlier remote stone
+    remote_duplicates: List[str] = field(default_factory=list)
+    elapsed: float = 0.0
+    
+    @property
+    def added(self) -> int:
+        return len(self.adds)
+    
+    @property
+    def updated(self) -> int:
+        return len(self.updates)
+    
+    @property
+    def deleted(self) -> int:
+        return len(self.deletes)
+    
+    @property
+    def changes(self) -> int:
+        return self.added + self.updated + self.deleted
+
+
+@dataclass
+class ReconcileReport:
+    """Outcome of reconcile"""
+    success: bool
+    plan: ReconcilePlan = field(default_factory=ReconcilePlan)
+    upload: Optional[UploadResult] = None
+    update: Optional[BatchResult] = None
+    delete: Optional[BatchResult] = None
+    dry_run: bool = False
+    elapsed: float = 0.0
+    error: Optional[str] = None
+
+
+# Never compared or sent as changes (see diamond_content_hash)
+_IDENTITY_FIELDS = frozenset(("id", "owners", "owner_id"))
+
+
+def _canonical(value: Any) -> Any:
+    # Same normalisation as diamond_content_hash
+    if value is None or value == "":
+        return None
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return repr(float(value))
+    return str(value)
+
+
+def _stock_key(diamond: DiamondData) -> Optional[str]:
+    stock_number = diamond.get("stock_number")
+    if stock_number is None:
+        return None
+    stock_number = str(stock_number).strip()
+    return stock_number or None
+
+
+def plan_reconcile(
+    desired: Iterable[DiamondData],
+    current: Iterable[DiamondData],
+    fields: Optional[Sequence[str]] = None,
+    delete_missing: bool = True
+) -> ReconcilePlan:
+    """
+    Work out the adds, updates and deletes that reconcile two inventories.
+    
+    Args:
+        desired: The inventory the account should end up with; read once
+        current: The remote inventory, e.g. BulkFetchResult.diamonds or
+            InventoryMirror.iter_diamonds(); read once
+        fields: Fields to compare. If omitted, each desired stone is compared
+            on the fields it has.
+        delete_missing: Delete remote stones whose stock_number is not in
+            the desired inventory, and every remote stone after the first
+            with the same stock_number. Remote stones without a stock_number
+            are never deleted.
+            
+    Returns:
+        ReconcilePlan; updates carry only the changed fields. Repeated remote
+        stock numbers are listed in remote_duplicates whether or not they
+        are deleted.
+    """
+    start = time.perf_counter()
+    plan = ReconcilePlan()
+    
+    # stock_number -> remote stone; only references, so this is cheap even for 1M rows
+    remote: Dict[str, DiamondData] = {}
+    for diamond in current:
+        key = _stock_key(diamond)
+        if key is None:
+            continue
+        if key not in remote:
+            remote[key] = diamond
+        elif diamond.get("id") is not None:
+            # Only the first is compared with the desired stone; later copies are extras
+            plan.remote_duplicates.append(diamond["id"])
+    
+    seen = set()
+    # Without explicit fields, compare on every field the feed has used so far;
+    # fields a stone lacks are ignored in its diff below
+    known = set()
+    names: Tuple[str, ...] = tuple(fields) if fields is not None else ()
+    for diamond in desired:
+        key = _stock_key(diamond)
+        if key is None:
+            plan.unkeyed += 1
+            continue
+        if key in seen:
+            plan.duplicates.append(key)
+            continue
+        seen.add(key)
+        
+        existing = remote.get(key)
+        if existing is None:
+            plan.adds.append(diamond)
+            continue
+        
+        if fields is None and not diamond.keys() <= known:
+            known.update(diamond.keys())
+            names = tuple(name for name in known if name not in _IDENTITY_FIELDS)
+        wanted = tuple(map(diamond.get, names))
+        have = tuple(map(existing.get, names))
+        if wanted == have:
+            plan.unchanged += 1
+            continue
+        
+        # Only stones that differ pay for a normalised field by field diff
+        changed = {
+            name: value for name, value, current_value in zip(names, wanted, have)
+            if _canonical(value) != _canonical(current_value) and (value is not None or name in diamond)
+        }
+        if not changed:
+            plan.unchanged += 1
+        elif existing.get("id") is not None:
+            plan.updates.append((existing["id"], changed))
+        else:
+            plan.unkeyed += 1
+    
+    if delete_missing:
+        plan.deletes = [
+            diamond["id"] for key, diamond in remote.items()
+            if key not in seen and diamond.get("id") is not None
+        ]
+        plan.deletes.extend(plan.remote_duplicates)
+    
+    plan.elapsed = time.perf_counter() - start
+    return plan
+
+
+def reconcile(
+    client: MazalbotClient,
+    desired: Iterable[DiamondData],
+    current: Optional[Iterable[DiamondData]] = None,
+    fields: Optional[Sequence[str]] = None,
+    delete_missing: bool = True,
+    dry_run: bool = False,
+    chunk_size: int = 500,
+    concurrency: int = 4,
+    max_failures: Optional[int] = None
+) -> ReconcileReport:
+    """
+    Bring the remote inventory in line with the desired one.
+    
+    Args:
+        client: Client of the account to reconcile
+        desired: The inventory the account should end up with
+        current: The remote inventory. If omitted it is fetched with
+            fetch_all_diamonds.
+        fields: Fields to compare (see plan_reconcile)
+        delete_missing: Delete remote stones missing from the desired inventory
+        dry_run: Only plan; nothing is sent
+        chunk_size: Stones per upload or bulk request
+        concurrency: Requests in flight at once
+        max_failures: Abort the updates or deletes once more than this many
+            stones have failed (see update_diamonds)
+            
+    Returns:
+        ReconcileReport with the plan and the result of each step
+    """
+    logger = logging.getLogger("mazalbot_client")
+    start = time.perf_counter()
+    report = ReconcileReport(success=False, dry_run=dry_run)
+    
+    if current is None:
+        fetched = client.fetch_all_diamonds()
+        if not fetched.success:
+            report.error = f"Could not fetch the current inventory: {fetched.error}"
+            report.elapsed = time.perf_counter() - start
+            return report
+        current = fetched.diamonds
+    
+    plan = plan_reconcile(desired, current, fields=fields, delete_missing=delete_missing)
+    report.plan = plan
+    logger.info(
+        "Reconcile plan: %d to add, %d to update, %d to delete, %d unchanged (%.2fs)",
+        plan.added, plan.updated, plan.deleted, plan.unchanged, plan.elapsed
+    )
+    if plan.remote_duplicates:
+        logger.warning(
+            "%d remote stone(s) repeat an earlier stock_number%s",
+            len(plan.remote_duplicates), " and will be deleted" if delete_missing else ""
+        )
+    
+    errors = []
+    if not dry_run:
+        if plan.adds:
+            report.upload = client.upload_diamonds(plan.adds, chunk_size=chunk_size, concurrency=concurrency)
+            if not report.upload.success:
+                errors.append(f"upload: {report.upload.error}")
+        if plan.updates:
+            report.update = client.update_diamonds(
+                plan.updates, concurrency=concurrency, chunk_size=chunk_size, max_failures=max_failures
+            )
+            if not report.update.success:
+                errors.append(f"update: {report.update.error}")
+        if plan.deletes:
+            report.delete = client.delete_diamonds(
+                plan.deletes, concurrency=concurrency, chunk_size=chunk_size, max_failures=max_failures
+            )
+            if not report.delete.success:
+                errors.append(f"delete: {report.delete.error}")
+    
+    report.success = not errors
+    report.error = "; ".join(errors) or None
+    report.elapsed = time.perf_counter() - start
+    return report
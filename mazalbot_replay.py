@@ -0,0 +1,422 @@
+"""
+Record and replay Mazalbot API traffic without a network.
+
+TrafficRecorder is a Transport (see mazalbot_client.Transport) that sends
+requests through a real ConnectionPool and appends every request/response
+pair, with its timing, to a JSON Lines log (gzip-compressed when the path
+ends in ``.gz``). TrafficReplayer is a Transport that answers requests from
+such a log instead of the network, either with the recorded latencies
+(scaled by ``speed``) or as fast as possible, so the client's
+serialisation, retry, rate-limit and cache paths can be profiled in
+isolation.
+
+replay_traffic drives a client through a recorded log, issuing each request
+at its original offset divided by ``speed``; the report's lag figures show
+when the client stops keeping up with the schedule.
+
+Example usage:
+```python
+# Record a session
+with TrafficRecorder("traffic.jsonl.gz") as recorder:
+    client = MazalbotClient(user_id=123456789, pool=recorder)
+    client.fetch_all_diamonds()
+    client.search_diamonds({"shape": "Round"})
+
+# Replay it offline at 10x speed
+with TrafficReplayer("traffic.jsonl.gz", speed=10.0) as replayer:
+    client = MazalbotClient(user_id=123456789, pool=replayer)
+    report = replay_traffic(client, "traffic.jsonl.gz", speed=10.0)
+    print(f"{report.requests} requests, max lag {report.max_lag:.3f}s")
+```
+"""
+
+import base64
+import gzip
+import json
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import IO, Any, Deque, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+from urllib.parse import urlencode, urlsplit
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from mazalbot_client import ConnectionPool, MazalbotClient, Transport, endpoint_route
+
+
+# Response headers worth keeping: the client reads these, the rest is noise
+RECORDED_HEADERS = (
+    "Content-Type",
+    "ETag",
+    "Last-Modified",
+    "Retry-After",
+    "X-RateLimit-Limit",
+    "X-RateLimit-Remaining",
+    "X-RateLimit-Reset",
+    "X-Total-Count",
+    "X-Total-Pages",
+)
+
+# Route -> client operation, so replayed reads go through the response cache
+_ROUTE_OPERATIONS = {
+    "/api/v1/get_stone/{id}": "get_diamond",
+    "/api/v1/get-report": "get_report",
+    "/api/v1/users/{id}/dashboard/stats": "get_dashboard_stats",
+    "/api/v1/users/{id}/inventory/by-shape": "get_inventory_by_shape",
+    "/api/v1/users/{id}/sales/recent": "get_recent_sales",
+}
+
+
+@dataclass
+class TrafficEntry:
+    """One recorded request and the response (or network error) it got"""
+    offset: float
+    method: str
+    path: str
+    params: List[Tuple[str, str]] = field(default_factory=list)
+    body: Optional[bytes] = None
+    status_code: int = 0
+    headers: Dict[str, str] = field(default_factory=dict)
+    content: bytes = b""
+    duration: float = 0.0
+    error: Optional[str] = None
+    
+    @property
+    def route(self) -> str:
+        return endpoint_route(self.path)
+
+
+def _encode_bytes(data: Optional[bytes]) -> Any:
+    if data is None:
+        return None
+    try:
+        return data.decode("utf-8")
+    except UnicodeDecodeError:
+        return {"b64": base64.b64encode(data).decode("ascii")}
+
+
+def _decode_bytes(value: Any) -> Optional[bytes]:
+    if value is None:
+        return None
+    if isinstance(value, dict):
+        return base64.b64decode(value["b64"])
+    return value.encode("utf-8")
+
+
+def _open_log(path: str, mode: str) -> IO[str]:
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+def _params_list(params: Any) -> List[Tuple[str, str]]:
+    """Flatten requests-style params into the (name, value) pairs sent on the wire"""
+    if not params:
+        return []
+    items = params.items() if isinstance(params, dict) else params
+    pairs = []
+    for name, value in items:
+        if value is None:
+            continue
+        values = value if isinstance(value, (list, tuple)) else [value]
+        pairs.extend((str(name), str(item)) for item in values)
+    return pairs
+
+
+def _params_dict(pairs: List[Tuple[str, str]]) -> Dict[str, Any]:
+    """Rebuild params from recorded pairs, keeping repeated names as lists"""
+    params: Dict[str, Any] = {}
+    for name, value in pairs:
+        if name in params:
+            existing = params[name]
+            params[name] = (existing if isinstance(existing, list) else [existing]) + [value]
+        else:
+            params[name] = value
+    return params
+
+
+def load_traffic(path: str) -> Iterator[TrafficEntry]:
+    """
+    Read a traffic log written by TrafficRecorder.
+    
+    Args:
+        path: Log file (``.gz`` logs are decompressed)
+        
+    Yields:
+        TrafficEntry objects in recorded order
+    """
+    with _open_log(path, "r") as log:
+        for line in log:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            yield TrafficEntry(
+                offset=record["t"],
+                method=record["m"],
+                path=record["p"],
+                params=[tuple(pair) for pair in record.get("q", [])],
+                body=_decode_bytes(record.get("b")),
+                status_code=record.get("s", 0),
+                headers=record.get("h", {}),
+                content=_decode_bytes(record.get("c")) or b"",
+                duration=record.get("d", 0.0),
+                error=record.get("e")
+            )
+
+
+class TrafficRecorder:
+    """
+    Transport that records every request it sends to a traffic log.
+    
+    Thread-safe; entries are written in the order responses arrive, each
+    with its offset from the start of the recording. Streamed responses
+    (stream_diamonds) are read in full so they can be recorded.
+    """
+    
+    def __init__(self, path: str, inner: Optional[Transport] = None):
+        """
+        Start a recording.
+        
+        Args:
+            path: Log file to write (truncated); a ``.gz`` suffix compresses it
+            inner: Transport that actually sends the requests. If omitted, the
+                recorder creates and owns a ConnectionPool.
+        """
+        self.path = path
+        self._owns_inner = inner is None
+        self.inner = inner if inner is not None else ConnectionPool()
+        self.entries = 0
+        self.closed = False
+        self._log = _open_log(path, "w")
+        self._lock = threading.Lock()
+        self._started = time.perf_counter()
+    
+    def request(self, method: str, url: str, **kwargs: Any) -> requests.Response:
+        offset = time.perf_counter() - self._started
+        record: Dict[str, Any] = {
+            "t": round(offset, 6),
+            "m": method,
+            "p": urlsplit(url).path,
+            "q": _params_list(kwargs.get("params")),
+        }
+        body = kwargs.get("data")
+        if body:
+            record["b"] = _encode_bytes(bytes(body))
+        
+        started = time.perf_counter()
+        try:
+            response = self.inner.request(method, url, **kwargs)
+            content = response.content
+        except requests.RequestException as e:
+            record["d"] = round(time.perf_counter() - started, 6)
+            record["e"] = str(e)
+            self._write(record)
+            raise
+        record["d"] = round(time.perf_counter() - started, 6)
+        record["s"] = response.status_code
+        record["h"] = {name: response.headers[name] for name in RECORDED_HEADERS if name in response.headers}
+        record["c"] = _encode_bytes(content)
+        self._write(record)
+        return response
+    
+    def _write(self, record: Dict[str, Any]) -> None:
+        line = json.dumps(record, separators=(",", ":"), ensure_ascii=False)
+        with self._lock:
+            if not self.closed:
+                self._log.write(line + "\n")
+                self.entries += 1
+    
+    def close(self) -> None:
+        """Finish the log and close the inner transport if the recorder owns it."""
+        with self._lock:
+            if self.closed:
+                return
+            self.closed = True
+            self._log.close()
+        if self._owns_inner:
+            self.inner.close()
+    
+    def __enter__(self) -> "TrafficRecorder":
+        return self
+    
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+
+class TrafficReplayer:
+    """
+    Transport that answers requests from a traffic log.
+    
+    A request is matched to a recorded one with the same method, path and
+    query parameters; failing that, to one with the same method and route
+    (so a request for a different stone still gets a get_stone response).
+    Each recorded response is served once, in recorded order, unless
+    ``loop`` is set. Unmatched requests raise requests.ConnectionError,
+    which the client treats as a network failure.
+    """
+    
+    def __init__(
+        self,
+        traffic: Union[str, Iterable[TrafficEntry]],
+        speed: Optional[float] = 1.0,
+        loop: bool = False
+    ):
+        """
+        Load a recording for replay.
+        
+        Args:
+            traffic: Log file path, or TrafficEntry objects
+            speed: Divide recorded latencies by this factor; None or 0 serves
+                responses immediately
+            loop: Serve recorded responses again once a match is used up
+        """
+        entries = list(load_traffic(traffic) if isinstance(traffic, str) else traffic)
+        self.speed = speed
+        self.loop = loop
+        self.served = 0
+        self.missed = 0
+        self.closed = False
+        self._lock = threading.Lock()
+        self._exact: Dict[Tuple[Any, ...], Deque[TrafficEntry]] = {}
+        self._by_route: Dict[Tuple[str, str], Deque[TrafficEntry]] = {}
+        for entry in entries:
+            self._exact.setdefault(self._key(entry.method, entry.path, entry.params), deque()).append(entry)
+            self._by_route.setdefault((entry.method, entry.route), deque()).append(entry)
+    
+    @staticmethod
+    def _key(method: str, path: str, params: List[Tuple[str, str]]) -> Tuple[Any, ...]:
+        return (method, path, tuple(sorted(params)))
+    
+    def _take(self, queue: Optional[Deque[TrafficEntry]]) -> Optional[TrafficEntry]:
+        if not queue:
+            return None
+        entry = queue.popleft()
+        if self.loop:
+            queue.append(entry)
+        return entry
+    
+    def request(self, method: str, url: str, **kwargs: Any) -> requests.Response:
+        if self.closed:
+            raise RuntimeError("Traffic replayer is closed")
+        path = urlsplit(url).path
+        params = _params_list(kwargs.get("params"))
+        with self._lock:
+            entry = self._take(self._exact.get(self._key(method, path, params)))
+            if entry is None:
+                entry = self._take(self._by_route.get((method, endpoint_route(path))))
+            if entry is None:
+                self.missed += 1
+            else:
+                self.served += 1
+        if entry is None:
+            raise requests.ConnectionError(f"No recorded response for {method} {path}")
+        
+        if self.speed and entry.duration > 0:
+            time.sleep(entry.duration / self.speed)
+        if entry.error is not None:
+            raise requests.ConnectionError(entry.error)
+        
+        response = requests.Response()
+        response.status_code = entry.status_code
+        response.headers = CaseInsensitiveDict(entry.headers)
+        response._content = entry.content
+        response._content_consumed = True
+        response.encoding = "utf-8"
+        response.url = f"{url}?{urlencode(params)}" if params else url
+        response.reason = "Replayed"
+        return response
+    
+    def close(self) -> None:
+        self.closed = True
+    
+    def __enter__(self) -> "TrafficReplayer":
+        return self
+    
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+
+@dataclass
+class ReplayReport:
+    """Outcome of replay_traffic"""
+    requests: int = 0
+    failures: int = 0
+    elapsed: float = 0.0
+    scheduled: float = 0.0
+    max_lag: float = 0.0
+    mean_lag: float = 0.0
+    
+    @property
+    def rate(self) -> float:
+        """Requests completed per second"""
+        return self.requests / self.elapsed if self.elapsed else 0.0
+
+
+def replay_traffic(
+    client: MazalbotClient,
+    traffic: Union[str, Iterable[TrafficEntry]],
+    speed: Optional[float] = 1.0,
+    workers: int = 8
+) -> ReplayReport:
+    """
+    Re-issue recorded requests through a client on the recorded schedule.
+    
+    Each request is sent through client._make_request, so it pays the same
+    encoding, retry, rate-limit, cache and hook costs as a real call. Point
+    the client at a TrafficReplayer to run without a network, or at a real
+    server to replay production traffic against it.
+    
+    Args:
+        client: Client to drive
+        traffic: Log file path, or TrafficEntry objects
+        speed: Schedule compression factor (10.0 replays an hour in six
+            minutes); None or 0 sends every request as soon as a worker is free
+        workers: Requests allowed in flight at once
+        
+    Returns:
+        ReplayReport; ``lag`` is how late requests were sent versus their
+        scheduled time, which grows once the client cannot keep up
+    """
+    entries = list(load_traffic(traffic) if isinstance(traffic, str) else traffic)
+    report = ReplayReport(requests=len(entries))
+    if not entries:
+        return report
+    
+    first = entries[0].offset
+    lags: List[float] = []
+    lock = threading.Lock()
+    start = time.perf_counter()
+    
+    def send(entry: TrafficEntry) -> bool:
+        due = (entry.offset - first) / speed if speed else 0.0
+        now = time.perf_counter() - start
+        if due > now:
+            time.sleep(due - now)
+        with lock:
+            lags.append(max(0.0, time.perf_counter() - start - due))
+        response = client._make_request(
+            method=entry.method,
+            endpoint=entry.path,
+            params=_params_dict(entry.params),
+            data=entry.body,
+            operation=_ROUTE_OPERATIONS.get(entry.route)
+        )
+        return response.success
+    
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(send, entries))
+    
+    report.elapsed = time.perf_counter() - start
+    report.scheduled = (entries[-1].offset - first) / speed if speed else 0.0
+    report.failures = results.count(False)
+    report.max_lag = max(lags)
+    report.mean_lag = sum(lags) / len(lags)
+    logging.getLogger("mazalbot_client").info(
+        "Replayed %d requests in %.2fs (%d failed, max lag %.3fs)",
+        report.requests, report.elapsed, report.failures, report.max_lag
+    )
+    return report
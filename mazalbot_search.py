@@ -0,0 +1,258 @@
+"""
+In-memory multi-attribute index for answering search_diamonds offline.
+
+SearchIndex is built once from a fetched inventory and then answers
+search_diamonds-style criteria without touching the network. Each grade
+value (shape, color, clarity, ...) gets a packed bitmap of the rows that
+have it, so equality and multi-value conditions reduce to a few
+word-wide AND/OR operations; id, stock_number and certificate_number are
+looked up through a plain value-to-rows dictionary. Weight, price and
+price_per_carat get sorted range indexes, so a range condition is two
+binary searches. Criteria the index does not cover fall back to
+SearchFilter.matches on the candidate rows, so results are always
+identical to the client's filter semantics.
+
+Requires the optional ``numpy`` dependency (``pip install numpy``).
+
+Example usage:
+```python
+client = MazalbotClient(user_id=123456789)
+index = SearchIndex(client.fetch_all_diamonds().diamonds)
+
+matches = index.search({"shape": "Round", "color": ["D", "E"], "min_weight": 1.0})
+print(index.count({"clarity": "VS1", "max_price": 5000}))
+```
+"""
+
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
+
+from mazalbot_client import ApiResponse, DiamondData, SEARCH_RANGE_FIELDS, SearchFilter, parse_search_criteria
+from mazalbot_frame import CATEGORICAL_COLUMNS, DiamondFrame
+
+
+# Fields indexed by exact value in addition to the grade columns
+_KEY_FIELDS = ("id", "stock_number", "certificate_number")
+
+
+def _require_numpy() -> None:
+    if np is None:
+        raise ImportError("SearchIndex requires numpy. Install it with: pip install numpy")
+
+
+class SearchIndex:
+    """
+    Read-only search index over a snapshot of the inventory.
+    
+    Rebuild the index (or use an InventoryMirror) when the inventory
+    changes; the index itself is not updated by client writes.
+    """
+    
+    def __init__(self, diamonds: Iterable[DiamondData]):
+        """
+        Build the index.
+        
+        Args:
+            diamonds: The inventory to index (e.g. BulkFetchResult.diamonds)
+        """
+        _require_numpy()
+        records = list(diamonds)
+        self._build(len(records), records.__getitem__, records)
+    
+    @classmethod
+    def from_frame(cls, frame: DiamondFrame) -> "SearchIndex":
+        """
+        Build the index over a DiamondFrame.
+        
+        Matching rows are materialised with DiamondFrame.record, so the
+        frame stays the only full copy of the inventory.
+        
+        Args:
+            frame: Inventory as a DiamondFrame
+            
+        Returns:
+            A new SearchIndex
+        """
+        _require_numpy()
+        index = cls.__new__(cls)
+        index._build(len(frame), frame.record, frame.iter_records())
+        return index
+    
+    def _build(
+        self,
+        size: int,
+        record: Callable[[int], DiamondData],
+        rows: Iterable[DiamondData]
+    ) -> None:
+        self.size = size
+        self._record = record
+        self._words = (size + 63) // 64
+        
+        values: Dict[str, List[Optional[str]]] = {name: [] for name in CATEGORICAL_COLUMNS + _KEY_FIELDS}
+        numbers: Dict[str, List[float]] = {name: [] for name in SEARCH_RANGE_FIELDS}
+        nan = float("nan")
+        for diamond in rows:
+            for name in values:
+                value = diamond.get(name)
+                values[name].append(str(value).strip().casefold() if value is not None else None)
+            for name in SEARCH_RANGE_FIELDS:
+                value = diamond.get(name)
+                try:
+                    numbers[name].append(float(value) if value is not None else nan)
+                except (TypeError, ValueError):
+                    numbers[name].append(nan)
+        
+        # field -> normalised value -> packed bitmap of rows (grades), or
+        # field -> normalised value -> row positions (near-unique keys)
+        self._bitmaps: Dict[str, Dict[str, "np.ndarray"]] = {}
+        self._keys: Dict[str, Dict[str, List[int]]] = {}
+        for name, column in values.items():
+            positions: Dict[str, List[int]] = {}
+            for row, value in enumerate(column):
+                if value is not None:
+                    positions.setdefault(value, []).append(row)
+            if name in _KEY_FIELDS:
+                self._keys[name] = positions
+            else:
+                self._bitmaps[name] = {value: self._pack(rows) for value, rows in positions.items()}
+        
+        # field -> (row order by value, sorted values, number of non-missing values)
+        self._ranges: Dict[str, Tuple["np.ndarray", "np.ndarray", int]] = {}
+        self._columns: Dict[str, "np.ndarray"] = {}
+        for name, column in numbers.items():
+            array = np.asarray(column, dtype=np.float64)
+            present = int(np.count_nonzero(~np.isnan(array)))
+            if present:
+                order = np.argsort(array, kind="stable")
+                self._ranges[name] = (order, array[order], present)
+                self._columns[name] = array
+    
+    def _pack(self, rows: Sequence[int]) -> "np.ndarray":
+        mask = np.zeros(self._words * 64, dtype=bool)
+        mask[np.asarray(rows, dtype=np.intp)] = True
+        return np.packbits(mask, bitorder="little").view(np.uint64)
+    
+    def _unpack(self, bitmap: "np.ndarray") -> "np.ndarray":
+        return np.unpackbits(bitmap.view(np.uint8), bitorder="little")[:self.size].view(bool)
+    
+    def search_rows(self, search_criteria: Mapping[str, Any]) -> "np.ndarray":
+        """
+        Find the positions of matching rows.
+        
+        Args:
+            search_criteria: Dictionary containing search parameters (see
+                parse_search_criteria)
+                
+        Returns:
+            Sorted int array of row positions in the indexed inventory
+        """
+        search_filter = parse_search_criteria(search_criteria)
+        leftover = SearchFilter()
+        
+        # Intersect grade bitmaps; a multi-value grade is the union of its bitmaps
+        bitmap = None
+        for name, allowed in search_filter.equals.items():
+            if name in self._bitmaps:
+                union = np.zeros(self._words, dtype=np.uint64)
+                for value in allowed:
+                    value_bitmap = self._bitmaps[name].get(value)
+                    if value_bitmap is not None:
+                        union |= value_bitmap
+            elif name in self._keys:
+                union = self._pack([row for value in allowed for row in self._keys[name].get(value, ())])
+            else:
+                leftover.equals[name] = allowed
+                continue
+            bitmap = union if bitmap is None else bitmap & union
+        
+        # Resolve every indexed range to a slice of its sorted order
+        slices = []
+        for name, (low, high) in search_filter.ranges.items():
+            if name not in self._ranges:
+                # No stone has a value for this field, so nothing can match
+                return np.empty(0, dtype=np.intp)
+            order, sorted_values, present = self._ranges[name]
+            start = 0 if low is None else int(np.searchsorted(sorted_values[:present], low, side="left"))
+            stop = present if high is None else int(np.searchsorted(sorted_values[:present], high, side="right"))
+            slices.append((max(0, stop - start), name, order[start:stop]))
+        
+        if slices:
+            # Start from the narrowest range and check the rest by value
+            slices.sort(key=lambda item: item[0])
+            rows = slices[0][2]
+            for _, name, _ in slices[1:]:
+                low, high = search_filter.ranges[name]
+                candidate_values = self._columns[name][rows]
+                keep = np.ones(len(rows), dtype=bool)
+                with np.errstate(invalid="ignore"):
+                    if low is not None:
+                        keep &= candidate_values >= low
+                    if high is not None:
+                        keep &= candidate_values <= high
+                rows = rows[keep]
+            if bitmap is not None:
+                rows = rows[self._unpack(bitmap)[rows]]
+            rows = np.sort(rows)
+        elif bitmap is not None:
+            rows = np.flatnonzero(self._unpack(bitmap))
+        else:
+            rows = np.arange(self.size)
+        
+        if leftover.equals or leftover.ranges:
+            rows = np.asarray(
+                [row for row in rows if leftover.matches(self._record(int(row)))],
+                dtype=np.intp
+            )
+        return rows
+    
+    def search(self, search_criteria: Mapping[str, Any]) -> List[DiamondData]:
+        """
+        Find matching diamonds.
+        
+        Args:
+            search_criteria: Dictionary containing search parameters
+            
+        Returns:
+            Matching diamonds in inventory order
+        """
+        return [self._record(int(row)) for row in self.search_rows(search_criteria)]
+    
+    def search_many(self, queries: Iterable[Mapping[str, Any]]) -> List[List[DiamondData]]:
+        """
+        Run several searches against the index.
+        
+        Args:
+            queries: Search criteria dictionaries
+            
+        Returns:
+            One list of matching diamonds per query
+        """
+        return [self.search(query) for query in queries]
+    
+    def count(self, search_criteria: Mapping[str, Any]) -> int:
+        """
+        Count matching diamonds without materialising them.
+        
+        Args:
+            search_criteria: Dictionary containing search parameters
+            
+        Returns:
+            Number of matching diamonds
+        """
+        return len(self.search_rows(search_criteria))
+    
+    def search_diamonds(self, search_criteria: Dict[str, Any]) -> ApiResponse:
+        """
+        Drop-in replacement for MazalbotClient.search_diamonds.
+        
+        Args:
+            search_criteria: Dictionary containing search parameters
+            
+        Returns:
+            ApiResponse containing the matching diamonds
+        """
+        return ApiResponse(success=True, data=self.search(search_criteria))
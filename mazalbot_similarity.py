@@ -0,0 +1,344 @@
+"""
+"Similar stones" search over a locally held inventory.
+
+SimilarityIndex encodes every stone as a vector of ordinal grades (color,
+clarity, cut, polish, symmetry in grade steps) and log carat weight, and
+answers customer target specs with the k closest stones by weighted
+distance. Unlike search_diamonds, which only returns exact matches, it
+always has an answer: a G VS1 1.00ct request is matched with the F VS1
+1.02ct and the G VS2 0.98ct stones when the exact stone is not in stock.
+
+Distances are in "grade steps": with the default weights one color grade,
+one clarity grade or 10% of carat weight each count as a distance of 1, and
+every 10% over the budget counts as 1.5. Shape is matched exactly unless
+match_shape is turned off, in which case a different shape costs
+``weights["shape"]``. Grades a spec leaves out are ignored.
+
+Queries are answered in batches with a couple of matrix products per shape,
+so thousands of specs per second can be served from 100k+ stone
+inventories. Requires the optional ``numpy`` dependency (``pip install numpy``).
+
+Example usage:
+```python
+client = MazalbotClient(user_id=123456789)
+index = SimilarityIndex(client.fetch_all_diamonds().diamonds)
+
+for match in index.query({"shape": "Round", "weight": 1.0, "color": "G", "clarity": "VS1",
+                          "cut": "Excellent", "budget": 6500}, k=5):
+    print(match.stock_number, round(match.distance, 2))
+
+# Many customer requests at once
+results = index.query_batch(requests, k=10)
+```
+"""
+
+import math
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple, TypedDict, Union
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
+
+from mazalbot_client import DiamondData
+from mazalbot_frame import DiamondFrame
+from mazalbot_ingest import CLARITIES, COLORS, FINISH_GRADES, _grade
+
+
+class TargetSpec(TypedDict, total=False):
+    """A customer's target stone; every field is optional"""
+    shape: str
+    weight: float
+    color: str
+    clarity: str
+    cut: str
+    polish: str
+    symmetry: str
+    budget: float
+
+
+# Distance per grade step (per 10% for weight and for going over budget)
+DEFAULT_WEIGHTS: Dict[str, float] = {
+    "shape": 10.0,
+    "weight": 1.0,
+    "color": 1.0,
+    "clarity": 1.0,
+    "cut": 0.5,
+    "polish": 0.25,
+    "symmetry": 0.25,
+    "budget": 1.5,
+}
+
+# Ordinal features in vector order, best grade first
+_GRADE_SCALES = {
+    "color": COLORS,
+    "clarity": CLARITIES,
+    "cut": FINISH_GRADES,
+    "polish": FINISH_GRADES,
+    "symmetry": FINISH_GRADES,
+}
+_FEATURES = ("weight",) + tuple(_GRADE_SCALES)
+
+# One unit of weight distance is a 10% carat difference
+_LOG_STEP = math.log(1.1)
+
+# Stands in for a missing inventory weight so such stones rank last
+_FAR = 1e3
+
+# Bound on the query x stone distance matrix held at once (elements)
+_BLOCK_ELEMENTS = 1 << 22
+
+
+def _require_numpy() -> None:
+    if np is None:
+        raise ImportError("SimilarityIndex requires numpy. Install it with: pip install numpy")
+
+
+def _rank(name: str, value: Any) -> Optional[int]:
+    """Position of a grade on its scale (0 = best), or None if unknown"""
+    if value is None:
+        return None
+    grade = _grade(name, str(value))
+    return _GRADE_SCALES[name].index(grade) if grade is not None else None
+
+
+@dataclass
+class SimilarStone:
+    """One match for a target spec"""
+    id: Optional[str]
+    stock_number: Optional[str]
+    distance: float
+    row: int
+    frame: DiamondFrame = field(repr=False, compare=False)
+    
+    @property
+    def diamond(self) -> DiamondData:
+        """The matched stone as DiamondData, built on access"""
+        return self.frame.record(self.row)
+
+
+@dataclass
+class _Block:
+    """Stones searched together, with their features laid out for one matrix product"""
+    rows: "np.ndarray"
+    # [x^2, x] per stone, features x stones
+    features: "np.ndarray"
+    log_price: "np.ndarray"
+    shapes: "np.ndarray"
+
+
+class SimilarityIndex:
+    """
+    Nearest-neighbour index over a snapshot of the inventory.
+    
+    The index does not follow later writes; build a new one to pick them up.
+    """
+    
+    def __init__(
+        self,
+        inventory: Union[DiamondFrame, Iterable[DiamondData]],
+        weights: Optional[Mapping[str, float]] = None,
+        match_shape: bool = True,
+        exclude_sold: bool = True
+    ):
+        """
+        Encode the inventory.
+        
+        Args:
+            inventory: The inventory as a DiamondFrame or DiamondData dicts
+            weights: Overrides for DEFAULT_WEIGHTS
+            match_shape: Only return stones of the spec's shape. If False, a
+                different shape adds ``weights["shape"]`` to the distance.
+            exclude_sold: Leave out stones whose status is Sold
+            
+        Raises:
+            ValueError: If weights names an unknown field
+        """
+        _require_numpy()
+        unknown = set(weights or ()) - set(DEFAULT_WEIGHTS)
+        if unknown:
+            raise ValueError(f"Unknown similarity weights: {', '.join(sorted(unknown))}")
+        self.weights = {**DEFAULT_WEIGHTS, **(weights or {})}
+        self.match_shape = match_shape
+        
+        # Shapes (and statuses) are compared by canonical spelling, so "RB" matches "Round"
+        self._canonical_codes: Dict[Tuple[str, str], int] = {}
+        frame = inventory if isinstance(inventory, DiamondFrame) else DiamondFrame.from_records(inventory)
+        if exclude_sold:
+            status = self._normalised_codes(frame, "status")
+            frame = frame.take(np.flatnonzero(status != self._canonical_code("status", "Sold")))
+        self.frame = frame
+        
+        # Stone vectors in grade steps; a missing grade sits one step below the worst
+        size = len(frame)
+        self._vectors = np.empty((size, len(_FEATURES)), dtype=np.float64)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            log_weight = np.log(frame.numeric["weight"]) / _LOG_STEP
+        log_weight[~np.isfinite(log_weight)] = _FAR
+        self._vectors[:, 0] = log_weight
+        for column, name in enumerate(_GRADE_SCALES, start=1):
+            table = [_rank(name, value) for value in frame.categories[name]]
+            worst = len(_GRADE_SCALES[name])
+            lookup = np.array([worst if rank is None else rank for rank in table] + [worst], dtype=np.float64)
+            self._vectors[:, column] = lookup[frame.codes[name]]
+        
+        price = frame.numeric["price"].copy()
+        missing = np.isnan(price)
+        price[missing] = (frame.numeric["price_per_carat"] * frame.numeric["weight"])[missing]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            log_price = np.log(price) / _LOG_STEP
+        log_price[~np.isfinite(log_price)] = -np.inf
+        
+        # Stones are searched in blocks of one normalised shape each
+        shapes = self._normalised_codes(frame, "shape")
+        order = np.argsort(shapes, kind="stable")
+        groups = np.split(order, np.flatnonzero(np.diff(shapes[order])) + 1) if size else []
+        
+        def block(rows: "np.ndarray") -> _Block:
+            vectors = self._vectors[rows]
+            features = np.ascontiguousarray(np.hstack((vectors ** 2, vectors)).T)
+            return _Block(rows, features, log_price[rows], shapes[rows])
+        
+        # None (every stone) serves specs without a shape and match_shape=False
+        self._blocks: Dict[Optional[int], _Block] = {}
+        if size:
+            self._blocks[None] = block(np.arange(size))
+        for rows in groups if match_shape else []:
+            self._blocks[int(shapes[rows[0]])] = block(rows)
+    
+    def _canonical_code(self, name: str, value: Any) -> int:
+        if value is None:
+            return -1
+        key = (name, _grade(name, str(value)) or str(value))
+        return self._canonical_codes.setdefault(key, len(self._canonical_codes))
+    
+    def _normalised_codes(self, frame: DiamondFrame, name: str) -> "np.ndarray":
+        lookup = np.array(
+            [self._canonical_code(name, value) for value in frame.categories[name]] + [-1],
+            dtype=np.int64
+        )
+        return lookup[frame.codes[name]]
+    
+    def __len__(self) -> int:
+        return len(self.frame)
+    
+    def _encode(self, specs: Sequence[Mapping[str, Any]]) -> Tuple["np.ndarray", ...]:
+        count = len(specs)
+        targets = np.zeros((count, len(_FEATURES)), dtype=np.float64)
+        weights = np.zeros((count, len(_FEATURES)), dtype=np.float64)
+        budgets = np.full(count, np.nan)
+        shapes = np.full(count, -1, dtype=np.int64)
+        for row, spec in enumerate(specs):
+            weight = spec.get("weight")
+            if weight is not None and float(weight) > 0:
+                targets[row, 0] = math.log(float(weight)) / _LOG_STEP
+                weights[row, 0] = self.weights["weight"] ** 2
+            for column, name in enumerate(_GRADE_SCALES, start=1):
+                rank = _rank(name, spec.get(name))
+                if rank is not None:
+                    targets[row, column] = rank
+                    weights[row, column] = self.weights[name] ** 2
+            if spec.get("budget") is not None and float(spec["budget"]) > 0:
+                budgets[row] = float(spec["budget"])
+            shapes[row] = self._canonical_code("shape", spec.get("shape"))
+        return targets, weights, budgets, shapes
+    
+    def query(self, spec: Mapping[str, Any], k: int = 10) -> List[SimilarStone]:
+        """
+        Find the stones closest to a target spec.
+        
+        Args:
+            spec: TargetSpec (or any DiamondData-like dict); unknown grades
+                and missing fields are ignored
+            k: Number of stones to return
+            
+        Returns:
+            Up to k SimilarStone, closest first
+        """
+        return self.query_batch([spec], k=k)[0]
+    
+    def query_batch(self, specs: Sequence[Mapping[str, Any]], k: int = 10) -> List[List[SimilarStone]]:
+        """
+        Answer many target specs at once.
+        
+        Args:
+            specs: TargetSpec dicts
+            k: Number of stones to return per spec
+            
+        Returns:
+            One list of up to k SimilarStone per spec, closest first
+        """
+        targets, weights, budgets, shapes = self._encode(specs)
+        results: List[List[SimilarStone]] = [[] for _ in specs]
+        if k < 1:
+            return results
+        
+        # Queries sharing a shape are searched against that shape's stones together
+        batches: Dict[int, List[int]] = {}
+        for query, shape in enumerate(shapes):
+            batches.setdefault(int(shape) if self.match_shape else -1, []).append(query)
+        
+        for shape, queries in batches.items():
+            block = self._blocks.get(shape) if shape >= 0 else self._blocks.get(None)
+            if block is None:
+                continue
+            step = max(1, _BLOCK_ELEMENTS // len(block.rows))
+            for start in range(0, len(queries), step):
+                chunk = np.array(queries[start:start + step])
+                distances = self._squared_distances(block, targets[chunk], weights[chunk], budgets[chunk], shapes[chunk])
+                self._collect(results, chunk, block.rows, distances, k)
+        return results
+    
+    def _squared_distances(
+        self,
+        block: _Block,
+        targets: "np.ndarray",
+        weights: "np.ndarray",
+        budgets: "np.ndarray",
+        shapes: "np.ndarray"
+    ) -> "np.ndarray":
+        # sum_f w_f^2 (q_f - x_f)^2 = sum w q^2 + [w, -2wq] . [x^2, x]: one
+        # matrix product, with each query weighting only the fields its spec has
+        distances = np.hstack((weights, -2.0 * weights * targets)) @ block.features
+        distances += (weights * targets ** 2).sum(axis=1)[:, None]
+        
+        with_budget = np.flatnonzero(~np.isnan(budgets))
+        if len(with_budget):
+            # Steps over budget; stones without a price are never over
+            over = block.log_price[None, :] - (np.log(budgets[with_budget]) / _LOG_STEP)[:, None]
+            np.maximum(over, 0.0, out=over)
+            over *= over
+            over *= self.weights["budget"] ** 2
+            distances[with_budget] += over
+        
+        if not self.match_shape:
+            mismatch = (block.shapes[None, :] != shapes[:, None]) & (shapes[:, None] >= 0)
+            distances += self.weights["shape"] ** 2 * mismatch
+        return distances
+    
+    def _collect(
+        self,
+        results: List[List[SimilarStone]],
+        queries: "np.ndarray",
+        rows: "np.ndarray",
+        distances: "np.ndarray",
+        k: int
+    ) -> None:
+        take = min(k, distances.shape[1])
+        if take < distances.shape[1]:
+            nearest = np.argpartition(distances, take - 1, axis=1)[:, :take]
+        else:
+            nearest = np.broadcast_to(np.arange(take), (len(queries), take))
+        nearest_distances = np.take_along_axis(distances, nearest, axis=1)
+        order = np.argsort(nearest_distances, axis=1, kind="stable")
+        nearest = np.take_along_axis(nearest, order, axis=1)
+        # Only the k winners pay for the square root
+        nearest_distances = np.sqrt(np.maximum(np.take_along_axis(nearest_distances, order, axis=1), 0.0))
+        
+        ids, stock_numbers = self.frame.ids, self.frame.stock_numbers
+        for query, stones, stone_distances in zip(queries.tolist(), rows[nearest].tolist(), nearest_distances.tolist()):
+            results[query] = [
+                SimilarStone(ids[stone], stock_numbers[stone], distance, stone, self.frame)
+                for stone, distance in zip(stones, stone_distances)
+            ]
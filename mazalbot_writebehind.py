@@ -0,0 +1,318 @@
+"""
+Write-behind queue that coalesces and batches diamond updates.
+
+WriteBehindQueue accepts update_diamond-style writes and returns at once
+with a Future. Repeated writes to the same stone are coalesced while they
+wait (merging their fields, or keeping only the last write), and a
+background worker sends them with MazalbotClient.update_diamonds once
+``batch_size`` stones are waiting or the oldest write is ``flush_interval``
+seconds old. When ``max_pending`` stones are waiting, writers block until
+the worker catches up. Closing the queue (or exiting the interpreter)
+flushes everything still waiting.
+
+Example usage:
+```python
+client = MazalbotClient(user_id=123456789)
+with WriteBehindQueue(client, batch_size=200, flush_interval=0.5) as queue:
+    for diamond_id, price in price_feed():
+        queue.update(diamond_id, {"price_per_carat": price})
+    
+    # Wait for one write when the caller needs confirmation
+    queue.update(urgent_id, {"status": "Reserved"}).result(timeout=10)
+    
+    # From async code: await asyncio.wrap_future(queue.update(...))
+```
+"""
+
+import atexit
+import logging
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from concurrent.futures import Future, InvalidStateError
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Literal, Optional
+
+from mazalbot_client import ApiResponse, BatchItemResult, DiamondData, MazalbotApiError, MazalbotClient
+
+
+# Queues not yet closed; flushed when the interpreter exits
+_open_queues: "weakref.WeakSet[WriteBehindQueue]" = weakref.WeakSet()
+
+
+def _close_open_queues() -> None:
+    for queue in list(_open_queues):
+        queue.close()
+
+
+# threading's exit hooks run before concurrent.futures stops accepting work,
+# so the final flush can still use update_diamonds' thread pool
+getattr(threading, "_register_atexit", atexit.register)(_close_open_queues)
+
+
+def _publish(future: Future, result: Any = None, error: Optional[BaseException] = None) -> None:
+    """Resolve a write's future unless its caller already cancelled it"""
+    if future.done():
+        return
+    try:
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+    except InvalidStateError:
+        # Cancelled between the check and the set
+        pass
+
+
+@dataclass
+class _PendingWrite:
+    fields: DiamondData
+    enqueued: float
+    futures: List[Future] = field(default_factory=list)
+
+
+@dataclass
+class WriteBehindStats:
+    """Counters of a WriteBehindQueue"""
+    writes: int = 0
+    coalesced: int = 0
+    batches: int = 0
+    sent: int = 0
+    failed: int = 0
+    blocked: float = 0.0
+
+
+class WriteBehindQueue:
+    """
+    Coalescing, batching write-behind queue for update_diamond.
+    
+    Thread-safe. Each write's Future resolves to the BatchItemResult of the
+    update that carried it, or fails with MazalbotApiError; writes coalesced
+    into one update share its outcome. Updates to a stone are sent in the
+    order they were made.
+    """
+    
+    def __init__(
+        self,
+        client: MazalbotClient,
+        batch_size: int = 500,
+        flush_interval: float = 1.0,
+        max_pending: int = 10000,
+        merge: Literal["fields", "replace"] = "fields",
+        concurrency: int = 4
+    ):
+        """
+        Start the queue and its worker thread.
+        
+        Args:
+            client: Client that sends the updates
+            batch_size: Flush once this many stones are waiting
+            flush_interval: Flush once the oldest waiting write is this old (seconds)
+            max_pending: Block writers once this many stones are waiting
+            merge: "fields" merges the fields of repeated writes to a stone;
+                "replace" keeps only the last write
+            concurrency: Requests in flight per batch (see update_diamonds)
+        """
+        if batch_size < 1 or max_pending < 1:
+            raise ValueError("batch_size and max_pending must be at least 1")
+        if merge not in ("fields", "replace"):
+            raise ValueError(f"Unknown merge mode: {merge}")
+        
+        self.client = client
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.merge = merge
+        self.concurrency = concurrency
+        self.stats = WriteBehindStats()
+        self.closed = False
+        self.logger = logging.getLogger("mazalbot_client")
+        
+        self._pending: "OrderedDict[str, _PendingWrite]" = OrderedDict()
+        self._in_flight = 0
+        self._flush_requested = False
+        self._cond = threading.Condition()
+        self._worker = threading.Thread(target=self._run, name="mazalbot-write-behind", daemon=True)
+        self._worker.start()
+        _open_queues.add(self)
+    
+    def update(self, diamond_id: str, diamond_data: DiamondData, timeout: Optional[float] = None) -> Future:
+        """
+        Queue an update.
+        
+        Args:
+            diamond_id: The ID of the diamond to update
+            diamond_data: Fields to change
+            timeout: Longest time to wait for room in the queue; None waits
+                as long as it takes
+                
+        Returns:
+            Future resolving to the BatchItemResult of the update
+            
+        Raises:
+            RuntimeError: If the queue is closed
+            TimeoutError: If the queue stayed full for ``timeout`` seconds
+        """
+        future: Future = Future()
+        with self._cond:
+            if self.closed:
+                raise RuntimeError("Write-behind queue is closed")
+            self.stats.writes += 1
+            started = time.monotonic()
+            deadline = None if timeout is None else started + timeout
+            while True:
+                pending = self._pending.get(diamond_id)
+                if pending is not None:
+                    if self.merge == "fields":
+                        pending.fields.update(diamond_data)
+                    else:
+                        pending.fields = dict(diamond_data)
+                    pending.futures.append(future)
+                    self.stats.coalesced += 1
+                    return future
+                # Back-pressure: only new stones take room in the queue
+                if len(self._pending) < self.max_pending:
+                    break
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    self.stats.writes -= 1
+                    raise TimeoutError("Write-behind queue is full")
+                self._cond.wait(remaining)
+                if self.closed:
+                    self.stats.writes -= 1
+                    raise RuntimeError("Write-behind queue is closed")
+            self.stats.blocked += time.monotonic() - started
+            
+            self._pending[diamond_id] = _PendingWrite(dict(diamond_data), time.monotonic(), [future])
+            # Wake the worker to start the flush_interval timer, or to send a full batch
+            if len(self._pending) == 1 or len(self._pending) >= self.batch_size:
+                self._cond.notify_all()
+        return future
+    
+    def pending(self) -> int:
+        """Number of stones waiting to be sent"""
+        with self._cond:
+            return len(self._pending)
+    
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Send everything queued so far and wait for it to finish.
+        
+        Args:
+            timeout: Longest time to wait in seconds; None waits as long as it takes
+            
+        Returns:
+            True if the queue drained, False on timeout
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            self._flush_requested = True
+            self._cond.notify_all()
+            while self._pending or self._in_flight:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+    
+    def close(self, timeout: Optional[float] = None) -> None:
+        """
+        Flush waiting writes and stop the worker.
+        
+        Further calls to update raise RuntimeError. The client is left open.
+        
+        Args:
+            timeout: Longest time to wait for the flush in seconds
+        """
+        with self._cond:
+            if self.closed:
+                return
+            self.closed = True
+            self._cond.notify_all()
+        self._worker.join(timeout)
+        _open_queues.discard(self)
+    
+    def __enter__(self) -> "WriteBehindQueue":
+        return self
+    
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+    
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while True:
+                    if self._pending and (
+                        self.closed
+                        or self._flush_requested
+                        or len(self._pending) >= self.batch_size
+                        or time.monotonic() - next(iter(self._pending.values())).enqueued >= self.flush_interval
+                    ):
+                        break
+                    if self.closed:
+                        return
+                    if not self._pending:
+                        self._flush_requested = False
+                        self._cond.wait()
+                    else:
+                        oldest = next(iter(self._pending.values())).enqueued
+                        self._cond.wait(max(0.0, oldest + self.flush_interval - time.monotonic()))
+                
+                batch: Dict[str, _PendingWrite] = {}
+                while self._pending and len(batch) < self.batch_size:
+                    diamond_id, pending = self._pending.popitem(last=False)
+                    batch[diamond_id] = pending
+                self._in_flight += len(batch)
+                # Room freed for writers blocked on a full queue
+                self._cond.notify_all()
+            
+            try:
+                self._send(batch)
+            except Exception as e:
+                # Never let one bad batch kill the worker
+                self.logger.exception("Write-behind worker failed to publish a batch")
+                self._fail(batch, e)
+            finally:
+                with self._cond:
+                    self._in_flight -= len(batch)
+                    self._cond.notify_all()
+    
+    def _send(self, batch: Dict[str, _PendingWrite]) -> None:
+        try:
+            result = self.client.update_diamonds(
+                [(diamond_id, pending.fields) for diamond_id, pending in batch.items()],
+                concurrency=self.concurrency,
+                chunk_size=self.batch_size
+            )
+            items = result.items
+        except Exception as e:
+            self.logger.exception("Write-behind batch of %d failed", len(batch))
+            items = [
+                BatchItemResult(index, diamond_id, "failed", error=str(e))
+                for index, diamond_id in enumerate(batch)
+            ]
+        
+        failed = 0
+        for item, pending in zip(items, batch.values()):
+            for future in pending.futures:
+                if item.status == "ok":
+                    _publish(future, result=item)
+                else:
+                    _publish(future, error=MazalbotApiError(ApiResponse(
+                        success=False,
+                        error=item.error,
+                        status_code=item.status_code
+                    )))
+            failed += item.status != "ok"
+        with self._cond:
+            self.stats.batches += 1
+            self.stats.sent += len(batch)
+            self.stats.failed += failed
+    
+    def _fail(self, batch: Dict[str, _PendingWrite], error: Exception) -> None:
+        for pending in batch.values():
+            for future in pending.futures:
+                _publish(future, error=MazalbotApiError(ApiResponse(success=False, error=str(error), status_code=0)))
+        with self._cond:
+            self.stats.failed += len(batch)
@@ -0,0 +1,42 @@
+"""
+Tests for AsyncMazalbotClient against the local stub server.
+
+Run with: python -m pytest test_async_client.py
+"""
+
+import asyncio
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks"))
+
+pytest.importorskip("aiohttp")
+
+from mazalbot_async_client import AsyncMazalbotClient  # noqa: E402
+from mazalbot_client import MazalbotClient  # noqa: E402
+from stub_server import StubMazalbotServer  # noqa: E402
+
+
+@pytest.fixture
+def server():
+    with StubMazalbotServer(inventory_size=300) as server:
+        yield server
+
+
+def test_multi_value_filters_match_the_sync_client(server):
+    """A list filter is sent as repeated keys, so both clients find the same stones"""
+    criteria = {"shape": ["Round", "Oval"]}
+    sync = MazalbotClient(base_url=server.url, user_id=server.user_id, log_level="CRITICAL")
+    expected = sync.search_diamonds(criteria)
+    assert expected.success and expected.data
+    
+    async def search():
+        async with AsyncMazalbotClient(base_url=server.url, user_id=server.user_id) as client:
+            return await client.search_diamonds(criteria)
+    
+    response = asyncio.run(search())
+    assert response.success
+    assert {diamond["shape"] for diamond in response.data} == {"Round", "Oval"}
+    assert sorted(diamond["id"] for diamond in response.data) == sorted(diamond["id"] for diamond in expected.data)
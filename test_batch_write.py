@@ -0,0 +1,102 @@
+"""
+Tests for MazalbotClient.update_diamonds/delete_diamonds against the local stub server.
+
+Run with: python -m pytest test_batch_write.py
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks"))
+
+from mazalbot_client import MazalbotClient, ResponseCache  # noqa: E402
+from stub_server import StubMazalbotServer  # noqa: E402
+
+
+def make_client(server: StubMazalbotServer, **kwargs) -> MazalbotClient:
+    return MazalbotClient(base_url=server.url, user_id=server.user_id, log_level="CRITICAL", **kwargs)
+
+
+def stone_ids(client: MazalbotClient) -> list:
+    response = client.get_diamonds()
+    assert response.success
+    return [diamond["id"] for diamond in response.data]
+
+
+def test_bulk_endpoint_is_probed_once_and_used_for_every_chunk():
+    """The first chunk probes the bulk endpoint; later chunks and batches go straight to it"""
+    with StubMazalbotServer(inventory_size=25, bulk_endpoints=True) as server:
+        client = make_client(server)
+        ids = stone_ids(client)
+        result = client.update_diamonds({diamond_id: {"price_per_carat": 10.0} for diamond_id in ids}, chunk_size=10)
+        assert result.success and result.bulk
+        assert result.requests == 3
+        assert client._bulk_endpoints == {client.BULK_UPDATE_ENDPOINT: True}
+        assert {client.get_diamond(diamond_id).data["price_per_carat"] for diamond_id in ids} == {10.0}
+        
+        result = client.delete_diamonds(ids[:4] + ["no-such-stone"], chunk_size=10)
+        assert result.bulk and result.requests == 1
+        assert [item.status for item in result.items] == ["ok"] * 4 + ["failed"]
+        assert result.items[-1].error == "Diamond not found"
+        assert server.inventory_size() == 21
+
+
+def test_missing_bulk_endpoint_falls_back_to_one_request_per_stone():
+    """A 404 from the probe sends the batch stone by stone and is remembered"""
+    with StubMazalbotServer(inventory_size=12) as server:
+        client = make_client(server)
+        ids = stone_ids(client)
+        result = client.update_diamonds([(diamond_id, {"status": "Memo"}) for diamond_id in ids[:6]], chunk_size=4)
+        assert result.success and not result.bulk
+        # The probe, then one request per stone
+        assert result.requests == 1 + 6
+        assert client._bulk_endpoints == {client.BULK_UPDATE_ENDPOINT: False}
+        
+        result = client.update_diamonds([(diamond_id, {"status": "Memo"}) for diamond_id in ids[6:]], chunk_size=4)
+        assert result.success and not result.bulk
+        assert result.requests == 6
+        assert {client.get_diamond(diamond_id).data["status"] for diamond_id in ids} == {"Memo"}
+
+
+def test_max_failures_aborts_and_skips_the_rest():
+    """Once more than max_failures stones fail, the stones not yet sent are skipped"""
+    with StubMazalbotServer(inventory_size=0) as server:
+        client = make_client(server)
+        result = client.delete_diamonds([f"missing-{index}" for index in range(40)], concurrency=1, max_failures=2)
+        assert result.aborted and not result.success
+        assert result.failed > 2
+        assert result.skipped > 0
+        assert result.failed + result.skipped == 40
+        assert all(item.error == "Batch aborted" for item in result.items if item.status == "skipped")
+
+
+def test_invalid_input_over_max_failures_sends_nothing():
+    """Missing and duplicate ids count as failures before anything is sent"""
+    with StubMazalbotServer(inventory_size=0, bulk_endpoints=True) as server:
+        client = make_client(server)
+        result = client.update_diamonds([("a", {"price": 1}), ("a", {"price": 2}), ("", {"price": 3})], max_failures=1)
+        assert result.aborted
+        assert result.requests == 0
+        assert [item.status for item in result.items] == ["skipped", "failed", "failed"]
+
+
+def test_bulk_chunk_invalidates_the_cache_and_notifies_each_stone():
+    """Cached reads of written stones are dropped, and listeners see one event per stone"""
+    with StubMazalbotServer(inventory_size=10, bulk_endpoints=True) as server:
+        cache = ResponseCache()
+        client = make_client(server, cache=cache)
+        ids = stone_ids(client)
+        for diamond_id in ids:
+            client.get_diamond(diamond_id)
+        client.get_dashboard_stats()
+        events = []
+        client.add_write_listener(events.append)
+        
+        result = client.update_diamonds({diamond_id: {"price_per_carat": 99.0} for diamond_id in ids[:3]})
+        assert result.success and result.requests == 1
+        assert [event.diamond_id for event in events] == ids[:3]
+        assert [event.diamonds for event in events] == [[{"price_per_carat": 99.0}]] * 3
+        # Three stones and the dashboard entry; the other seven stones stay cached
+        assert cache.stats()["invalidations"] == 4
+        assert cache.stats()["entries"] == 7
+        assert client.get_diamond(ids[0]).data["price_per_carat"] == 99.0
@@ -0,0 +1,145 @@
+"""
+Tests for ResponseCache against the local stub server.
+
+Run with: python -m pytest test_cache.py
+"""
+
+import hashlib
+import json
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks"))
+
+from mazalbot_client import MazalbotClient, ResponseCache  # noqa: E402
+from stub_server import StubMazalbotServer  # noqa: E402
+
+
+class ETagServer(StubMazalbotServer):
+    """Sends an ETag with every stone and answers a matching If-None-Match with 304"""
+    
+    not_modified = 0
+    
+    def etag(self, diamond_id: str) -> str:
+        with self._lock:
+            stone = self._inventory.get(diamond_id)
+        return '"%s"' % hashlib.sha1(json.dumps(stone, sort_keys=True).encode("utf-8")).hexdigest()
+    
+    def handle(self, method, path, query, body):
+        status, payload, headers = super().handle(method, path, query, body)
+        if method == "GET" and path.startswith("/api/v1/get_stone/") and status == 200:
+            headers = {**headers, "ETag": self.etag(path.rsplit("/", 1)[-1])}
+        return status, payload, headers
+    
+    def _handler_class(self) -> type:
+        server = self
+        base = super()._handler_class()
+        
+        class Handler(base):
+            def do_GET(self) -> None:
+                if self.path.startswith("/api/v1/get_stone/"):
+                    etag = server.etag(self.path.split("?", 1)[0].rsplit("/", 1)[-1])
+                    if self.headers.get("If-None-Match") == etag:
+                        with server._lock:
+                            server.request_count += 1
+                            server.not_modified += 1
+                        self.send_response(304)
+                        self.send_header("ETag", etag)
+                        self.send_header("Content-Length", "0")
+                        self.end_headers()
+                        return
+                super().do_GET()
+        
+        return Handler
+
+
+@pytest.fixture
+def server():
+    with ETagServer(inventory_size=10) as server:
+        yield server
+
+
+def make_client(server: StubMazalbotServer, **ttls) -> MazalbotClient:
+    cache = ResponseCache(ttls=ttls)
+    return MazalbotClient(base_url=server.url, user_id=server.user_id, log_level="CRITICAL", cache=cache)
+
+
+def stone_ids(client: MazalbotClient) -> list:
+    response = client.get_diamonds()
+    assert response.success
+    return [diamond["id"] for diamond in response.data]
+
+
+def test_fresh_entry_is_served_without_a_request(server):
+    """A second read within the TTL does not reach the server"""
+    client = make_client(server)
+    diamond_id = stone_ids(client)[0]
+    first = client.get_diamond(diamond_id)
+    sent = server.request_count
+    second = client.get_diamond(diamond_id)
+    assert server.request_count == sent
+    assert second.data == first.data
+    assert client.cache.stats()["hits"] == 1
+
+
+def test_expired_entry_with_etag_is_revalidated(server):
+    """An unchanged stone costs a 304; a changed one is fetched again"""
+    client = make_client(server, get_diamond=0.05)
+    diamond_id = stone_ids(client)[0]
+    first = client.get_diamond(diamond_id)
+    
+    time.sleep(0.1)
+    second = client.get_diamond(diamond_id)
+    assert server.not_modified == 1
+    assert client.cache.stats()["revalidations"] == 1
+    assert second.data == first.data
+    # The revalidated entry is fresh again
+    sent = server.request_count
+    client.get_diamond(diamond_id)
+    assert server.request_count == sent
+    
+    with server._lock:
+        server._inventory[diamond_id]["price_per_carat"] = 1.0
+    time.sleep(0.1)
+    third = client.get_diamond(diamond_id)
+    assert server.not_modified == 1
+    assert third.data["price_per_carat"] == 1.0
+
+
+def test_expired_entry_without_validators_is_refetched(server):
+    """An expired entry without ETag or Last-Modified is dropped and fetched in full"""
+    client = make_client(server, get_dashboard_stats=0.05)
+    client.get_dashboard_stats()
+    time.sleep(0.1)
+    sent = server.request_count
+    assert client.get_dashboard_stats().success
+    assert server.request_count == sent + 1
+    assert server.not_modified == 0
+    assert client.cache.stats()["revalidations"] == 0
+
+
+def test_writes_invalidate_only_the_entries_they_affect(server):
+    """An update or delete drops that stone, its report and the dashboard views"""
+    client = make_client(server)
+    first, second = stone_ids(client)[:2]
+    for diamond_id in (first, second):
+        client.get_diamond(diamond_id)
+        assert client.create_report(diamond_id).success
+        assert client.get_report(diamond_id).success
+    client.get_dashboard_stats()
+    assert client.cache.stats()["entries"] == 5
+    
+    assert client.update_diamond(first, {"price_per_carat": 2.0}).success
+    assert client.cache.stats()["entries"] == 2
+    assert client.get_diamond(first).data["price_per_carat"] == 2.0
+    
+    sent = server.request_count
+    client.get_diamond(second)
+    client.get_report(second)
+    assert server.request_count == sent
+    
+    assert client.delete_diamond(second).success
+    assert not client.get_diamond(second).success
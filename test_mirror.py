@@ -0,0 +1,103 @@
+"""
+Tests for InventoryMirror against the local stub server.
+
+Run with: python -m pytest test_mirror.py
+"""
+
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks"))
+
+from mazalbot_client import MazalbotClient  # noqa: E402
+from mazalbot_mirror import InventoryMirror  # noqa: E402
+from stub_server import StubMazalbotServer  # noqa: E402
+
+
+@pytest.fixture
+def server():
+    with StubMazalbotServer(inventory_size=30) as server:
+        yield server
+
+
+@pytest.fixture
+def client(server):
+    return MazalbotClient(base_url=server.url, user_id=server.user_id, log_level="CRITICAL")
+
+
+@pytest.fixture
+def mirror(client):
+    with InventoryMirror(client) as mirror:
+        assert mirror.full_sync().added == 30
+        yield mirror
+
+
+def test_refresh_without_remote_changes_writes_nothing(mirror):
+    """Every stone matches its mirror row by content hash"""
+    report = mirror.refresh()
+    assert report.success
+    assert (report.added, report.updated, report.deleted, report.unchanged) == (0, 0, 0, 30)
+
+
+def test_remote_changes_are_applied_incrementally(mirror, server):
+    """Changed, new and deleted remote stones are each counted once"""
+    with server._lock:
+        ids = list(server._inventory)
+        server._inventory[ids[0]]["price_per_carat"] = 1.0
+        removed = server._inventory.pop(ids[1])
+    # Added by another client, so the mirror only learns of it on refresh
+    other = MazalbotClient(base_url=server.url, user_id=server.user_id, log_level="CRITICAL")
+    assert other.add_diamond({"stock_number": "NEW-1", "shape": "Oval", "weight": 1.1, "color": "E", "clarity": "VS2"}).success
+    
+    report = mirror.refresh()
+    assert (report.added, report.updated, report.deleted, report.unchanged) == (1, 1, 1, 28)
+    assert mirror.get_diamond(ids[0]).data["price_per_carat"] == 1.0
+    assert not mirror.get_diamond(ids[1]).success
+    assert mirror.tombstones() == [ids[1]]
+    assert mirror.count() == 30
+    
+    # A tombstone is reported once, and revived if the stone comes back
+    assert mirror.refresh().deleted == 0
+    with server._lock:
+        server._inventory[ids[1]] = removed
+    report = mirror.refresh()
+    assert (report.added, report.updated, report.deleted) == (0, 1, 0)
+    assert mirror.tombstones() == []
+    assert mirror.get_diamond(ids[1]).success
+
+
+def test_client_writes_pass_through(mirror, client):
+    """Updates and deletes made through the client reach the mirror without a refresh"""
+    first, second = [diamond["id"] for diamond in client.get_diamonds(limit=2).data]
+    assert client.update_diamond(first, {"status": "Memo"}).success
+    assert mirror.get_diamond(first).data["status"] == "Memo"
+    assert client.delete_diamond(second).success
+    assert mirror.tombstones() == [second]
+    assert mirror.refresh().unchanged == 29
+
+
+def test_update_of_an_unknown_stone_marks_the_mirror_stale(mirror, client, server):
+    """A partial update cannot be mirrored without the full row; refresh repairs it"""
+    with server._lock:
+        diamond_id = next(iter(server._inventory))
+    with mirror._lock, mirror._conn:
+        mirror._conn.execute("DELETE FROM diamonds WHERE id = ?", (diamond_id,))
+    assert client.update_diamond(diamond_id, {"status": "Memo"}).success
+    assert mirror.stale
+    assert not mirror.get_diamond(diamond_id).success
+    assert mirror.refresh().added == 1
+    assert not mirror.stale
+    assert mirror.get_diamond(diamond_id).data["status"] == "Memo"
+
+
+def test_purge_tombstones(mirror, client):
+    """Purged tombstones are gone for good and are not reported again"""
+    diamond_id = client.get_diamonds(limit=1).data[0]["id"]
+    assert client.delete_diamond(diamond_id).success
+    assert mirror.purge_tombstones(older_than=time.time() - 60) == 0
+    assert mirror.purge_tombstones() == 1
+    assert mirror.tombstones() == []
+    assert mirror.refresh().deleted == 0
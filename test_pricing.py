@@ -0,0 +1,114 @@
+"""
+Tests for PriceGrid incremental maintenance.
+
+Run with: python -m pytest test_pricing.py
+"""
+
+import math
+import os
+import random
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks"))
+
+pytest.importorskip("numpy")
+
+from mazalbot_client import MazalbotClient  # noqa: E402
+from mazalbot_pricing import PriceGrid  # noqa: E402
+from stub_server import StubMazalbotServer  # noqa: E402
+
+
+def make_stone(rng: random.Random, index: int) -> dict:
+    # Few grades, so cells are large enough to have quartiles and outliers
+    roll = rng.random()
+    price_per_carat = None if roll < 0.05 else rng.randint(20000, 40000) if roll < 0.1 else rng.randint(2000, 9000)
+    return {
+        "id": f"stone-{index}",
+        "stock_number": f"S{index:05d}",
+        "shape": rng.choice(["Round", "Oval"]),
+        "color": rng.choice(["D", "E", "F"]),
+        "clarity": rng.choice(["VS1", "VS2"]),
+        "weight": round(rng.uniform(0.3, 3.0), 2),
+        "price_per_carat": price_per_carat,
+    }
+
+
+def assert_same_grid(grid: PriceGrid, expected: PriceGrid) -> None:
+    def summary(cells):
+        return {(cell.shape, cell.color, cell.clarity, cell.carat_band): cell for cell in cells}
+    
+    actual_cells, expected_cells = summary(grid.cells()), summary(expected.cells())
+    assert actual_cells.keys() == expected_cells.keys()
+    for key, cell in expected_cells.items():
+        assert actual_cells[key].count == cell.count, key
+        assert actual_cells[key].median == pytest.approx(cell.median), key
+        assert actual_cells[key].q1 == pytest.approx(cell.q1), key
+        assert actual_cells[key].q3 == pytest.approx(cell.q3), key
+    
+    def by_id(ids, scores):
+        return {diamond_id: None if math.isnan(score) else score for diamond_id, score in zip(ids, scores)}
+    
+    actual_scores, expected_scores = by_id(*grid.scores()), by_id(*expected.scores())
+    assert actual_scores.keys() == expected_scores.keys()
+    for diamond_id, score in expected_scores.items():
+        assert actual_scores[diamond_id] == pytest.approx(score), diamond_id
+    assert sorted(outlier.id for outlier in grid.outliers()) == sorted(outlier.id for outlier in expected.outliers())
+
+
+def test_incremental_changes_match_a_rebuild():
+    """Random adds, updates and removes leave the grid as a fresh build would be"""
+    rng = random.Random(5)
+    stones = {stone["id"]: stone for stone in (make_stone(rng, index) for index in range(600))}
+    grid = PriceGrid(list(stones.values()))
+    next_index = len(stones)
+    for _ in range(1500):
+        action = rng.random()
+        if action < 0.3:
+            stone = make_stone(rng, next_index)
+            next_index += 1
+            stones[stone["id"]] = stone
+            grid.add(stone)
+        elif action < 0.5 and stones:
+            diamond_id = rng.choice(list(stones))
+            del stones[diamond_id]
+            grid.remove(diamond_id)
+        elif stones:
+            diamond_id = rng.choice(list(stones))
+            fresh = make_stone(rng, 0)
+            fields = {name: fresh[name] for name in rng.sample(["shape", "color", "clarity", "weight", "price_per_carat"], 2)}
+            stones[diamond_id] = {**stones[diamond_id], **fields}
+            grid.update(diamond_id, fields)
+        if rng.random() < 0.05:
+            # Queries in between refresh dirty cells part way through
+            grid.outliers()
+    assert_same_grid(grid, PriceGrid(list(stones.values())))
+
+
+def test_attached_grid_follows_client_writes():
+    """An attached grid matches a rebuild from the server after writes through the client"""
+    with StubMazalbotServer(inventory_size=200) as server:
+        client = MazalbotClient(base_url=server.url, user_id=server.user_id, log_level="CRITICAL")
+        grid = PriceGrid(client.fetch_all_diamonds().diamonds)
+        grid.attach(client)
+        ids = [diamond["id"] for diamond in client.get_diamonds(limit=20).data]
+        for diamond_id in ids[:5]:
+            assert client.update_diamond(diamond_id, {"price_per_carat": 99999, "color": "D"}).success
+        for diamond_id in ids[5:10]:
+            assert client.delete_diamond(diamond_id).success
+        assert client.add_diamond(
+            {"stock_number": "NEW-1", "shape": "Round", "weight": 1.0, "color": "G", "clarity": "VS1", "price_per_carat": 5000}
+        ).success
+        grid.detach()
+        assert_same_grid(grid, PriceGrid(client.fetch_all_diamonds().diamonds))
+
+
+def test_update_of_an_untracked_stone_is_skipped():
+    """Updating an unknown id does not add a partial stone to the grid"""
+    rng = random.Random(3)
+    stones = [make_stone(rng, index) for index in range(50)]
+    grid = PriceGrid(stones)
+    grid.update("no-such-stone", {"shape": "Round", "color": "D", "clarity": "VS1", "weight": 1.0, "price_per_carat": 1})
+    assert "no-such-stone" not in grid.scores()[0].tolist()
+    assert_same_grid(grid, PriceGrid(stones))
@@ -0,0 +1,89 @@
+"""
+Tests for RateLimiter header handling.
+
+Run with: python -m pytest test_rate_limiter.py
+"""
+
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks"))
+
+from mazalbot_client import MazalbotClient, RateLimiter  # noqa: E402
+from stub_server import StubMazalbotServer  # noqa: E402
+
+
+def test_unlimited_until_headers_are_seen():
+    """Without a rate or rate-limit headers nothing is held back"""
+    limiter = RateLimiter()
+    assert limiter.rate is None
+    assert all(limiter.reserve() == 0 for _ in range(100))
+    limiter.update_from_headers({"Content-Type": "application/json"})
+    assert limiter.rate is None and limiter.reserve() == 0
+
+
+def test_limit_and_reset_set_the_rate():
+    """limit requests are spread over the reset window, scaled by the safety margin"""
+    limiter = RateLimiter(safety_margin=0.5)
+    limiter.update_from_headers({"X-RateLimit-Limit": "100", "X-RateLimit-Remaining": "100", "X-RateLimit-Reset": "10"})
+    assert limiter.rate == pytest.approx(5.0)
+    # Learning the limit never adds tokens; each further request waits one refill interval more
+    assert limiter.reserve() == 0
+    assert limiter.reserve() == pytest.approx(0.2, abs=0.02)
+    assert limiter.reserve() == pytest.approx(0.4, abs=0.02)
+
+
+def test_window_is_the_longest_reset_seen():
+    """A reset counting down within the window does not speed the bucket up"""
+    limiter = RateLimiter(safety_margin=1.0)
+    limiter.update_from_headers({"X-RateLimit-Limit": "60", "X-RateLimit-Reset": "60"})
+    limiter.update_from_headers({"X-RateLimit-Limit": "60", "X-RateLimit-Reset": "5"})
+    assert limiter.rate == pytest.approx(1.0)
+
+
+def test_epoch_reset_is_converted_to_a_delta():
+    """A reset given as an epoch timestamp is read as seconds from now"""
+    limiter = RateLimiter(safety_margin=1.0)
+    limiter.update_from_headers({"X-RateLimit-Limit": "20", "X-RateLimit-Reset": str(int(time.time()) + 10)})
+    assert limiter.rate == pytest.approx(2.0, rel=0.15)
+
+
+def test_no_remaining_requests_blocks_until_reset():
+    """Remaining 0 holds back the next request until the window resets"""
+    limiter = RateLimiter()
+    limiter.update_from_headers({"X-RateLimit-Limit": "10", "X-RateLimit-Remaining": "0", "X-RateLimit-Reset": "2"})
+    assert limiter.reserve() == pytest.approx(2.0, abs=0.1)
+    assert limiter.throttled == 1
+
+
+def test_block_holds_back_every_caller():
+    """block only ever extends the pause, and it applies to every reservation"""
+    limiter = RateLimiter()
+    limiter.block(1.5)
+    limiter.block(0.5)
+    assert limiter.reserve() == pytest.approx(1.5, abs=0.1)
+    assert limiter.reserve() == pytest.approx(1.5, abs=0.1)
+
+
+def test_malformed_headers_are_ignored():
+    """Unparseable rate-limit headers leave the bucket as it was"""
+    limiter = RateLimiter(rate=4.0)
+    limiter.update_from_headers({"X-RateLimit-Limit": "lots", "X-RateLimit-Remaining": "", "X-RateLimit-Reset": "soon"})
+    assert limiter.rate == 4.0
+    assert limiter.reserve() == 0
+
+
+def test_client_stays_under_the_server_limit():
+    """The limiter learns the stub's limit from its headers and avoids 429s"""
+    with StubMazalbotServer(inventory_size=5, rate_limit=10, rate_window=0.5) as server:
+        client = MazalbotClient(base_url=server.url, user_id=server.user_id, log_level="CRITICAL")
+        diamond_id = client.get_diamonds().data[0]["id"]
+        started = time.monotonic()
+        assert all(client.get_diamond(diamond_id).success for _ in range(30))
+        assert time.monotonic() - started > 1.0
+    assert client.rate_limiter.rate == pytest.approx(10 * 0.9 / 0.5, rel=0.2)
+    stats = client.stats()["GET /api/v1/get_stone/{id}"]
+    assert stats.status_429 == 0
@@ -0,0 +1,93 @@
+"""
+Tests for plan_reconcile and reconcile.
+
+Run with: python -m pytest test_reconcile.py
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks"))
+
+from mazalbot_client import MazalbotClient  # noqa: E402
+from mazalbot_reconcile import plan_reconcile, reconcile  # noqa: E402
+from stub_server import StubMazalbotServer  # noqa: E402
+
+
+def stone(stock_number, id=None, **fields):
+    diamond = {"stock_number": stock_number, "shape": "Round", "weight": 1.0, "color": "D", "clarity": "VS1", **fields}
+    if id is not None:
+        diamond["id"] = id
+    return diamond
+
+
+def test_repeated_desired_stock_numbers_keep_the_first():
+    """Later desired stones with an already seen stock number are listed, not applied"""
+    plan = plan_reconcile(
+        [stone("A", price=1), stone("A", price=2), stone(" A ", price=3), stone("B")],
+        [stone("A", id="a", price=1)]
+    )
+    assert plan.duplicates == ["A", "A"]
+    assert plan.unchanged == 1
+    assert plan.updates == []
+    assert [diamond["stock_number"] for diamond in plan.adds] == ["B"]
+
+
+def test_unkeyed_counts_stones_that_cannot_be_matched_or_updated():
+    """Desired stones without a stock number, and changed remote stones without an id, are unkeyed"""
+    plan = plan_reconcile(
+        [stone(None), stone("  "), {"shape": "Oval"}, stone("C", price=5), stone("D", price=5)],
+        [stone("C", price=4), stone("D", id="d", price=4)]
+    )
+    assert plan.unkeyed == 4
+    assert plan.updates == [("d", {"price": 5})]
+    assert plan.adds == []
+    # The remote stone without an id cannot be deleted either
+    assert plan.deletes == []
+
+
+def test_remote_duplicates_are_deleted_only_with_delete_missing():
+    """Remote stones repeating a stock number are always listed, and deleted with delete_missing"""
+    current = [stone("A", id="a1"), stone("A", id="a2"), stone("A", id="a3"), stone("B", id="b")]
+    plan = plan_reconcile([stone("A")], current)
+    assert plan.remote_duplicates == ["a2", "a3"]
+    assert sorted(plan.deletes) == ["a2", "a3", "b"]
+    assert plan.unchanged == 1
+    
+    plan = plan_reconcile([stone("A")], current, delete_missing=False)
+    assert plan.remote_duplicates == ["a2", "a3"]
+    assert plan.deletes == []
+
+
+def test_updates_carry_only_changed_fields():
+    """Equal numbers of different types, empty strings and fields the feed lacks are not changes"""
+    plan = plan_reconcile(
+        [stone("A", weight=1, price="", cut="Good"), stone("B", color="E"), {"stock_number": "C", "weight": 2.0}],
+        [
+            stone("A", id="a", price=None, cut="Good", lab="GIA"),
+            stone("B", id="b"),
+            stone("C", id="c", lab="GIA"),
+        ]
+    )
+    assert plan.unchanged == 1
+    assert plan.updates == [("b", {"color": "E"}), ("c", {"weight": 2.0})]
+
+
+def test_reconcile_applies_the_plan():
+    """reconcile adds, updates and deletes against the stub until nothing is left to change"""
+    with StubMazalbotServer(inventory_size=6) as server:
+        client = MazalbotClient(base_url=server.url, user_id=server.user_id, log_level="CRITICAL")
+        remote = client.fetch_all_diamonds().diamonds
+        desired = [dict(diamond) for diamond in remote[:4]]
+        desired[0]["price_per_carat"] = 1.0
+        desired.append(stone("NEW-1"))
+        
+        report = reconcile(client, desired)
+        assert report.success, report.error
+        assert (report.plan.added, report.plan.updated, report.plan.deleted) == (1, 1, 2)
+        assert report.plan.unchanged == 3
+        
+        after = {diamond["stock_number"]: diamond for diamond in client.fetch_all_diamonds().diamonds}
+        assert sorted(after) == sorted(diamond["stock_number"] for diamond in desired)
+        assert after[desired[0]["stock_number"]]["price_per_carat"] == 1.0
+        assert reconcile(client, desired, dry_run=True).plan.changes == 0
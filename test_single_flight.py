@@ -0,0 +1,105 @@
+"""
+Tests for SingleFlight request coalescing.
+
+Run with: python -m pytest test_single_flight.py
+"""
+
+import asyncio
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks"))
+
+from mazalbot_client import ApiResponse, MazalbotClient, SingleFlight  # noqa: E402
+from stub_server import StubMazalbotServer  # noqa: E402
+
+KEY = SingleFlight.make_key(("http://example", "token"), "/api/v1/get_stone/1", {"user_id": 1})
+
+
+def wait_for(condition, timeout: float = 5.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def test_leader_exception_reaches_every_waiting_caller():
+    """Callers waiting on a failed request get its exception, and the key is released"""
+    flights = SingleFlight()
+    release = threading.Event()
+    calls = []
+    
+    def failing_call() -> ApiResponse:
+        calls.append(1)
+        release.wait(5)
+        raise ConnectionError("boom")
+    
+    with ThreadPoolExecutor(max_workers=5) as executor:
+        futures = [executor.submit(flights.do, KEY, failing_call) for _ in range(5)]
+        wait_for(lambda: flights.stats()["saved"] == 4)
+        release.set()
+        for future in futures:
+            with pytest.raises(ConnectionError, match="boom"):
+                future.result(timeout=5)
+    assert len(calls) == 1
+    assert flights.stats() == {"requests": 1, "saved": 4, "in_flight": 0}
+    
+    # The failure is not remembered; the next read sends a new request
+    assert flights.do(KEY, lambda: ApiResponse(success=True, data=1)).data == 1
+    assert flights.stats()["requests"] == 2
+
+
+def test_async_exception_reaches_every_waiting_caller():
+    """Coroutines awaiting a failed request all get its exception"""
+    flights = SingleFlight()
+    
+    async def failing_call() -> ApiResponse:
+        await asyncio.sleep(0.05)
+        raise ConnectionError("boom")
+    
+    async def main():
+        return await asyncio.gather(*(flights.do_async(KEY, failing_call) for _ in range(5)), return_exceptions=True)
+    
+    results = asyncio.run(main())
+    assert all(isinstance(result, ConnectionError) for result in results)
+    assert flights.stats() == {"requests": 1, "saved": 4, "in_flight": 0}
+
+
+def test_cancelled_async_caller_does_not_cancel_the_request():
+    """Cancelling one waiting coroutine leaves the shared request running for the rest"""
+    flights = SingleFlight()
+    
+    async def slow_call() -> ApiResponse:
+        await asyncio.sleep(0.1)
+        return ApiResponse(success=True, data="shared")
+    
+    async def main():
+        first = asyncio.ensure_future(flights.do_async(KEY, slow_call))
+        second = asyncio.ensure_future(flights.do_async(KEY, slow_call))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        return await second, first.cancelled()
+    
+    response, cancelled = asyncio.run(main())
+    assert cancelled
+    assert response.data == "shared"
+    assert flights.stats()["in_flight"] == 0
+
+
+def test_concurrent_identical_reads_share_one_request():
+    """Identical reads made while one is in flight reach the server once"""
+    with StubMazalbotServer(inventory_size=10, latency=0.2) as server:
+        flights = SingleFlight()
+        client = MazalbotClient(
+            base_url=server.url, user_id=server.user_id, log_level="CRITICAL", single_flight=flights
+        )
+        with ThreadPoolExecutor(max_workers=10) as executor:
+            responses = list(executor.map(lambda _: client.get_dashboard_stats(), range(10)))
+        assert all(response.success for response in responses)
+        assert server.request_count == 1
+        assert flights.stats()["requests"] == 1
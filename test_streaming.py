@@ -0,0 +1,84 @@
+"""
+Tests for the incremental JSON decoder behind MazalbotClient.stream_diamonds.
+
+Run with: python -m pytest test_streaming.py
+"""
+
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks"))
+
+from mazalbot_client import MazalbotClient, _IncrementalArrayDecoder  # noqa: E402
+from stub_server import StubMazalbotServer  # noqa: E402
+
+STONES = [
+    {"id": "a", "weight": 1.25, "price": 12500, "notes": "Cut in Tel Aviv — éclat \U0001f48e", "tags": ["x", {"y": [1, 2]}]},
+    {"id": "b", "weight": 3e-1, "price": -7, "notes": "braces } ] and \"quotes\" in a string", "tags": []},
+    {"id": "c", "weight": 10, "price": None, "notes": "", "tags": [True, False]},
+]
+
+
+def decode_in_pieces(body: bytes, size: int, key: str = "data"):
+    decoder = _IncrementalArrayDecoder(key)
+    items = []
+    for start in range(0, len(body), size):
+        items.extend(decoder.feed(body[start:start + size]))
+    items.extend(decoder.feed(b"", final=True))
+    return decoder, items
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 64])
+def test_bare_array_survives_every_chunk_boundary(size):
+    """Elements, numbers and multi-byte characters split across chunks decode as a whole"""
+    body = json.dumps(STONES, ensure_ascii=False, indent=1).encode("utf-8")
+    decoder, items = decode_in_pieces(body, size)
+    assert items == STONES
+    assert decoder.found and decoder.extra == {}
+
+
+@pytest.mark.parametrize("size", [1, 5, 64])
+def test_wrapped_array_collects_the_other_members(size):
+    """In an object body, members around the array are kept in extra"""
+    payload = {"success": True, "meta": {"page": [1, 2]}, "data": STONES, "total": 3}
+    body = json.dumps(payload).encode("utf-8")
+    decoder, items = decode_in_pieces(body, size)
+    assert items == STONES
+    assert decoder.found
+    assert decoder.extra == {"success": True, "meta": {"page": [1, 2]}, "total": 3}
+
+
+def test_number_at_a_chunk_boundary_is_not_cut_short():
+    """A number ending exactly at a chunk boundary waits for the next chunk"""
+    decoder = _IncrementalArrayDecoder()
+    assert decoder.feed(b"[12") == []
+    assert decoder.feed(b"34.5") == []
+    assert decoder.feed(b"e1, 7") == [12345.0]
+    assert decoder.feed(b"]", final=True) == [7]
+
+
+def test_object_without_the_key_is_not_found():
+    decoder, items = decode_in_pieces(b'{"success": false, "error": "nope"}', 4)
+    assert items == []
+    assert not decoder.found
+    assert decoder.extra == {"success": False, "error": "nope"}
+
+
+def test_truncated_body_raises():
+    decoder = _IncrementalArrayDecoder()
+    assert decoder.feed(b'[{"id": "a"}, {"id"') == [{"id": "a"}]
+    with pytest.raises(ValueError):
+        decoder.feed(b"", final=True)
+
+
+def test_stream_diamonds_matches_a_buffered_fetch():
+    """Streaming with a tiny read size returns the same stones under the shared route"""
+    with StubMazalbotServer(inventory_size=50) as server:
+        client = MazalbotClient(base_url=server.url, user_id=server.user_id, log_level="CRITICAL")
+        streamed = list(client.stream_diamonds(chunk_size=13))
+        fetched = client.fetch_all_diamonds()
+    assert streamed == fetched.diamonds
+    assert list(client.stats()) == ["GET /api/v1/get_all_stones"]
@@ -0,0 +1,106 @@
+"""
+Tests for MazalbotClient.upload_diamonds against the local stub server.
+
+Run with: python -m pytest test_upload.py
+"""
+
+import os
+import random
+import sys
+from typing import Dict, Optional
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks"))
+
+from mazalbot_client import _MAX_SPLIT_DEPTH, MazalbotClient  # noqa: E402
+from stub_server import StubMazalbotServer, make_diamond  # noqa: E402
+
+
+class PickyServer(StubMazalbotServer):
+    """Refuses uploads containing stones whose stock number marks them as bad"""
+    
+    def handle(self, method, path, query, body):
+        if method == "POST" and path == "/api/v1/upload-inventory":
+            stock_numbers = [diamond.get("stock_number", "") for diamond in (body or {}).get("diamonds", [])]
+            for index, stock_number in enumerate(stock_numbers):
+                if stock_number.startswith("NAMED"):
+                    return 400, {"success": False, "error": f"Diamond at index {index} has an invalid price", "status_code": 400}, {}
+            if any(stock_number.startswith("UNPROCESSABLE") for stock_number in stock_numbers):
+                return 422, {"success": False, "error": "Unprocessable stone", "status_code": 422}, {}
+        return super().handle(method, path, query, body)
+
+
+@pytest.fixture
+def server():
+    with PickyServer(inventory_size=0) as server:
+        yield server
+
+
+@pytest.fixture
+def client(server):
+    return MazalbotClient(base_url=server.url, user_id=server.user_id, log_level="CRITICAL")
+
+
+def feed(count: int, bad: Optional[Dict[int, str]] = None) -> list:
+    rng = random.Random(1)
+    diamonds = [make_diamond(rng, index, 1) for index in range(count)]
+    for index, stock_number in (bad or {}).items():
+        diamonds[index]["stock_number"] = stock_number
+    return diamonds
+
+
+def test_unprocessable_stone_is_isolated_by_bisection(client, server):
+    """A 422 splits the chunk until only the offending stone is rejected"""
+    result = client.upload_diamonds(feed(64, {37: "UNPROCESSABLE-1"}), chunk_size=64)
+    assert result.total == 64
+    assert [item.index for item in result.items if item.status == "rejected"] == [37]
+    assert result.items[37].reason == "Unprocessable stone"
+    assert result.accepted == 63
+    assert server.inventory_size() == 63
+    # One request per level down to the single stone, plus its sibling at each level
+    assert result.requests == 1 + 2 * 6
+
+
+def test_named_stone_is_rejected_and_the_rest_resent(client, server):
+    """A 400 naming a stone by index rejects just that stone without splitting"""
+    result = client.upload_diamonds(feed(20, {3: "NAMED-1", 11: "NAMED-2"}), chunk_size=20)
+    rejected = [item for item in result.items if item.status == "rejected"]
+    assert [item.index for item in rejected] == [3, 11]
+    assert rejected[0].reason == "Diamond at index 3 has an invalid price"
+    # The second culprit sits at index 10 of the resent chunk
+    assert rejected[1].reason == "Diamond at index 10 has an invalid price"
+    assert result.accepted == 18
+    assert result.requests == 3
+    assert server.inventory_size() == 18
+
+
+def test_unnamed_400_rejects_the_whole_chunk(client, server):
+    """A 400 that names no stone rejects every stone in the chunk"""
+    server.error_rate, server.error_status = 1.0, 400
+    result = client.upload_diamonds(feed(10), chunk_size=10)
+    assert result.rejected == 10
+    assert result.requests == 1
+
+
+def test_splitting_stops_at_max_split_depth(client, server):
+    """A chunk that is always refused is halved at most _MAX_SPLIT_DEPTH times"""
+    server.error_rate, server.error_status = 1.0, 422
+    size = 2 ** (_MAX_SPLIT_DEPTH + 1)
+    result = client.upload_diamonds(feed(size), chunk_size=size)
+    assert result.rejected == size
+    # Every level is fully split; the pieces at the last level are rejected whole
+    assert result.requests == 2 ** (_MAX_SPLIT_DEPTH + 1) - 1
+    assert all(item.attempts == _MAX_SPLIT_DEPTH + 1 for item in result.items)
+
+
+def test_stones_missing_required_fields_are_not_sent(client, server):
+    """Stones without the required fields are rejected before any request"""
+    diamonds = feed(3)
+    del diamonds[1]["clarity"]
+    result = client.upload_diamonds(diamonds)
+    assert result.items[1].status == "rejected"
+    assert result.items[1].attempts == 0
+    assert "clarity" in result.items[1].reason
+    assert result.accepted == 2
+    assert result.requests == 1
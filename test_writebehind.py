@@ -0,0 +1,49 @@
+"""
+Tests for WriteBehindQueue against the local stub server.
+
+Run with: python -m pytest test_writebehind.py
+"""
+
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks"))
+
+from mazalbot_client import MazalbotClient  # noqa: E402
+from mazalbot_writebehind import WriteBehindQueue  # noqa: E402
+from stub_server import StubMazalbotServer  # noqa: E402
+
+
+@pytest.fixture
+def client():
+    with StubMazalbotServer(inventory_size=20) as server:
+        yield MazalbotClient(base_url=server.url, user_id=server.user_id, log_level="CRITICAL")
+
+
+def stone_ids(client: MazalbotClient) -> list:
+    response = client.get_diamonds()
+    assert response.success
+    return [diamond["id"] for diamond in response.data]
+
+
+def test_flush_interval_sends_a_partial_batch(client):
+    """A single write is sent once it is flush_interval old, without waiting for a full batch"""
+    diamond_id = stone_ids(client)[0]
+    with WriteBehindQueue(client, batch_size=100, flush_interval=0.2) as queue:
+        started = time.monotonic()
+        queue.update(diamond_id, {"price_per_carat": 1234.0}).result(timeout=5)
+        assert time.monotonic() - started < 2
+        assert queue.stats.batches == 1
+    assert client.get_diamond(diamond_id).data["price_per_carat"] == 1234.0
+
+
+def test_cancelled_write_does_not_stop_the_worker(client):
+    """Cancelling a waiting write leaves the worker able to send later batches"""
+    first, second = stone_ids(client)[:2]
+    with WriteBehindQueue(client, batch_size=100, flush_interval=0.2) as queue:
+        assert queue.update(first, {"price_per_carat": 1.0}).cancel()
+        queue.update(second, {"price_per_carat": 2.0}).result(timeout=5)
+        assert queue._worker.is_alive()